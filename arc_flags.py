@@ -0,0 +1,405 @@
+"""
+Arc-flag edge pruning for goal-directed search.
+
+Offline, the map is cut into a regions_per_side x regions_per_side grid of
+regions by node coordinates, and every edge gets one bit per region: set if
+the edge lies on some shortest path into that region. A query to
+destinations in regions R then only needs the edges flagged for R; any
+other edge provably leads nowhere useful, so UCS and A* skip it and stop
+wandering away from the target.
+
+How the flags are computed (exact, all shortest paths, not just one tree):
+- edges with both ends in region r are flagged for r
+- for every boundary node b of r (a node in r with an incoming edge from
+  outside r), one backward Dijkstra gives d(u) = cost from u to b; an edge
+  u -> v of cost c is flagged for r when it is tight: d(u) == c + d(v)
+  A shortest path into r enters it for the last time at some boundary node,
+  and every edge before that point is tight for it.
+
+That is one full Dijkstra per boundary node, so building is slow (seconds
+to minutes on large maps). It runs in a process pool and the flags are
+saved next to the map (8 bytes per edge, one bit per region) and reloaded
+as long as the graph digest matches.
+
+Pruning keeps the best path and its cost, but the second-best solution
+may be missed: it is usually not a shortest path.
+
+Usage:
+    flags = load_or_build_arc_flags(graph, node_coords, "map.txt.arcflags")
+    search_ucs(graph, node_coords, origin, destinations, arc_flags=flags)
+
+    python arc_flags.py map.txt [--regions 4] [--workers N] [--out FILE]
+    python search.py map.txt AS --arc-flags [FILE]
+"""
+
+import json
+import math
+import os
+import struct
+import sys
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from checkpoint import graph_digest
+from compiled_graph import CompiledGraph
+from distance_matrix import shortest_path_tree
+
+try:
+    import numpy as np
+except ImportError:  # numpy only speeds up the tight-edge test
+    np = None
+
+
+# Regions per side when none is given (16 regions)
+DEFAULT_REGIONS_PER_SIDE = 4
+
+# Flags are one 64-bit word per edge
+MAX_REGIONS = 64
+
+# Boundary nodes handed to a worker per task
+DEFAULT_CHUNK_SIZE = 32
+
+# Relative slack when testing d(u) == c + d(v) in floating point
+TIGHT_TOLERANCE = 1e-9
+
+ARC_FLAGS_MAGIC = b"ARCF"
+ARC_FLAGS_VERSION = 1
+_PREFIX = struct.Struct("<4sHI")
+
+
+class ArcFlags:
+    """
+    Per-edge region flags for one graph.
+
+    Edge k is the k-th edge in CompiledGraph.from_graph(graph) order, i.e.
+    node by node in ID order and, within a node, in adjacency list order.
+
+    Attributes:
+        regions_per_side (int): Grid size; there are regions_per_side ** 2 regions
+        min_x (int): Left edge of the region grid
+        min_y (int): Bottom edge of the region grid
+        span_x (int): Width of the coordinate bounding box
+        span_y (int): Height of the coordinate bounding box
+        flags (array): 'Q' array, bit r of flags[k] set if edge k is on a
+            shortest path into region r
+        digest (str): graph_digest of the graph the flags were built for
+    """
+
+    def __init__(self, regions_per_side: int, min_x: int, min_y: int, span_x: int, span_y: int,
+                 flags: array, digest: str, compiled: CompiledGraph):
+        self.regions_per_side = regions_per_side
+        self.min_x = min_x
+        self.min_y = min_y
+        self.span_x = span_x
+        self.span_y = span_y
+        self.flags = flags
+        self.digest = digest
+        self._index = compiled.index
+        self._offsets = compiled.offsets
+
+    @property
+    def num_regions(self) -> int:
+        return self.regions_per_side ** 2
+
+    def region_of(self, coords: tuple) -> int:
+        """Region number of an (x, y) coordinate."""
+        k = self.regions_per_side
+        rx = min((coords[0] - self.min_x) * k // self.span_x, k - 1)
+        ry = min((coords[1] - self.min_y) * k // self.span_y, k - 1)
+        return ry * k + rx
+
+    def mask_for(self, node_coords: dict, destinations: list) -> int:
+        """
+        Bit mask of the regions holding the destinations.
+
+        A destination without coordinates has no region; the mask then
+        allows every edge.
+        """
+        mask = 0
+        for dest in destinations:
+            coords = node_coords.get(dest)
+            if coords is None:
+                return (1 << self.num_regions) - 1
+            mask |= 1 << self.region_of(coords)
+        return mask
+
+    def neighbors(self, graph: dict, node: int, mask: int) -> list:
+        """
+        The (neighbor_id, cost) pairs of node whose edge is flagged for mask.
+
+        Args:
+            graph (dict): The graph the flags were built for
+            node (int): Node being expanded
+            mask (int): From mask_for
+
+        Returns:
+            list: Flagged edges, in adjacency list order
+        """
+        i = self._index.get(node)
+        if i is None:
+            return []
+        start = self._offsets[i]
+        flags = self.flags
+        return [edge for j, edge in enumerate(graph.get(node, [])) if flags[start + j] & mask]
+
+    def flagged_fraction(self) -> float:
+        """Average share of the regions each edge is flagged for (lower prunes more)."""
+        if not self.flags:
+            return 0.0
+        bits = sum(bin(word).count("1") for word in self.flags)
+        return bits / (len(self.flags) * self.num_regions)
+
+
+def _region_grid(node_coords: dict, regions_per_side: int) -> tuple:
+    """(min_x, min_y, span_x, span_y) of the coordinate bounding box."""
+    if not node_coords:
+        return 0, 0, 1, 1
+    xs = [x for x, _ in node_coords.values()]
+    ys = [y for _, y in node_coords.values()]
+    return min(xs), min(ys), max(max(xs) - min(xs) + 1, 1), max(max(ys) - min(ys) + 1, 1)
+
+
+# Per-worker state set by _init_worker so the graph is pickled once per
+# process rather than once per task. Thread-local, so in-process runs
+# (workers=1) from several threads do not overwrite each other's state
+_worker = threading.local()
+
+
+def _init_worker(compiled, reverse):
+    _worker.compiled = compiled
+    _worker.reverse = reverse
+    if np is not None:
+        offsets = np.frombuffer(compiled.offsets, dtype=np.int64)
+        _worker.sources = np.repeat(np.arange(compiled.num_nodes), np.diff(offsets))
+        _worker.targets = np.frombuffer(compiled.targets, dtype=np.int64)
+        _worker.costs = np.frombuffer(compiled.costs, dtype=np.float64)
+
+
+def _flag_roots(tasks: list) -> bytes:
+    """
+    Run the backward searches for a chunk of (region, boundary node) pairs.
+
+    Returns:
+        bytes: 'Q' flags from this chunk's tight edges (ORed by the caller)
+    """
+    compiled, reverse = _worker.compiled, _worker.reverse
+    if np is not None:
+        sources, targets, costs = _worker.sources, _worker.targets, _worker.costs
+        flags = np.zeros(compiled.num_edges, dtype=np.uint64)
+        for region, root in tasks:
+            dist = np.frombuffer(shortest_path_tree(reverse, root)[0], dtype=np.float64)
+            # Only edges into nodes that reach the root can be tight
+            edges = np.flatnonzero(np.isfinite(dist[targets]))
+            via = dist[targets[edges]] + costs[edges]
+            tight = dist[sources[edges]] >= via - TIGHT_TOLERANCE * np.maximum(via, 1.0)
+            flags[edges[tight]] |= np.uint64(1 << region)
+        return flags.tobytes()
+
+    offsets, edge_targets, edge_costs = compiled.offsets, compiled.targets, compiled.costs
+    flags = array('Q', bytes(8 * compiled.num_edges))
+    for region, root in tasks:
+        bit = 1 << region
+        dist = shortest_path_tree(reverse, root)[0]
+        for u in range(compiled.num_nodes):
+            du = dist[u]
+            if du == math.inf:
+                continue
+            for k in range(offsets[u], offsets[u + 1]):
+                via = dist[edge_targets[k]] + edge_costs[k]
+                if du >= via - TIGHT_TOLERANCE * max(via, 1.0):
+                    flags[k] |= bit
+    return flags.tobytes()
+
+
+def build_arc_flags(graph: dict, node_coords: dict, regions_per_side: int = DEFAULT_REGIONS_PER_SIDE,
+                    workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ArcFlags:
+    """
+    Compute arc flags for every edge of a graph.
+
+    Args:
+        graph (dict): Adjacency list from parse_input
+        node_coords (dict): Node coordinates (nodes without any belong to no region)
+        regions_per_side (int): Grid size (at most 8, i.e. 64 regions)
+        workers (int): Worker processes (default: CPU count; 1 = run in-process)
+        chunk_size (int): Boundary nodes per worker task
+
+    Returns:
+        ArcFlags: The flags
+
+    Raises:
+        ValueError: If there would be more than MAX_REGIONS regions
+    """
+    if regions_per_side < 1 or regions_per_side ** 2 > MAX_REGIONS:
+        raise ValueError(f"regions_per_side must be between 1 and {math.isqrt(MAX_REGIONS)}")
+
+    compiled = CompiledGraph.from_graph(graph)
+    min_x, min_y, span_x, span_y = _region_grid(node_coords, regions_per_side)
+    arc_flags = ArcFlags(regions_per_side, min_x, min_y, span_x, span_y,
+                         array('Q', bytes(8 * compiled.num_edges)),
+                         graph_digest(graph, node_coords), compiled)
+
+    region = [-1] * compiled.num_nodes
+    for i, node in enumerate(compiled.node_ids):
+        if node in node_coords:
+            region[i] = arc_flags.region_of(node_coords[node])
+
+    # Intra-region edges, and the boundary nodes every region is entered through
+    flags = arc_flags.flags
+    boundary = set()
+    offsets, targets = compiled.offsets, compiled.targets
+    for u in range(compiled.num_nodes):
+        for k in range(offsets[u], offsets[u + 1]):
+            v = targets[k]
+            if region[v] < 0:
+                continue
+            if region[u] == region[v]:
+                flags[k] |= 1 << region[v]
+            else:
+                boundary.add((region[v], v))
+
+    tasks = sorted(boundary)
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    reverse = compiled.reversed()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        _init_worker(compiled, reverse)
+        try:
+            chunk_flags = [_flag_roots(chunk) for chunk in chunks]
+        finally:
+            vars(_worker).clear()
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                                 initargs=(compiled, reverse)) as pool:
+            chunk_flags = list(pool.map(_flag_roots, chunks))
+
+    for data in chunk_flags:
+        words = array('Q')
+        words.frombytes(data)
+        for k, word in enumerate(words):
+            if word:
+                flags[k] |= word
+    return arc_flags
+
+
+def save_arc_flags(arc_flags: ArcFlags, path: str):
+    """
+    Write arc flags to a file (JSON header plus the raw flag words), atomically.
+
+    Args:
+        arc_flags (ArcFlags): Flags to save
+        path (str): Output file
+    """
+    header = json.dumps({
+        'digest': arc_flags.digest, 'regions_per_side': arc_flags.regions_per_side,
+        'box': [arc_flags.min_x, arc_flags.min_y, arc_flags.span_x, arc_flags.span_y],
+        'edges': len(arc_flags.flags),
+    }).encode()
+    words = array('Q', arc_flags.flags)
+    if sys.byteorder == 'big':
+        words.byteswap()
+    # Unique per writer, so concurrent builds of the same map cannot interleave
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_PREFIX.pack(ARC_FLAGS_MAGIC, ARC_FLAGS_VERSION, len(header)))
+        f.write(header)
+        f.write(words.tobytes())
+    os.replace(temp_path, path)
+
+
+def load_arc_flags(path: str, graph: dict, node_coords: dict) -> ArcFlags:
+    """
+    Read arc flags saved for this exact graph.
+
+    Args:
+        path (str): File written by save_arc_flags
+        graph (dict): Graph the flags are for
+        node_coords (dict): Its node coordinates
+
+    Returns:
+        ArcFlags: The flags
+
+    Raises:
+        ValueError: If the file is not an arc-flag file or was built for a
+            different graph
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        magic, version, header_length = _PREFIX.unpack_from(data, 0)
+        if magic != ARC_FLAGS_MAGIC or version != ARC_FLAGS_VERSION:
+            raise ValueError(f"{path} is not an arc-flag file (or an unsupported version)")
+        header = json.loads(data[_PREFIX.size:_PREFIX.size + header_length])
+    except (struct.error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError(f"{path} is not an arc-flag file or is damaged")
+    if header['digest'] != graph_digest(graph, node_coords):
+        raise ValueError(f"{path} was built for a different graph")
+
+    words = array('Q')
+    words.frombytes(data[_PREFIX.size + header_length:])
+    if sys.byteorder == 'big':
+        words.byteswap()
+    if len(words) != header['edges']:
+        raise ValueError(f"{path} is truncated")
+    return ArcFlags(header['regions_per_side'], *header['box'], words, header['digest'],
+                    CompiledGraph.from_graph(graph))
+
+
+def load_or_build_arc_flags(graph: dict, node_coords: dict, path: str,
+                            regions_per_side: int = None, workers: int = None) -> ArcFlags:
+    """
+    Load flags from path if they fit the graph, otherwise build and save them.
+
+    Args:
+        graph (dict): Adjacency list
+        node_coords (dict): Node coordinates
+        path (str): Flag file (conventionally "<map>.arcflags")
+        regions_per_side (int): Grid size; a saved file with another size is
+            rebuilt (default: whatever was saved, else DEFAULT_REGIONS_PER_SIDE)
+        workers (int): Worker processes for a build
+
+    Returns:
+        ArcFlags: The flags
+    """
+    if os.path.exists(path):
+        try:
+            arc_flags = load_arc_flags(path, graph, node_coords)
+            if regions_per_side is None or arc_flags.regions_per_side == regions_per_side:
+                return arc_flags
+        except ValueError:
+            pass
+    arc_flags = build_arc_flags(graph, node_coords, regions_per_side or DEFAULT_REGIONS_PER_SIDE,
+                                workers)
+    save_arc_flags(arc_flags, path)
+    return arc_flags
+
+
+def main():
+    """Command-line entry point: build and save the arc flags of a map file."""
+    import argparse
+    import time
+    from graph_parser import parse_input
+
+    parser = argparse.ArgumentParser(description="Precompute arc flags for a map")
+    parser.add_argument("filename", help="Graph file in the assignment format")
+    parser.add_argument("--regions", type=int, default=DEFAULT_REGIONS_PER_SIDE,
+                        help=f"Regions per side (default: {DEFAULT_REGIONS_PER_SIDE})")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--out", help="Flag file (default: <filename>.arcflags)")
+    args = parser.parse_args()
+
+    graph, node_coords, _, _ = parse_input(args.filename)
+    start = time.perf_counter()
+    try:
+        arc_flags = build_arc_flags(graph, node_coords, args.regions, args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    out = args.out or args.filename + ".arcflags"
+    save_arc_flags(arc_flags, out)
+    print(f"{len(arc_flags.flags)} edges, {arc_flags.num_regions} regions, "
+          f"{arc_flags.flagged_fraction():.1%} of edge/region pairs flagged, "
+          f"built in {time.perf_counter() - start:.1f}s -> {out}")
+
+
+if __name__ == "__main__":
+    main()
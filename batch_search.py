@@ -0,0 +1,276 @@
+"""
+Thread-pool batch queries over one shared, read-only graph.
+
+Worker processes (search_server.py, portfolio.py) each hold or map their
+own copy of the graph, and every query and result crosses a pipe. For many
+small queries that overhead dominates. Threads share the parsed graph
+as it is, and on a free-threaded Python build (3.13t and later) they also
+run in parallel.
+
+The search functions are re-entrant: all their state (open list, closed
+set, solutions, counters) lives in locals, and they never write to the
+graph, node_coords or any module-level object. Shared helpers that do keep
+state guard it (ExactHeuristicCache and TileCache take a lock) or keep it
+per thread (the in-process worker state of distance_matrix.py and
+arc_flags.py). What a search reuses across queries is per-thread scratch:
+SearchPool gives each thread its own VisitedMarks, so DFS, BFS and GBFS
+reuse one closed-set buffer per thread instead of allocating a new set per
+query or sharing one between threads.
+
+PORTFOLIO and HDA start processes of their own and are not run here.
+
+Usage:
+    with SearchPool(graph, node_coords, workers=8) as pool:
+        results = pool.run_batch([('AS', origin, destinations), ...])
+        future = pool.submit('UCS', origin, destinations, queue='dial')
+
+    python batch_search.py map.txt --method AS --queries 200 --workers 1 2 4
+"""
+
+import inspect
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from search import METHOD_MAP
+from visited_marks import VisitedMarks
+
+
+# Methods that start worker processes of their own
+PROCESS_METHODS = {'PORTFOLIO', 'HDA'}
+
+# Queries handed to a worker process per task (amortizes the IPC)
+DEFAULT_PROCESS_CHUNK = 16
+
+
+def _accepts(search_function, name: str) -> bool:
+    return name in inspect.signature(search_function).parameters
+
+
+def _check_method(method: str):
+    if method not in METHOD_MAP:
+        raise ValueError(f"Invalid method '{method}'")
+    if method in PROCESS_METHODS:
+        raise ValueError(f"Method '{method}' starts its own processes and cannot run in a pool")
+
+
+class SearchPool:
+    """
+    ThreadPoolExecutor running METHOD_MAP searches on one graph.
+
+    Attributes:
+        graph (dict): Adjacency list shared by every query (never modified)
+        node_coords (dict): Coordinates shared by every query
+        workers (int): Threads in the pool
+        reuse_visited (bool): Give each thread one VisitedMarks for the
+            methods that accept one (DFS, BFS, GBFS)
+    """
+
+    def __init__(self, graph: dict, node_coords: dict, workers: int = None, reuse_visited: bool = True):
+        self.graph = graph
+        self.node_coords = node_coords
+        self.workers = workers or os.cpu_count() or 1
+        self.reuse_visited = reuse_visited
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="search")
+
+    def _visited(self) -> VisitedMarks:
+        """This thread's closed-set marks, created on its first query."""
+        marks = getattr(self._local, 'visited', None)
+        if marks is None:
+            marks = VisitedMarks(self.graph)
+            self._local.visited = marks
+        return marks
+
+    def _run(self, method: str, origin: int, destinations: list, kwargs: dict):
+        search_function = METHOD_MAP[method]
+        if self.reuse_visited and 'visited' not in kwargs and _accepts(search_function, 'visited'):
+            kwargs = dict(kwargs, visited=self._visited())
+        return search_function(self.graph, self.node_coords, origin, destinations, **kwargs)
+
+    def submit(self, method: str, origin: int, destinations: list, **kwargs):
+        """
+        Queue one query.
+
+        Args:
+            method (str): METHOD_MAP key
+            origin (int): Starting node ID
+            destinations (list): List of goal node IDs
+            **kwargs: Extra keyword arguments for the search function
+
+        Returns:
+            Future: Resolves to the SearchResult
+
+        Raises:
+            ValueError: If the method is unknown or starts its own processes
+        """
+        _check_method(method)
+        return self._executor.submit(self._run, method, origin, destinations, kwargs)
+
+    def run_batch(self, queries: list) -> list:
+        """
+        Run queries concurrently and wait for all of them.
+
+        Args:
+            queries (list): (method, origin, destinations) or
+                (method, origin, destinations, kwargs) tuples
+
+        Returns:
+            list: SearchResult per query, in query order
+
+        Raises:
+            ValueError: If a method is unknown or starts its own processes
+        """
+        futures = [self.submit(query[0], query[1], query[2], **(query[3] if len(query) > 3 else {}))
+                   for query in queries]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Wait for queued queries and stop the threads."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Per-process state for run_batch_processes, set by _init_worker
+_worker = threading.local()
+
+
+def _init_worker(graph, node_coords):
+    _worker.graph = graph
+    _worker.node_coords = node_coords
+
+
+def _run_in_process(query: tuple):
+    method, origin, destinations = query[:3]
+    kwargs = query[3] if len(query) > 3 else {}
+    return METHOD_MAP[method](_worker.graph, _worker.node_coords, origin, destinations, **kwargs)
+
+
+def run_batch_processes(graph: dict, node_coords: dict, queries: list, workers: int = None,
+                        chunk_size: int = DEFAULT_PROCESS_CHUNK) -> list:
+    """
+    Run the same batch in a ProcessPoolExecutor, for comparison with SearchPool.
+
+    The graph goes to each worker once, through the pool initializer
+    (forked workers share it copy-on-write); queries and results are
+    pickled in chunks.
+
+    Args:
+        graph (dict): Adjacency list
+        node_coords (dict): Node coordinates
+        queries (list): As for SearchPool.run_batch
+        workers (int): Worker processes (default: CPU count)
+        chunk_size (int): Queries per task
+
+    Returns:
+        list: SearchResult per query, in query order
+
+    Raises:
+        ValueError: If a method is unknown or starts its own processes
+    """
+    for query in queries:
+        _check_method(query[0])
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=_init_worker,
+                             initargs=(graph, node_coords)) as pool:
+        return list(pool.map(_run_in_process, queries, chunksize=chunk_size))
+
+
+def random_queries(graph: dict, method: str, count: int, seed: int = 0, **kwargs) -> list:
+    """
+    Random (method, origin, [destination], kwargs) queries for benchmarks.
+
+    Args:
+        graph (dict): Graph to draw nodes from
+        method (str): METHOD_MAP key for every query
+        count (int): Number of queries
+        seed (int): Random seed
+        **kwargs: Keyword arguments added to every query
+
+    Returns:
+        list: The queries
+    """
+    rng = random.Random(seed)
+    nodes = sorted(graph)
+    return [(method, rng.choice(nodes), [rng.choice(nodes)], kwargs) for _ in range(count)]
+
+
+def compare_scaling(graph: dict, node_coords: dict, queries: list, worker_counts: list) -> list:
+    """
+    Time a query batch serially, on thread pools and on process pools.
+
+    Args:
+        graph (dict): Adjacency list
+        node_coords (dict): Node coordinates
+        queries (list): As for SearchPool.run_batch
+        worker_counts (list): Pool sizes to try
+
+    Returns:
+        list: (mode, workers, seconds) rows, the serial run first
+
+    Raises:
+        RuntimeError: If a pool returns a different cost than the serial run
+    """
+    start = time.perf_counter()
+    expected = [METHOD_MAP[query[0]](graph, node_coords, query[1], query[2],
+                                     **(query[3] if len(query) > 3 else {}))
+                for query in queries]
+    rows = [("serial", 1, time.perf_counter() - start)]
+
+    for workers in worker_counts:
+        for mode in ("threads", "processes"):
+            start = time.perf_counter()
+            if mode == "threads":
+                with SearchPool(graph, node_coords, workers) as pool:
+                    results = pool.run_batch(queries)
+            else:
+                results = run_batch_processes(graph, node_coords, queries, workers)
+            rows.append((mode, workers, time.perf_counter() - start))
+            if [result.cost for result in results] != [result.cost for result in expected]:
+                raise RuntimeError(f"{mode} x{workers} returned different costs than the serial run")
+    return rows
+
+
+def main():
+    """Command-line entry point: compare thread and process scaling on one map."""
+    import argparse
+    from graph_parser import parse_input
+
+    parser = argparse.ArgumentParser(description="Thread vs process scaling for batch queries")
+    parser.add_argument("filename", help="Graph file in the assignment format")
+    parser.add_argument("--method", default="AS", help="METHOD_MAP key (default: AS)")
+    parser.add_argument("--queries", type=int, default=200, help="Random queries in the batch")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Pool sizes to try")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the queries")
+    args = parser.parse_args()
+
+    method = args.method.upper()
+    try:
+        _check_method(method)
+    except ValueError as e:
+        parser.error(str(e))
+    graph, node_coords, _, _ = parse_input(args.filename)
+    kwargs = {'max_solutions': 1} if method in ('AS', 'ASTAR', 'GBFS') else {}
+    queries = random_queries(graph, method, args.queries, args.seed, **kwargs)
+
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"{args.filename}: {len(graph)} nodes, {args.queries} x {method}, "
+          f"{os.cpu_count()} CPUs, GIL {'enabled' if gil else 'disabled'}")
+    rows = compare_scaling(graph, node_coords, queries, args.workers)
+    serial_seconds = rows[0][2]
+    print(f"{'Mode':<10} | {'Workers':<7} | {'Seconds':<8} | {'Queries/s':<9} | {'Speedup':<7}")
+    print("-" * 53)
+    for mode, workers, seconds in rows:
+        print(f"{mode:<10} | {workers:<7} | {seconds:<8.2f} | {len(queries) / seconds:<9.1f} | "
+              f"{serial_seconds / seconds:<7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Checkpoint and resume for long-running searches.
+
+search_ucs and search_ida_star accept a Checkpointer and save their state to
+disk every `interval` seconds; passing the state back as `resume` continues
+the search exactly where it left off. The resumed run returns the same result
+as an uninterrupted one: same paths, costs and nodes_created.
+
+What is saved:
+- UCS: the open list (in pop order, so re-pushing it gives the same pops),
+  the closed set, the solutions found so far and the nodes_created/expansion counts
+- IDA*: the f-limit and iteration, the path being explored, which child
+  each node on that path is working on and the smallest pruned f seen there,
+  the solutions found in this iteration and nodes_created
+
+Format: a JSON header (query identity, counters, array layout) followed by
+the raw int64/float64 arrays, the whole thing zlib-compressed. Search node
+paths share prefixes, so they are stored as a prefix tree (node ID and
+parent index per tree node) instead of one list per open node. Files are
+written to a temporary name and renamed, so a crash mid-write leaves the
+previous checkpoint intact.
+
+A checkpoint only fits the run it came from: the query (search function,
+origin, destinations, heuristic and a digest of the graph and coordinates)
+is stored with it and checked on resume.
+
+Usage:
+    query = checkpoint_query(search_ucs, graph, node_coords, origin, destinations)
+    checkpointer = Checkpointer("run.ckpt", query, interval=30)
+    search_ucs(graph, node_coords, origin, destinations, checkpoint=checkpointer)
+
+    # after a crash or timeout
+    state = load_checkpoint("run.ckpt", query)
+    search_ucs(graph, node_coords, origin, destinations, resume=state, checkpoint=checkpointer)
+
+    python search.py big_map.txt UCS --checkpoint run.ckpt [--checkpoint-every 30]
+    python search.py big_map.txt UCS --resume run.ckpt
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from search_node import SearchNode
+
+
+# Seconds between checkpoints when none is given
+DEFAULT_INTERVAL = 30.0
+
+# How many loop iterations pass between clock reads (as for deadlines)
+CHECK_INTERVAL = 256
+
+CHECKPOINT_MAGIC = b"SCKP"
+CHECKPOINT_VERSION = 1
+_PREFIX = struct.Struct("<4sHI")
+
+# How each non-scalar state field is stored; everything else goes into the
+# JSON header
+FIELD_KINDS = {
+    'open': 'nodes',          # SearchNode list (UCS open list, pop order)
+    'solutions': 'nodes',     # SearchNode list
+    'closed': 'intset',       # set of node IDs
+    'path': 'ints',           # node IDs (IDA* current path)
+    'frame_index': 'ints',    # child each path node is exploring
+    'frame_min_f': 'floats',  # smallest pruned f seen so far at each path node
+}
+
+
+def graph_digest(graph: dict, node_coords: dict) -> str:
+    """
+    Hash the adjacency list and coordinates into a short identifier.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+
+    Returns:
+        str: Hex digest identifying this exact input
+    """
+    digest = hashlib.sha1()
+    for node in sorted(graph):
+        digest.update(f"{node}@{node_coords.get(node)}:".encode())
+        for neighbor_id, cost in graph[node]:
+            digest.update(f"{neighbor_id},{cost!r};".encode())
+    return digest.hexdigest()
+
+
+def checkpoint_query(search_function, graph: dict, node_coords: dict, origin: int,
+                     destinations: list, heuristic: str = 'euclidean') -> dict:
+    """
+    Describe a query so a checkpoint can be matched to it.
+
+    Args:
+        search_function (callable): The search being checkpointed
+        graph (dict): Adjacency list the search runs on
+        node_coords (dict): Coordinates of each node
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        heuristic (str): Name of the heuristic in use (the search order
+            depends on it)
+
+    Returns:
+        dict: JSON-ready query identity
+    """
+    return {
+        'search': search_function.__name__,
+        'origin': origin,
+        'destinations': list(destinations),
+        'heuristic': heuristic,
+        'graph': graph_digest(graph, node_coords),
+    }
+
+
+def _pack_nodes(nodes: list) -> tuple:
+    """Store SearchNode paths as a prefix tree: (tree ids, tree parents, node ends, costs)."""
+    tree_ids, tree_parents = array('q'), array('q')
+    children = {}
+    ends, costs = array('q'), array('d')
+    for node in nodes:
+        parent = -1
+        for node_id in node.path:
+            key = (parent, node_id)
+            index = children.get(key)
+            if index is None:
+                index = len(tree_ids)
+                children[key] = index
+                tree_ids.append(node_id)
+                tree_parents.append(parent)
+            parent = index
+        ends.append(parent)
+        costs.append(node.cost)
+    return tree_ids, tree_parents, ends, costs
+
+
+def _unpack_nodes(tree_ids: list, tree_parents: list, ends: list, costs: list) -> list:
+    """Inverse of _pack_nodes."""
+    nodes = []
+    for end, cost in zip(ends, costs):
+        path = []
+        index = end
+        while index >= 0:
+            path.append(tree_ids[index])
+            index = tree_parents[index]
+        path.reverse()
+        nodes.append(SearchNode(current_node=path[-1], path=path, cost=cost, hops=len(path) - 1))
+    return nodes
+
+
+def _array_bytes(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_checkpoint(path: str, query: dict, state: dict):
+    """
+    Save search state for `query` to `path` atomically.
+
+    Args:
+        path (str): Checkpoint file
+        query (dict): From checkpoint_query
+        state (dict): Scalars plus the FIELD_KINDS fields the search uses
+    """
+    header = {'query': query, 'scalars': {}, 'arrays': []}
+    chunks = []
+
+    def add_array(name, values):
+        header['arrays'].append([name, values.typecode, len(values)])
+        chunks.append(_array_bytes(values))
+
+    for name, value in state.items():
+        kind = FIELD_KINDS.get(name)
+        if kind is None:
+            header['scalars'][name] = value
+        elif kind == 'nodes':
+            for suffix, values in zip(('ids', 'parents', 'ends', 'costs'), _pack_nodes(value)):
+                add_array(f"{name}.{suffix}", values)
+        elif kind == 'floats':
+            add_array(name, array('d', value))
+        else:
+            add_array(name, array('q', sorted(value) if kind == 'intset' else value))
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode()
+    payload = zlib.compress(header_bytes + b"".join(chunks), 1)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_PREFIX.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, len(header_bytes)))
+        f.write(payload)
+    os.replace(temp_path, path)
+
+
+def read_checkpoint(path: str) -> tuple:
+    """
+    Load a checkpoint file.
+
+    Args:
+        path (str): Checkpoint file
+
+    Returns:
+        tuple: (query, state) with the FIELD_KINDS fields rebuilt
+
+    Raises:
+        ValueError: If the file is not a checkpoint or is damaged
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        magic, version, header_length = _PREFIX.unpack_from(data, 0)
+        if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+            raise ValueError(f"{path} is not a search checkpoint (or an unsupported version)")
+        payload = zlib.decompress(data[_PREFIX.size:])
+        header = json.loads(payload[:header_length])
+    except (struct.error, zlib.error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError(f"{path} is not a search checkpoint or is damaged")
+
+    arrays = {}
+    position = header_length
+    for name, typecode, length in header['arrays']:
+        values = array(typecode)
+        end = position + length * values.itemsize
+        if end > len(payload):
+            raise ValueError(f"{path} is truncated")
+        values.frombytes(payload[position:end])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        arrays[name] = values.tolist()
+        position = end
+
+    state = dict(header['scalars'])
+    for name, kind in FIELD_KINDS.items():
+        if kind == 'nodes':
+            if f"{name}.ids" in arrays:
+                state[name] = _unpack_nodes(*(arrays[f"{name}.{suffix}"]
+                                              for suffix in ('ids', 'parents', 'ends', 'costs')))
+        elif name in arrays:
+            state[name] = set(arrays[name]) if kind == 'intset' else arrays[name]
+    return header['query'], state
+
+
+def load_checkpoint(path: str, query: dict) -> dict:
+    """
+    Load a checkpoint and make sure it belongs to `query`.
+
+    Args:
+        path (str): Checkpoint file
+        query (dict): From checkpoint_query for the run being resumed
+
+    Returns:
+        dict: State to pass as the search's `resume` argument
+
+    Raises:
+        ValueError: If the checkpoint is damaged or was taken for a
+            different search, query, heuristic or graph
+    """
+    saved_query, state = read_checkpoint(path)
+    for key, value in query.items():
+        if saved_query.get(key) != value:
+            raise ValueError(f"Checkpoint {path} was taken for a different {key} "
+                             f"({saved_query.get(key)!r}, this run: {value!r})")
+    return state
+
+
+class Checkpointer:
+    """
+    Decides when a search saves its state, and writes it.
+
+    Searches call due() from their main loop with a steadily increasing
+    counter; it reads the clock only every CHECK_INTERVAL calls.
+
+    Attributes:
+        path (str): Checkpoint file
+        query (dict): Query identity stored with every checkpoint
+        interval (float): Seconds between checkpoints
+        saves (int): Checkpoints written so far
+    """
+
+    def __init__(self, path: str, query: dict, interval: float = DEFAULT_INTERVAL):
+        self.path = path
+        self.query = query
+        self.interval = interval
+        self.saves = 0
+        self._last_save = time.time()
+
+    def due(self, count: int) -> bool:
+        """True if `interval` seconds passed since the last save (checked every CHECK_INTERVAL counts)."""
+        return count % CHECK_INTERVAL == 0 and time.time() - self._last_save >= self.interval
+
+    def save(self, state: dict):
+        """Write `state` now."""
+        write_checkpoint(self.path, self.query, state)
+        self.saves += 1
+        self._last_save = time.time()
@@ -0,0 +1,115 @@
+"""
+Compressed sparse row (CSR) form of a parsed graph.
+
+The dict-of-lists graph from parse_input is convenient but every edge is a
+Python tuple. For engines that run many searches over the same graph
+(distance matrices, batch queries) the graph is compiled once into flat
+typed arrays:
+
+    node_ids[i]                    original node ID of dense index i
+    offsets[i] .. offsets[i + 1]   slice of targets/costs holding i's edges
+    targets[k], costs[k]           dense index and cost of edge k
+
+The arrays come from the standard library array module, so they pickle
+compactly for worker processes and can be wrapped by numpy without copying.
+
+Usage:
+    compiled = CompiledGraph.from_graph(graph)
+    for k in range(compiled.offsets[i], compiled.offsets[i + 1]):
+        neighbor, cost = compiled.targets[k], compiled.costs[k]
+"""
+
+from array import array
+
+
+class CompiledGraph:
+    """
+    Immutable CSR adjacency with dense node indices.
+
+    Attributes:
+        node_ids (list): Dense index -> original node ID
+        index (dict): Original node ID -> dense index
+        offsets (array): 'q' array of length num_nodes + 1
+        targets (array): 'q' array of edge target indices
+        costs (array): 'd' array of edge costs
+    """
+
+    def __init__(self, node_ids: list, offsets: array, targets: array, costs: array):
+        self.node_ids = node_ids
+        self.index = {node: i for i, node in enumerate(node_ids)}
+        self.offsets = offsets
+        self.targets = targets
+        self.costs = costs
+
+    @classmethod
+    def from_graph(cls, graph: dict) -> 'CompiledGraph':
+        """
+        Compile a parse_input adjacency list.
+
+        Nodes that only appear as edge targets are included. Edges keep the
+        order of the adjacency lists, so neighbor order is unchanged.
+
+        Args:
+            graph (dict): Adjacency list mapping node_id to list of (neighbor_id, cost)
+
+        Returns:
+            CompiledGraph: The compiled graph
+        """
+        node_ids = sorted(set(graph) | {n for neighbors in graph.values() for n, _ in neighbors})
+        index = {node: i for i, node in enumerate(node_ids)}
+
+        offsets = array('q', [0])
+        targets = array('q')
+        costs = array('d')
+        for node in node_ids:
+            for neighbor_id, cost in graph.get(node, []):
+                targets.append(index[neighbor_id])
+                costs.append(cost)
+            offsets.append(len(targets))
+        return cls(node_ids, offsets, targets, costs)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def reversed(self) -> 'CompiledGraph':
+        """
+        Build the transpose graph (every edge u -> v becomes v -> u).
+
+        Returns:
+            CompiledGraph: Graph over the same dense indices with reversed edges
+        """
+        n = self.num_nodes
+        in_degree = [0] * (n + 1)
+        for target in self.targets:
+            in_degree[target + 1] += 1
+        for i in range(n):
+            in_degree[i + 1] += in_degree[i]
+
+        offsets = array('q', in_degree)
+        fill = list(in_degree[:n])
+        targets = array('q', bytes(8 * self.num_edges))
+        costs = array('d', bytes(8 * self.num_edges))
+        for u in range(n):
+            for k in range(self.offsets[u], self.offsets[u + 1]):
+                v = self.targets[k]
+                targets[fill[v]] = u
+                costs[fill[v]] = self.costs[k]
+                fill[v] += 1
+        return CompiledGraph(self.node_ids, offsets, targets, costs)
+
+    def neighbors(self, i: int):
+        """Yield (neighbor_index, cost) for the edges of dense index i."""
+        for k in range(self.offsets[i], self.offsets[i + 1]):
+            yield self.targets[k], self.costs[k]
+
+    def __getstate__(self):
+        # The index dict is rebuilt on load; shipping it to workers is wasteful
+        return (self.node_ids, self.offsets, self.targets, self.costs)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
@@ -0,0 +1,318 @@
+"""
+Many-to-many shortest-path distance matrices.
+
+Computes the full cost matrix between a set of sources (e.g. depots) and a
+set of targets (e.g. stops) without running one search per pair. The graph
+is compiled to CSR once (see compiled_graph.py). Then one Dijkstra runs per
+node on the SMALLER side, and it stops as soon as every node on the other
+side is settled:
+- more targets than sources: forward searches from each source
+- more sources than targets: backward searches (on the reversed graph)
+  from each target
+
+That is min(N, M) searches instead of N x M. Bucket-based many-to-many
+(backward searches filling buckets, forward searches scanning them) only
+pays off on top of a contraction hierarchy, where each search touches a
+few hundred nodes; on the plain graph it would run N + M full searches,
+so the one-sided scheme is used.
+
+Rows are computed in parallel by a process pool. The result is a dense
+float64 NumPy matrix (inf = unreachable). Pass spill_path to have the
+workers write straight into a memory-mapped .npy file instead of
+holding the matrix in RAM. With return_paths=True the shortest-path trees
+are kept as well so individual routes can be rebuilt.
+
+Usage:
+    result = distance_matrix(graph, depots, stops, workers=4)
+    result.matrix[i, j]           # cost from depots[i] to stops[j]
+    result.path(i, j)             # node IDs of that route (return_paths=True)
+"""
+
+import heapq
+import math
+import os
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from compiled_graph import CompiledGraph
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional for the rest of the project
+    np = None
+
+
+# Roots handed to a worker per task
+DEFAULT_CHUNK_SIZE = 16
+
+
+def shortest_path_tree(compiled: CompiledGraph, root: int, stop_at: set = None) -> tuple:
+    """
+    Dijkstra from one dense index over a compiled graph.
+
+    Args:
+        compiled (CompiledGraph): Graph to search (forward or reversed)
+        root (int): Dense index of the start node
+        stop_at (set): Dense indices; the search stops once all are settled
+            (default: settle every reachable node)
+
+    Returns:
+        tuple: (dist, parent)
+            - dist: 'd' array of distances from root (inf if unreachable)
+            - parent: 'q' array of tree parents (-1 for root and unreached)
+    """
+    n = compiled.num_nodes
+    offsets, targets, costs = compiled.offsets, compiled.targets, compiled.costs
+    dist = array('d', [math.inf]) * n
+    parent = array('q', [-1]) * n
+    settled = bytearray(n)
+    remaining = set(stop_at) if stop_at is not None else None
+
+    dist[root] = 0.0
+    heap = [(0.0, root)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if settled[u]:
+            continue
+        settled[u] = 1
+        if remaining is not None:
+            remaining.discard(u)
+            if not remaining:
+                break
+        for k in range(offsets[u], offsets[u + 1]):
+            v = targets[k]
+            nd = d + costs[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                parent[v] = u
+                heapq.heappush(heap, (nd, v))
+    return dist, parent
+
+
+# Per-worker state set by _init_worker so the graph is pickled once per
+# process rather than once per task. Thread-local, so in-process runs
+# (workers=1) from several threads do not overwrite each other's state
+_worker = threading.local()
+
+
+def _init_worker(compiled, other_side, spill_path, tree_path):
+    _worker.compiled = compiled
+    _worker.other_side = other_side
+    _worker.stop_at = set(other_side)
+    _worker.matrix = np.load(spill_path, mmap_mode='r+') if spill_path else None
+    _worker.trees = np.load(tree_path, mmap_mode='r+') if tree_path else None
+
+
+def _solve_roots(tasks: list, keep_trees: bool) -> list:
+    """
+    Run the searches for a chunk of (position, root) pairs in a worker.
+
+    Rows go straight into the memory-mapped files when spilling; otherwise
+    they are returned to the parent as raw bytes.
+    """
+    compiled = _worker.compiled
+    other_side = _worker.other_side
+    matrix, trees = _worker.matrix, _worker.trees
+
+    results = []
+    for position, root in tasks:
+        dist, parent = shortest_path_tree(compiled, root, _worker.stop_at)
+        row = array('d', (dist[i] for i in other_side))
+        tree = parent if keep_trees else None
+        if matrix is not None:
+            matrix[position] = np.frombuffer(row, dtype=np.float64)
+            row = None
+        if trees is not None:
+            trees[position] = np.frombuffer(parent, dtype=np.int64)
+            tree = None
+        results.append((position, row.tobytes() if row is not None else None,
+                        tree.tobytes() if tree is not None else None))
+    if matrix is not None:
+        matrix.flush()
+    if trees is not None:
+        trees.flush()
+    return results
+
+
+class DistanceMatrix:
+    """
+    Result of distance_matrix().
+
+    Attributes:
+        matrix (numpy.ndarray): float64 (len(sources), len(targets)) costs,
+            inf where no route exists (a numpy.memmap when spilled)
+        sources (list): Source node IDs (row order)
+        targets (list): Target node IDs (column order)
+        compiled (CompiledGraph): Graph the trees refer to
+        trees (numpy.ndarray): int64 shortest-path trees, one per search root
+            (None unless return_paths=True)
+        backward (bool): True if the trees are rooted at targets (next-hop
+            pointers) rather than at sources (parent pointers)
+    """
+
+    def __init__(self, matrix, sources, targets, compiled, trees=None, backward=False):
+        self.matrix = matrix
+        self.sources = sources
+        self.targets = targets
+        self.compiled = compiled
+        self.trees = trees
+        self.backward = backward
+
+    def path(self, i: int, j: int) -> list:
+        """
+        Rebuild the route from sources[i] to targets[j].
+
+        Args:
+            i (int): Row (source position)
+            j (int): Column (target position)
+
+        Returns:
+            list: Node IDs from source to target ([] if unreachable)
+
+        Raises:
+            ValueError: If the matrix was built without return_paths=True
+        """
+        if self.trees is None:
+            raise ValueError("Paths were not kept; call distance_matrix(..., return_paths=True)")
+        if math.isinf(self.matrix[i, j]):
+            return []
+
+        index = self.compiled.index
+        source = index[self.sources[i]]
+        target = index[self.targets[j]]
+        if self.backward:
+            # Tree rooted at the target: follow next-hop pointers forwards
+            tree = self.trees[j]
+            nodes = [source]
+            while nodes[-1] != target:
+                nodes.append(int(tree[nodes[-1]]))
+        else:
+            # Tree rooted at the source: follow parent pointers backwards
+            tree = self.trees[i]
+            nodes = [target]
+            while nodes[-1] != source:
+                nodes.append(int(tree[nodes[-1]]))
+            nodes.reverse()
+        return [self.compiled.node_ids[k] for k in nodes]
+
+
+def distance_matrix(graph: dict, sources: list, targets: list, workers: int = None,
+                    spill_path: str = None, return_paths: bool = False,
+                    compiled: CompiledGraph = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> DistanceMatrix:
+    """
+    Compute shortest-path costs from every source to every target.
+
+    Args:
+        graph (dict): Adjacency list from parse_input
+        sources (list): Source node IDs (matrix rows)
+        targets (list): Target node IDs (matrix columns)
+        workers (int): Worker processes (default: CPU count; 1 = run in-process)
+        spill_path (str): Write the matrix to this .npy file through a memory
+            map instead of keeping it in RAM; trees go to "<stem>.trees.npy"
+        return_paths (bool): Keep shortest-path trees for DistanceMatrix.path
+        compiled (CompiledGraph): Pre-compiled graph to reuse across calls
+        chunk_size (int): Searches per worker task
+
+    Returns:
+        DistanceMatrix: Matrix plus what is needed to rebuild paths
+
+    Raises:
+        ImportError: If numpy is not installed
+        ValueError: If a source or target is not in the graph
+    """
+    if np is None:
+        raise ImportError("distance_matrix needs numpy (pip install numpy)")
+
+    if compiled is None:
+        compiled = CompiledGraph.from_graph(graph)
+    missing = [node for node in list(sources) + list(targets) if node not in compiled.index]
+    if missing:
+        raise ValueError(f"Nodes not in graph: {missing[:10]}")
+
+    source_idx = [compiled.index[node] for node in sources]
+    target_idx = [compiled.index[node] for node in targets]
+
+    # Search from the smaller side; backward searches run on the reversed graph
+    backward = len(target_idx) < len(source_idx)
+    if backward:
+        search_graph, roots, other_side = compiled.reversed(), target_idx, source_idx
+    else:
+        search_graph, roots, other_side = compiled, source_idx, target_idx
+
+    # Workers fill the root-major layout; backward results are transposed at the end
+    shape = (len(roots), len(other_side))
+    tree_shape = (len(roots), compiled.num_nodes)
+    matrix_path = tree_path = None
+    if spill_path is not None:
+        matrix_path = spill_path
+        np.lib.format.open_memmap(matrix_path, mode='w+', dtype=np.float64, shape=shape).flush()
+        if return_paths:
+            tree_path = os.path.splitext(spill_path)[0] + ".trees.npy"
+            np.lib.format.open_memmap(tree_path, mode='w+', dtype=np.int64, shape=tree_shape).flush()
+        matrix = trees = None
+    else:
+        matrix = np.empty(shape, dtype=np.float64)
+        trees = np.empty(tree_shape, dtype=np.int64) if return_paths else None
+
+    tasks = list(enumerate(roots))
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(chunks) <= 1:
+        _init_worker(search_graph, other_side, matrix_path, tree_path)
+        try:
+            chunk_results = [_solve_roots(chunk, return_paths) for chunk in chunks]
+        finally:
+            vars(_worker).clear()
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                                 initargs=(search_graph, other_side, matrix_path, tree_path)) as pool:
+            futures = [pool.submit(_solve_roots, chunk, return_paths) for chunk in chunks]
+            chunk_results = [future.result() for future in futures]
+
+    for results in chunk_results:
+        for position, row, tree in results:
+            if row is not None:
+                matrix[position] = np.frombuffer(row, dtype=np.float64)
+            if tree is not None:
+                trees[position] = np.frombuffer(tree, dtype=np.int64)
+
+    if spill_path is not None:
+        matrix = np.load(matrix_path, mmap_mode='r')
+        trees = np.load(tree_path, mmap_mode='r') if tree_path else None
+    if backward:
+        matrix = matrix.T
+
+    return DistanceMatrix(matrix, list(sources), list(targets), compiled, trees, backward)
+
+
+def main():
+    """Command-line entry point: print or save the matrix for a graph file."""
+    import argparse
+    from graph_parser import parse_input
+
+    parser = argparse.ArgumentParser(description="Many-to-many shortest-path cost matrix")
+    parser.add_argument("filename", help="Graph file in the assignment format")
+    parser.add_argument("--sources", type=int, nargs="+", help="Source node IDs (default: the origin)")
+    parser.add_argument("--targets", type=int, nargs="+", help="Target node IDs (default: the destinations)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--out", help="Spill the matrix to this memory-mapped .npy file")
+    args = parser.parse_args()
+
+    graph, _, origin, destinations = parse_input(args.filename)
+    sources = args.sources or [origin]
+    targets = args.targets or destinations
+    result = distance_matrix(graph, sources, targets, workers=args.workers, spill_path=args.out)
+
+    if args.out:
+        print(f"Wrote {result.matrix.shape[0]}x{result.matrix.shape[1]} matrix to {args.out}")
+    else:
+        print("       " + " ".join(f"{t:>8}" for t in targets))
+        for source, row in zip(sources, result.matrix):
+            print(f"{source:>6} " + " ".join(f"{cost:>8.1f}" for cost in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Exact distance-to-goal heuristic for a fixed set of destinations.
+
+When many queries share the same destinations and only the origin changes,
+one multi-source Dijkstra run BACKWARD from all destinations (over the
+reverse adjacency) gives the true cost from every node to its nearest goal.
+Used as the heuristic of search_astar / search_gbfs / search_ida_star it is
+both admissible and perfect, unlike the Euclidean estimate, which is loose
+and overestimates whenever an edge is cheaper than its geometric length.
+
+Nodes that cannot reach any destination get an infinite value; the searches
+never generate them, so dead ends cost nothing.
+
+Usage:
+    cache = ExactHeuristicCache(graph)
+    h = cache.for_destinations(destinations)     # one reverse Dijkstra
+    for origin in origins:                       # every query reuses it
+        search_astar(graph, node_coords, origin, destinations, heuristic=h, max_solutions=2)
+"""
+
+import heapq
+import math
+import threading
+from collections import OrderedDict
+
+from graph_reduction import collapse_parallel_edges, build_predecessors
+
+
+def distances_to_nearest_goal(graph: dict, destinations: list) -> dict:
+    """
+    Multi-source Dijkstra from all destinations over the reversed edges.
+
+    Args:
+        graph (dict): Adjacency list from parse_input
+        destinations (list): List of goal node IDs
+
+    Returns:
+        dict: node_id -> cost of the cheapest path from node_id to any
+            destination (nodes that cannot reach one are absent)
+    """
+    successors, _, _ = collapse_parallel_edges(graph)
+    predecessors = build_predecessors(successors)
+
+    distances = {}
+    heap = [(0.0, dest) for dest in set(destinations) if dest in predecessors]
+    heapq.heapify(heap)
+    while heap:
+        dist, node = heapq.heappop(heap)
+        if node in distances:
+            continue
+        distances[node] = dist
+        for predecessor, cost in predecessors[node].items():
+            if predecessor not in distances:
+                heapq.heappush(heap, (dist + cost, predecessor))
+    return distances
+
+
+class ExactHeuristic:
+    """
+    Callable heuristic h(node) backed by precomputed exact goal distances.
+
+    Attributes:
+        destinations (frozenset): Goal set the distances were computed for
+        distances (dict): node_id -> exact cost to the nearest destination
+    """
+
+    def __init__(self, graph: dict, destinations: list):
+        self.destinations = frozenset(destinations)
+        self.distances = distances_to_nearest_goal(graph, destinations)
+
+    def __call__(self, node: int) -> float:
+        return self.distances.get(node, math.inf)
+
+
+class ExactHeuristicCache:
+    """
+    Keeps ExactHeuristic objects for one graph, keyed by destination set.
+
+    Safe to share between threads: the entries are guarded by a lock, and
+    the Dijkstra runs outside it (two threads asking for the same new
+    destination set may both compute it; one result is kept).
+
+    Attributes:
+        graph (dict): Graph the heuristics were computed on
+        max_entries (int): Destination sets kept before the least recently
+            used one is dropped
+    """
+
+    def __init__(self, graph: dict, max_entries: int = 8):
+        self.graph = graph
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def for_destinations(self, destinations: list) -> ExactHeuristic:
+        """
+        Return the heuristic for `destinations`, computing it on first use.
+
+        Args:
+            destinations (list): List of goal node IDs (order does not matter)
+
+        Returns:
+            ExactHeuristic: Callable h(node)
+        """
+        key = frozenset(destinations)
+        with self._lock:
+            heuristic = self._entries.get(key)
+            if heuristic is not None:
+                self._entries.move_to_end(key)
+                return heuristic
+        heuristic = ExactHeuristic(self.graph, destinations)
+        with self._lock:
+            self._entries[key] = heuristic
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return heuristic
+
+    def clear(self):
+        """Drop every cached heuristic (call after the graph changes)."""
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, delta, graph: dict):
+        """
+        Drop only the heuristics a graph change can affect.
+
+        An edge u -> v matters to a heuristic if it was on a shortest path
+        to the goals (removed or made more expensive while tight:
+        h(u) == old_cost + h(v)) or now gives a shorter one (new_cost + h(v)
+        < h(u)). Every other entry is still exact for the new graph.
+        Usable as a LiveGraph listener: live.subscribe(cache.invalidate).
+
+        Args:
+            delta (GraphDelta): Changes from graph_patch.LiveGraph.apply
+            graph (dict): The graph after the change (or a GraphSnapshot)
+        """
+        self.graph = getattr(graph, 'graph', graph)
+        with self._lock:
+            entries = list(self._entries.items())
+        for key, heuristic in entries:
+            distances = heuristic.distances
+            for (from_node, to_node), (old_cost, new_cost) in delta.edges.items():
+                if to_node not in distances:
+                    continue
+                via = distances[to_node]
+                h_from = distances.get(from_node, math.inf)
+                was_tight = old_cost is not None and h_from == old_cost + via
+                if was_tight and (new_cost is None or new_cost > old_cost):
+                    break
+                if new_cost is not None and new_cost + via < h_from:
+                    break
+            else:
+                continue
+            with self._lock:
+                self._entries.pop(key, None)
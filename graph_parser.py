@@ -1,3 +1,6 @@
+import math
+
+
 def parse_input(filename):
     """
     Parse input file and extract graph information.
@@ -111,4 +114,180 @@ def parse_input(filename):
     except FileNotFoundError:
         raise FileNotFoundError(f"Input file '{filename}' not found")
     except Exception as e:
-        raise ValueError(f"Error parsing input file: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Error parsing input file: {str(e)}")
+
+
+def integral_cost_bound(graph: dict):
+    """
+    Check whether every edge cost is a non-negative whole number.
+
+    parse_input stores costs as floats, but most maps only use small integer
+    costs; searches can then use a bucket queue (see priority_queues.py).
+
+    Args:
+        graph (dict): Adjacency list from parse_input
+
+    Returns:
+        int: The largest edge cost (0 for a graph without edges), or None if
+            some cost is negative or fractional
+    """
+    bound = 0
+    for neighbors in graph.values():
+        for _, cost in neighbors:
+            # nan and inf fail the remainder test too
+            if cost < 0 or cost % 1:
+                return None
+            if cost > bound:
+                bound = cost
+    return int(bound)
+
+
+class GridMap:
+    """
+    Bit-packed occupancy map for graphs that are really uniform-cost grids.
+
+    Every cell in the bounding box of the node coordinates is one bit: 1 for a
+    free cell (a node exists there), 0 for an obstacle. Searches that know the
+    grid rules (see detect_grid) can then generate neighbors from the bits
+    instead of walking the dict adjacency lists.
+
+    Attributes:
+        min_x (int): x coordinate of grid column 0
+        min_y (int): y coordinate of grid row 0
+        step (int): Coordinate spacing between adjacent cells
+        width (int): Number of columns
+        height (int): Number of rows
+        connectivity (int): 4 or 8
+        orth_cost (float): Cost of a horizontal or vertical move
+        diag_cost (float): Cost of a diagonal move (None for 4-connected grids)
+        cells (dict): Maps (col, row) to node ID for every free cell
+    """
+
+    def __init__(self, min_x: int, min_y: int, step: int, width: int, height: int,
+                 connectivity: int, orth_cost: float, diag_cost: float = None):
+        self.min_x = min_x
+        self.min_y = min_y
+        self.step = step
+        self.width = width
+        self.height = height
+        self.connectivity = connectivity
+        self.orth_cost = orth_cost
+        self.diag_cost = diag_cost
+        self.bits = bytearray((width * height + 7) // 8)
+        self.cells = {}
+
+    def cell_of(self, coord: tuple) -> tuple:
+        """Convert an (x, y) node coordinate to a (col, row) cell."""
+        return ((coord[0] - self.min_x) // self.step, (coord[1] - self.min_y) // self.step)
+
+    def set_free(self, col: int, row: int, node_id: int):
+        """Mark a cell as free and remember which node lives there."""
+        index = row * self.width + col
+        self.bits[index >> 3] |= 1 << (index & 7)
+        self.cells[(col, row)] = node_id
+
+    def is_free(self, col: int, row: int) -> bool:
+        """Return True if (col, row) is inside the grid and not an obstacle."""
+        if col < 0 or row < 0 or col >= self.width or row >= self.height:
+            return False
+        index = row * self.width + col
+        return (self.bits[index >> 3] >> (index & 7)) & 1 == 1
+
+    def free_neighbors(self, col: int, row: int) -> list:
+        """
+        List the cells reachable in one move, following the grid's edge rules.
+
+        Diagonal moves are only allowed when both adjacent orthogonal cells
+        are free (no corner cutting).
+        """
+        neighbors = []
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            if self.is_free(col + dx, row + dy):
+                neighbors.append((col + dx, row + dy))
+        if self.connectivity == 8:
+            for dx, dy in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+                if (self.is_free(col + dx, row + dy) and self.is_free(col + dx, row)
+                        and self.is_free(col, row + dy)):
+                    neighbors.append((col + dx, row + dy))
+        return neighbors
+
+    def move_cost(self, dx: int, dy: int) -> float:
+        """Cost of a single move in direction (dx, dy)."""
+        return self.diag_cost if dx and dy else self.orth_cost
+
+
+def detect_grid(graph: dict, node_coords: dict):
+    """
+    Recognize a 4- or 8-connected uniform-cost grid encoded as nodes and edges.
+
+    The graph qualifies when:
+    - every node has a unique coordinate on a common lattice spacing
+    - every edge joins two lattice neighbors (orthogonal or diagonal)
+    - all orthogonal edges share one cost and all diagonal edges share
+      another cost of roughly orthogonal cost * sqrt(2)
+    - the edge set is exactly the one implied by the free cells: every pair of
+      orthogonal neighbors is linked in both directions, and diagonals exist
+      exactly where both adjacent orthogonal cells are free
+
+    Args:
+        graph (dict): Adjacency list from parse_input
+        node_coords (dict): Coordinates of each node
+
+    Returns:
+        GridMap: Bit-packed grid description, or None if the graph is not a grid
+    """
+    if not graph or any(node not in node_coords for node in graph):
+        return None
+    coords = [node_coords[node] for node in graph]
+    if len(set(coords)) != len(coords):
+        return None
+
+    # Classify edges and find the lattice spacing
+    step = 0
+    orth_cost = None
+    diag_cost = None
+    for node, neighbors in graph.items():
+        x1, y1 = node_coords[node]
+        for neighbor_id, cost in neighbors:
+            x2, y2 = node_coords[neighbor_id]
+            dx, dy = abs(x2 - x1), abs(y2 - y1)
+            if dx and dy and dx != dy:
+                return None
+            step = math.gcd(step, max(dx, dy))
+            if dx and dy:
+                if diag_cost is None:
+                    diag_cost = cost
+                elif cost != diag_cost:
+                    return None
+            else:
+                if orth_cost is None:
+                    orth_cost = cost
+                elif cost != orth_cost:
+                    return None
+    if step == 0 or orth_cost is None or orth_cost <= 0:
+        return None
+    if diag_cost is not None and abs(diag_cost - orth_cost * math.sqrt(2)) > 1e-3 * orth_cost:
+        return None
+
+    min_x = min(x for x, _ in coords)
+    min_y = min(y for _, y in coords)
+    if any((x - min_x) % step or (y - min_y) % step for x, y in coords):
+        return None
+    width = (max(x for x, _ in coords) - min_x) // step + 1
+    height = (max(y for _, y in coords) - min_y) // step + 1
+
+    connectivity = 8 if diag_cost is not None else 4
+    grid = GridMap(min_x, min_y, step, width, height, connectivity, orth_cost, diag_cost)
+    for node in graph:
+        col, row = grid.cell_of(node_coords[node])
+        grid.set_free(col, row, node)
+
+    # Every edge must be a legal grid move, and every legal move must be an edge
+    for node, neighbors in graph.items():
+        col, row = grid.cell_of(node_coords[node])
+        expected = set(grid.cells[cell] for cell in grid.free_neighbors(col, row))
+        actual = set(neighbor_id for neighbor_id, _ in neighbors)
+        if actual != expected or len(neighbors) != len(actual):
+            return None
+
+    return grid
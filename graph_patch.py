@@ -0,0 +1,379 @@
+"""
+Incremental map updates from append-only patch files.
+
+Instead of rewriting a whole map file and re-running parse_input, changes go
+into "<map>.patch", one per line, in the same notation as the map file:
+
+    # comments and blank lines are ignored
+    add_node 12: (3,4)       new node at (3,4)
+    add_edge (2,12): 3.5     new directed edge 2 -> 12
+    set_cost (2,5): 4        every 2 -> 5 edge now costs 4
+    remove_edge (2,5)        drop every 2 -> 5 edge
+
+LiveGraph holds the parsed map as a series of immutable snapshots. Applying a
+batch of changes builds the next snapshot copy-on-write: the node dict is
+copied shallowly and only the adjacency lists that change are replaced, so
+a search that is still running on the previous snapshot keeps a consistent
+view while new queries see the update.
+
+Each batch yields a GraphDelta listing exactly which edges changed (old and
+new cheapest cost per node pair) and which nodes were added. Caches built on
+the graph use it to drop only what the change can reach:
+- ExactHeuristicCache.invalidate keeps heuristics whose distances are unaffected
+- hierarchical_search.update_abstraction recomputes only the touched clusters
+
+Usage:
+    live = LiveGraph.from_file("map.txt")
+    live.subscribe(lambda delta, snapshot: ...)     # invalidation hooks
+    live.apply_patch_file("map.txt.patch")          # only lines added since last call
+    graph, node_coords, origin, destinations = live.snapshot()
+
+    python graph_patch.py map.txt [--patch FILE] [--out merged.txt]
+"""
+
+import os
+import threading
+
+from graph_parser import parse_input
+
+
+# Operations understood in patch files
+PATCH_OPS = ('add_node', 'add_edge', 'set_cost', 'remove_edge')
+
+
+class PatchOp:
+    """
+    One change from a patch file.
+
+    Attributes:
+        op (str): One of PATCH_OPS
+        node (int): Node ID (add_node)
+        coords (tuple): (x, y) of the new node (add_node)
+        edge (tuple): (from_node, to_node) (edge operations)
+        cost (float): Edge cost (add_edge, set_cost)
+    """
+
+    def __init__(self, op: str, node: int = None, coords: tuple = None,
+                 edge: tuple = None, cost: float = None):
+        self.op = op
+        self.node = node
+        self.coords = coords
+        self.edge = edge
+        self.cost = cost
+
+    def __repr__(self):
+        if self.op == 'add_node':
+            return f"add_node {self.node}: {self.coords}"
+        if self.op == 'remove_edge':
+            return f"remove_edge {self.edge}"
+        return f"{self.op} {self.edge}: {self.cost}"
+
+
+def parse_patch_line(line: str):
+    """
+    Parse one patch file line.
+
+    Args:
+        line (str): Raw line
+
+    Returns:
+        PatchOp: The change, or None for blank and comment lines
+
+    Raises:
+        ValueError: If the line is not a valid operation
+    """
+    line = line.split('#', 1)[0].strip()
+    if not line:
+        return None
+    op, _, rest = line.partition(' ')
+    if op not in PATCH_OPS:
+        raise ValueError(f"Unknown patch operation '{op}'")
+
+    try:
+        if op == 'add_node':
+            node_str, coords_str = rest.split(':')
+            x, y = map(int, coords_str.strip().strip('()').split(','))
+            return PatchOp(op, node=int(node_str.strip()), coords=(x, y))
+
+        edge_str, _, cost_str = rest.partition(':')
+        from_node, to_node = map(int, edge_str.strip().strip('()').split(','))
+        if op == 'remove_edge':
+            return PatchOp(op, edge=(from_node, to_node))
+        return PatchOp(op, edge=(from_node, to_node), cost=float(cost_str.strip()))
+    except ValueError:
+        raise ValueError(f"Malformed patch line '{line}'")
+
+
+def read_patch(path: str, offset: int = 0) -> tuple:
+    """
+    Read the complete lines a patch file gained after byte offset.
+
+    A trailing line without a newline may still be being written, so it is
+    left for the next call.
+
+    Args:
+        path (str): Patch file path
+        offset (int): Byte position already consumed
+
+    Returns:
+        tuple: (ops, new_offset)
+
+    Raises:
+        ValueError: If a line is malformed (the message gives its byte offset)
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1
+    ops = []
+    position = offset
+    for raw in data[:end].splitlines(keepends=True):
+        try:
+            op = parse_patch_line(raw.decode())
+        except ValueError as e:
+            raise ValueError(f"{path} at byte {position}: {e}")
+        if op is not None:
+            ops.append(op)
+        position += len(raw)
+    return ops, offset + end
+
+
+class GraphSnapshot:
+    """
+    One immutable version of a LiveGraph.
+
+    Unpacks like parse_input's result: graph, node_coords, origin, destinations.
+    Treat the dicts as read-only; later versions share unchanged lists with it.
+
+    Attributes:
+        version (int): 0 for the parsed file, +1 per applied batch
+        graph (dict): Adjacency list
+        node_coords (dict): Node coordinates
+        origin (int): Origin from the map file
+        destinations (list): Destinations from the map file
+    """
+
+    def __init__(self, version: int, graph: dict, node_coords: dict, origin: int, destinations: list):
+        self.version = version
+        self.graph = graph
+        self.node_coords = node_coords
+        self.origin = origin
+        self.destinations = destinations
+
+    def __iter__(self):
+        return iter((self.graph, self.node_coords, self.origin, self.destinations))
+
+
+class GraphDelta:
+    """
+    What one batch of patch operations changed.
+
+    Attributes:
+        version (int): Snapshot version the batch produced
+        edges (dict): (from_node, to_node) -> (old_cost, new_cost), the
+            cheapest cost of that node pair before and after (None = no edge)
+        added_nodes (list): Node IDs that did not exist before
+    """
+
+    def __init__(self, version: int, edges: dict, added_nodes: list):
+        self.version = version
+        self.edges = edges
+        self.added_nodes = added_nodes
+
+    def touched_nodes(self) -> set:
+        """Every node that gained a node entry or an edge change."""
+        nodes = set(self.added_nodes)
+        for from_node, to_node in self.edges:
+            nodes.add(from_node)
+            nodes.add(to_node)
+        return nodes
+
+    def __bool__(self):
+        return bool(self.edges or self.added_nodes)
+
+
+def _cheapest(neighbors: list, to_node: int):
+    costs = [cost for neighbor_id, cost in neighbors if neighbor_id == to_node]
+    return min(costs) if costs else None
+
+
+class LiveGraph:
+    """
+    A parsed map that accepts patches without a full reparse.
+
+    Attributes:
+        patch_offset (int): Bytes of the patch file already applied
+    """
+
+    def __init__(self, graph: dict, node_coords: dict, origin: int, destinations: list):
+        self._snapshot = GraphSnapshot(0, graph, node_coords, origin, destinations)
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.patch_offset = 0
+
+    @classmethod
+    def from_file(cls, filename: str) -> 'LiveGraph':
+        """Parse a map file (parse_input) into version 0."""
+        return cls(*parse_input(filename))
+
+    def snapshot(self) -> GraphSnapshot:
+        """The current version; it stays valid after later patches."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def subscribe(self, callback):
+        """Call callback(delta, snapshot) after every non-empty batch."""
+        self._listeners.append(callback)
+
+    def apply(self, ops: list) -> GraphDelta:
+        """
+        Apply a batch of operations as one new snapshot.
+
+        The batch is all-or-nothing: if any operation is invalid, no new
+        version is published.
+
+        Args:
+            ops (list): PatchOp objects, applied in order
+
+        Returns:
+            GraphDelta: What changed (empty if ops is empty)
+
+        Raises:
+            ValueError: If an operation refers to a missing node or edge, or
+                adds a node that already exists
+        """
+        with self._lock:
+            current = self._snapshot
+            if not ops:
+                return GraphDelta(current.version, {}, [])
+
+            graph = dict(current.graph)
+            node_coords = dict(current.node_coords)
+            copied = set()
+            old_costs = {}
+            added_nodes = []
+
+            def writable(node):
+                # Copy an adjacency list the first time the batch changes it
+                if node not in copied:
+                    graph[node] = list(graph.get(node, []))
+                    copied.add(node)
+                return graph[node]
+
+            for op in ops:
+                if op.op == 'add_node':
+                    if op.node in graph or op.node in node_coords:
+                        raise ValueError(f"Node {op.node} already exists")
+                    graph[op.node] = []
+                    copied.add(op.node)
+                    node_coords[op.node] = op.coords
+                    added_nodes.append(op.node)
+                    continue
+
+                from_node, to_node = op.edge
+                for node in op.edge:
+                    if node not in graph:
+                        raise ValueError(f"Node {node} does not exist ({op!r})")
+                if op.edge not in old_costs:
+                    old_costs[op.edge] = _cheapest(graph[from_node], to_node)
+                if op.op != 'add_edge' and _cheapest(graph[from_node], to_node) is None:
+                    raise ValueError(f"No edge {op.edge} to change ({op!r})")
+
+                neighbors = writable(from_node)
+                if op.op == 'add_edge':
+                    neighbors.append((to_node, op.cost))
+                elif op.op == 'set_cost':
+                    neighbors[:] = [(n, op.cost if n == to_node else c) for n, c in neighbors]
+                else:
+                    neighbors[:] = [(n, c) for n, c in neighbors if n != to_node]
+
+            edges = {}
+            for (from_node, to_node), old_cost in old_costs.items():
+                new_cost = _cheapest(graph[from_node], to_node)
+                if new_cost != old_cost:
+                    edges[(from_node, to_node)] = (old_cost, new_cost)
+
+            snapshot = GraphSnapshot(current.version + 1, graph, node_coords,
+                                     current.origin, current.destinations)
+            delta = GraphDelta(snapshot.version, edges, added_nodes)
+            self._snapshot = snapshot
+
+        if delta:
+            for callback in self._listeners:
+                callback(delta, snapshot)
+        return delta
+
+    def apply_patch_file(self, path: str) -> GraphDelta:
+        """
+        Apply the lines appended to a patch file since the last call.
+
+        Args:
+            path (str): Patch file path
+
+        Returns:
+            GraphDelta: What changed (empty if nothing new was appended)
+
+        Raises:
+            ValueError: If a new line is malformed or cannot be applied
+        """
+        ops, offset = read_patch(path, self.patch_offset)
+        delta = self.apply(ops)
+        self.patch_offset = offset
+        return delta
+
+
+def write_graph(snapshot: GraphSnapshot, filename: str):
+    """
+    Write a snapshot back out in the map file format (folding in all patches).
+
+    Args:
+        snapshot (GraphSnapshot): Version to write
+        filename (str): Output path
+    """
+    graph, node_coords, origin, destinations = snapshot
+    lines = ["Nodes:"]
+    for node in sorted(node_coords):
+        x, y = node_coords[node]
+        lines.append(f"{node}: ({x},{y})")
+    lines.append("")
+    lines.append("Edges:")
+    for node in sorted(graph):
+        for neighbor_id, cost in graph[node]:
+            cost_str = f"{cost:g}" if cost == int(cost) else repr(cost)
+            lines.append(f"({node},{neighbor_id}): {cost_str}")
+    lines.append("")
+    lines.append("Origin:")
+    lines.append(str(origin))
+    lines.append("")
+    lines.append("Destinations:")
+    lines.append("; ".join(str(dest) for dest in destinations))
+    temp_path = filename + ".tmp"
+    with open(temp_path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp_path, filename)
+
+
+def main():
+    """Command-line entry point: apply a patch file and report or save the result."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply a map patch file")
+    parser.add_argument("filename", help="Map file in the assignment format")
+    parser.add_argument("--patch", help="Patch file (default: <filename>.patch)")
+    parser.add_argument("--out", help="Write the patched map to this file")
+    args = parser.parse_args()
+
+    live = LiveGraph.from_file(args.filename)
+    delta = live.apply_patch_file(args.patch or args.filename + ".patch")
+    print(f"Version {delta.version}: {len(delta.edges)} edge pair(s) changed, "
+          f"{len(delta.added_nodes)} node(s) added")
+    if args.out:
+        write_graph(live.snapshot(), args.out)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Optional preprocessing stage between graph_parser and search_algorithms.
+
+Shrinks a parsed graph before it is searched:
+1. Collapse parallel edges to the cheapest one and drop self loops
+2. Prune nodes that cannot reach any destination (reverse BFS)
+3. Contract degree-2 chains into single weighted shortcut edges
+
+Path costs are preserved exactly. Hop counts are not, because a contracted
+chain becomes a single edge, so use expand_path() to recover the real route
+and only use the reduced graph with cost-based searches (search.py rejects
+--reduce for DFS, BFS, GBFS and IDA*).
+Second-best routes that only differ by a more expensive parallel edge or
+chain are collapsed away.
+
+Usage:
+    reduced_graph, reduced_coords, expansion, stats = reduce_graph(
+        graph, node_coords, origin, destinations)
+    goal, nodes_created, path, ... = search_ucs(reduced_graph, reduced_coords, origin, destinations)
+    path = expand_path(path, expansion)
+"""
+
+from collections import deque
+
+
+def collapse_parallel_edges(graph: dict) -> tuple:
+    """
+    Keep only the cheapest edge between each ordered pair of nodes.
+
+    Self loops are dropped because no search can benefit from them.
+
+    Args:
+        graph (dict): Adjacency list mapping node_id to list of (neighbor_id, cost)
+
+    Returns:
+        tuple: (successors, parallel_removed, self_loops_removed)
+            - successors: dict mapping node_id to dict {neighbor_id: min_cost}
+            - parallel_removed: number of duplicate edges dropped
+            - self_loops_removed: number of self loops dropped
+    """
+    successors = {}
+    parallel_removed = 0
+    self_loops_removed = 0
+
+    for node, neighbors in graph.items():
+        best = successors.setdefault(node, {})
+        for neighbor_id, cost in neighbors:
+            successors.setdefault(neighbor_id, {})
+            if neighbor_id == node:
+                self_loops_removed += 1
+                continue
+            if neighbor_id in best:
+                parallel_removed += 1
+                if cost < best[neighbor_id]:
+                    best[neighbor_id] = cost
+            else:
+                best[neighbor_id] = cost
+
+    return successors, parallel_removed, self_loops_removed
+
+
+def build_predecessors(successors: dict) -> dict:
+    """
+    Build the reverse adjacency {node_id: {predecessor_id: cost}}.
+
+    Args:
+        successors (dict): Forward adjacency {node_id: {neighbor_id: cost}}
+
+    Returns:
+        dict: Reverse adjacency with the same costs
+    """
+    predecessors = {node: {} for node in successors}
+    for node, neighbors in successors.items():
+        for neighbor_id, cost in neighbors.items():
+            predecessors.setdefault(neighbor_id, {})[node] = cost
+    return predecessors
+
+
+def nodes_reaching(predecessors: dict, destinations: list) -> set:
+    """
+    Find every node with a directed path to at least one destination.
+
+    Runs a single multi-source BFS backwards from the destinations.
+
+    Args:
+        predecessors (dict): Reverse adjacency {node_id: {predecessor_id: cost}}
+        destinations (list): List of goal node IDs
+
+    Returns:
+        set: Node IDs that can reach a destination (destinations included)
+    """
+    reachable = set(dest for dest in destinations if dest in predecessors)
+    queue = deque(reachable)
+
+    while queue:
+        node = queue.popleft()
+        for predecessor in predecessors.get(node, {}):
+            if predecessor not in reachable:
+                reachable.add(predecessor)
+                queue.append(predecessor)
+
+    return reachable
+
+
+def _edge_segment(expansion: dict, u: int, v: int) -> list:
+    """Return the full original node sequence behind edge (u, v)."""
+    return expansion.get((u, v), [u, v])
+
+
+def contract_chains(successors: dict, predecessors: dict, keep: set) -> tuple:
+    """
+    Contract degree-2 chain nodes into shortcut edges, in place.
+
+    A node is contractible when it is not in `keep`, has at least one incoming
+    and one outgoing edge, and touches at most two distinct neighbors. This
+    covers one-way chains (u -> v -> w) as well as two-way roads
+    (u <-> v <-> w). Each in/out pair (u, w) with u != w is replaced by a
+    shortcut u -> w whose cost is the sum of the two edges. If a cheaper
+    u -> w edge already exists it is kept instead.
+
+    Args:
+        successors (dict): Forward adjacency {node_id: {neighbor_id: cost}}
+        predecessors (dict): Reverse adjacency {node_id: {predecessor_id: cost}}
+        keep (set): Node IDs that must survive (origin and destinations)
+
+    Returns:
+        tuple: (expansion, contracted)
+            - expansion: dict mapping shortcut (u, w) to the original node
+              sequence [u, ..., w] it stands for
+            - contracted: number of nodes removed
+    """
+    expansion = {}
+    contracted = 0
+    worklist = sorted(successors)
+    queued = set(worklist)
+
+    while worklist:
+        node = worklist.pop()
+        queued.discard(node)
+
+        if node in keep or node not in successors:
+            continue
+        incoming = predecessors[node]
+        outgoing = successors[node]
+        if not incoming or not outgoing:
+            continue
+        neighbors = set(incoming) | set(outgoing)
+        if len(neighbors) > 2:
+            continue
+
+        for u, in_cost in incoming.items():
+            for w, out_cost in outgoing.items():
+                if u == w:
+                    continue
+                shortcut_cost = in_cost + out_cost
+                existing = successors[u].get(w)
+                if existing is not None and existing <= shortcut_cost:
+                    continue
+                successors[u][w] = shortcut_cost
+                predecessors[w][u] = shortcut_cost
+                expansion[(u, w)] = (_edge_segment(expansion, u, node)
+                                     + _edge_segment(expansion, node, w)[1:])
+
+        # Detach the contracted node from the graph
+        for u in incoming:
+            del successors[u][node]
+            expansion.pop((u, node), None)
+        for w in outgoing:
+            del predecessors[w][node]
+            expansion.pop((node, w), None)
+        del successors[node]
+        del predecessors[node]
+        contracted += 1
+
+        # Neighbors may have become chain nodes themselves
+        for neighbor in neighbors:
+            if neighbor not in queued:
+                queued.add(neighbor)
+                worklist.append(neighbor)
+
+    return expansion, contracted
+
+
+def reduce_graph(graph: dict, node_coords: dict, origin: int, destinations: list) -> tuple:
+    """
+    Run the full reduction pipeline for one origin/destination query.
+
+    The origin and destinations are always kept so the reduced graph can be
+    passed straight to any search_* function.
+
+    Args:
+        graph (dict): Adjacency list from parse_input
+        node_coords (dict): Coordinates of each node
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+
+    Returns:
+        tuple: (reduced_graph, reduced_coords, expansion, stats)
+            - reduced_graph: adjacency list in the same format as parse_input
+            - reduced_coords: coordinates of the surviving nodes
+            - expansion: shortcut edge -> original node sequence (see expand_path)
+            - stats: dict of before/after counts and reduction ratios
+    """
+    nodes_before = len(graph)
+    edges_before = sum(len(neighbors) for neighbors in graph.values())
+
+    successors, parallel_removed, self_loops_removed = collapse_parallel_edges(graph)
+    predecessors = build_predecessors(successors)
+
+    # Prune dead ends: anything that cannot reach a destination is useless,
+    # except the origin, which must stay so "no solution" is still reported
+    reachable = nodes_reaching(predecessors, destinations)
+    reachable.add(origin)
+    pruned = [node for node in successors if node not in reachable]
+    for node in pruned:
+        del successors[node]
+        del predecessors[node]
+    for node in successors:
+        successors[node] = {n: c for n, c in successors[node].items() if n in reachable}
+        predecessors[node] = {n: c for n, c in predecessors[node].items() if n in reachable}
+
+    keep = set(destinations)
+    keep.add(origin)
+    expansion, contracted = contract_chains(successors, predecessors, keep)
+
+    reduced_graph = {
+        node: sorted(successors[node].items())
+        for node in sorted(successors)
+    }
+    reduced_coords = {node: node_coords[node] for node in reduced_graph if node in node_coords}
+
+    nodes_after = len(reduced_graph)
+    edges_after = sum(len(neighbors) for neighbors in reduced_graph.values())
+    stats = {
+        'nodes_before': nodes_before,
+        'nodes_after': nodes_after,
+        'edges_before': edges_before,
+        'edges_after': edges_after,
+        'parallel_edges_removed': parallel_removed,
+        'self_loops_removed': self_loops_removed,
+        'nodes_pruned': len(pruned),
+        'nodes_contracted': contracted,
+        'node_ratio': nodes_after / nodes_before if nodes_before else 1.0,
+        'edge_ratio': edges_after / edges_before if edges_before else 1.0,
+    }
+    return reduced_graph, reduced_coords, expansion, stats
+
+
+def expand_path(path: list, expansion: dict) -> list:
+    """
+    Expand a path found on the reduced graph back to original node IDs.
+
+    Args:
+        path (list): Node IDs from a search over the reduced graph
+        expansion (dict): Shortcut map returned by reduce_graph
+
+    Returns:
+        list: Path over the original graph (empty if path is empty)
+    """
+    if not path:
+        return []
+
+    full_path = [path[0]]
+    for u, w in zip(path, path[1:]):
+        full_path.extend(_edge_segment(expansion, u, w)[1:])
+    return full_path
+
+
+def format_reduction_report(stats: dict) -> str:
+    """
+    Format reduction statistics as a short human-readable block.
+
+    Args:
+        stats (dict): Stats dictionary returned by reduce_graph
+
+    Returns:
+        str: Multi-line report
+    """
+    lines = [
+        "Graph Reduction:",
+        f"  Nodes: {stats['nodes_before']} -> {stats['nodes_after']} "
+        f"({stats['node_ratio'] * 100:.1f}%)",
+        f"  Edges: {stats['edges_before']} -> {stats['edges_after']} "
+        f"({stats['edge_ratio'] * 100:.1f}%)",
+        f"  Parallel edges removed: {stats['parallel_edges_removed']}",
+        f"  Self loops removed: {stats['self_loops_removed']}",
+        f"  Dead-end nodes pruned: {stats['nodes_pruned']}",
+        f"  Chain nodes contracted: {stats['nodes_contracted']}",
+        "  (Nodes Created counts search nodes on the reduced graph;",
+        "   paths are shown expanded back to the original nodes)",
+    ]
+    return "\n".join(lines)
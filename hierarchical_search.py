@@ -0,0 +1,515 @@
+"""
+Hierarchical path planning (HPA*-style) for large grid and clustered maps.
+
+The coordinate space from node_coords is cut into square clusters. Edges
+crossing the border between two clusters are grouped into entrance runs
+(contiguous stretches of border). Each run contributes one transition edge
+in its middle, or two at its ends when it is at least RUN_SPLIT edges long;
+the endpoints of those transitions are the entrances. The exact cost between
+each pair of entrances inside a cluster is precomputed. A query then:
+1. Connects the origin and destinations to the entrances of their clusters
+2. Runs search_astar over the small abstract graph of entrances
+3. Refines the route by running search_astar again, restricted to the
+   corridor of clusters the abstract path passes through
+
+The abstraction only depends on the graph, so it can be cached on disk and
+reused across queries. Because only a few transitions per run are kept, the
+result can be slightly longer than optimal; --gap measures by how much.
+
+Usage:
+    python hierarchical_search.py --gap [--cluster-size N] [--cache-dir DIR]
+"""
+
+import hashlib
+import heapq
+import math
+import os
+import pickle
+import sys
+import threading
+import time
+
+from graph_parser import parse_input
+from search_algorithms import search_astar
+from search_result import SearchResult
+
+
+# Entrance runs at least this long get a transition at each end instead of
+# a single one in the middle (the value used by the original HPA* paper)
+RUN_SPLIT = 6
+
+
+class HierarchicalAbstraction:
+    """
+    Precomputed cluster abstraction of a graph.
+
+    Attributes:
+        cluster_size (int): Side length of a cluster in coordinate units
+        cluster_of (dict): Maps node_id to its (cx, cy) cluster key
+        members (dict): Maps cluster key to the list of node IDs inside it
+        entrances (dict): Maps cluster key to the sorted list of its entrance nodes
+        abstract_graph (dict): Adjacency list over entrance nodes, holding both
+            inter-cluster edges and precomputed intra-cluster costs
+        fingerprint (str): Hash of the graph the abstraction was built from
+    """
+
+    def __init__(self, cluster_size: int, cluster_of: dict, members: dict,
+                 entrances: dict, abstract_graph: dict, fingerprint: str):
+        self.cluster_size = cluster_size
+        self.cluster_of = cluster_of
+        self.members = members
+        self.entrances = entrances
+        self.abstract_graph = abstract_graph
+        self.fingerprint = fingerprint
+
+
+def graph_fingerprint(graph: dict, node_coords: dict, cluster_size: int) -> str:
+    """
+    Hash the graph, coordinates and cluster size into a cache key.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+        cluster_size (int): Cluster side length used for the abstraction
+
+    Returns:
+        str: Hex digest identifying this exact input
+    """
+    digest = hashlib.sha1()
+    digest.update(f"cluster={cluster_size};runs={RUN_SPLIT};links=two-way;".encode())
+    for node in sorted(graph):
+        digest.update(f"{node}@{node_coords.get(node)}:".encode())
+        for neighbor_id, cost in sorted(graph[node]):
+            digest.update(f"{neighbor_id},{cost!r};".encode())
+    return digest.hexdigest()
+
+
+def default_cluster_size(node_coords: dict) -> int:
+    """
+    Pick a cluster size giving roughly sqrt(n) clusters of sqrt(n) nodes.
+
+    Args:
+        node_coords (dict): Coordinates of each node
+
+    Returns:
+        int: Cluster side length (at least 1)
+    """
+    if not node_coords:
+        return 1
+    xs = [x for x, _ in node_coords.values()]
+    ys = [y for _, y in node_coords.values()]
+    span = max(max(xs) - min(xs), max(ys) - min(ys)) + 1
+    clusters_per_side = max(1, math.ceil(len(node_coords) ** 0.25))
+    return max(1, math.ceil(span / clusters_per_side))
+
+
+def _cluster_dijkstra(adjacency: dict, source: int, cluster_of: dict, cluster) -> dict:
+    """
+    Exact costs from source to every node of its cluster, never leaving it.
+
+    Args:
+        adjacency (dict): Adjacency list (forward or reversed)
+        source (int): Start node ID
+        cluster_of (dict): Maps node_id to cluster key
+        cluster: Cluster key the search is confined to
+
+    Returns:
+        dict: node_id -> cost for every node reached
+    """
+    dist = {source: 0.0}
+    pq = [(0.0, source)]
+    while pq:
+        d, node = heapq.heappop(pq)
+        if d > dist[node]:
+            continue
+        for neighbor_id, cost in adjacency.get(node, []):
+            if cluster_of.get(neighbor_id) != cluster:
+                continue
+            new_d = d + cost
+            if new_d < dist.get(neighbor_id, float('inf')):
+                dist[neighbor_id] = new_d
+                heapq.heappush(pq, (new_d, neighbor_id))
+    return dist
+
+
+def _select_transitions(graph: dict, node_coords: dict, cluster_of: dict) -> list:
+    """
+    Pick the border-crossing edges that become abstract transitions.
+
+    Crossing edges between an ordered pair of clusters (one crossing
+    direction) are sorted along the border and split into runs: consecutive
+    edges belong to the same run when their endpoints on both sides are
+    equal or linked in both directions. Each run keeps its middle edge, or
+    its first and last edge when it has at least RUN_SPLIT edges. Because
+    the links are two-way, any crossing of a run can be reached from, and
+    continued through, the kept edge along the border; a one-way link only
+    works in one direction, so it starts a new run (on one-way maps a single
+    kept edge could otherwise leave the needed crossing unreachable).
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+        cluster_of (dict): Maps node_id to its cluster key
+
+    Returns:
+        list: (from_node, to_node, cost) transition edges
+    """
+    crossings = {}
+    for node, neighbors in graph.items():
+        for neighbor_id, cost in neighbors:
+            if cluster_of[node] != cluster_of[neighbor_id]:
+                pair = (cluster_of[node], cluster_of[neighbor_id])
+                crossings.setdefault(pair, []).append((node, neighbor_id, cost))
+
+    linked = {}
+
+    def adjacent(u, v):
+        if u == v:
+            return True
+        if u not in linked:
+            linked[u] = set(neighbor_id for neighbor_id, _ in graph.get(u, []))
+        if v not in linked:
+            linked[v] = set(neighbor_id for neighbor_id, _ in graph.get(v, []))
+        return v in linked[u] and u in linked[v]
+
+    transitions = []
+    for (from_cluster, to_cluster), edges in crossings.items():
+        # Sort along the border: by y for a vertical border, by x otherwise
+        axis = 1 if from_cluster[0] != to_cluster[0] and from_cluster[1] == to_cluster[1] else 0
+        edges.sort(key=lambda edge: (node_coords[edge[0]][axis], node_coords[edge[1]][axis],
+                                     edge[0], edge[1]))
+        run = [edges[0]]
+        for edge in edges[1:] + [None]:
+            if edge is not None and adjacent(run[-1][0], edge[0]) and adjacent(run[-1][1], edge[1]):
+                run.append(edge)
+                continue
+            if len(run) >= RUN_SPLIT:
+                transitions.append(run[0])
+                transitions.append(run[-1])
+            else:
+                transitions.append(run[len(run) // 2])
+            run = [edge]
+    return transitions
+
+
+def _add_intra_edges(abstract_graph: dict, graph: dict, cluster_of: dict, key, entrances: list):
+    """Add the exact entrance-to-entrance costs of one cluster to abstract_graph."""
+    for entrance in entrances:
+        dist = _cluster_dijkstra(graph, entrance, cluster_of, key)
+        for other in entrances:
+            if other != entrance and other in dist:
+                abstract_graph[entrance].append((other, dist[other]))
+
+
+def build_abstraction(graph: dict, node_coords: dict, cluster_size: int = None) -> HierarchicalAbstraction:
+    """
+    Partition the map into clusters and precompute entrance-to-entrance costs.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node (every node needs one)
+        cluster_size (int): Cluster side length (default: default_cluster_size)
+
+    Returns:
+        HierarchicalAbstraction: The cluster abstraction
+
+    Raises:
+        ValueError: If a node has no coordinates
+    """
+    missing = [node for node in graph if node not in node_coords]
+    if missing:
+        raise ValueError(f"Node {missing[0]} has no coordinates; cannot cluster the map")
+    if cluster_size is None:
+        cluster_size = default_cluster_size(node_coords)
+
+    cluster_of = {}
+    members = {}
+    for node in sorted(graph):
+        x, y = node_coords[node]
+        key = (x // cluster_size, y // cluster_size)
+        cluster_of[node] = key
+        members.setdefault(key, []).append(node)
+
+    # Entrances: endpoints of the transitions chosen for each entrance run
+    abstract_graph = {}
+    entrance_sets = {key: set() for key in members}
+    for node, neighbor_id, cost in _select_transitions(graph, node_coords, cluster_of):
+        entrance_sets[cluster_of[node]].add(node)
+        entrance_sets[cluster_of[neighbor_id]].add(neighbor_id)
+        abstract_graph.setdefault(node, []).append((neighbor_id, cost))
+        abstract_graph.setdefault(neighbor_id, [])
+
+    # Intra-cluster edges: exact entrance-to-entrance costs inside each cluster
+    entrances = {}
+    for key, entrance_set in entrance_sets.items():
+        entrances[key] = sorted(entrance_set)
+        _add_intra_edges(abstract_graph, graph, cluster_of, key, entrances[key])
+
+    fingerprint = graph_fingerprint(graph, node_coords, cluster_size)
+    return HierarchicalAbstraction(cluster_size, cluster_of, members, entrances,
+                                   abstract_graph, fingerprint)
+
+
+def update_abstraction(abstraction: HierarchicalAbstraction, graph: dict, node_coords: dict,
+                       delta) -> HierarchicalAbstraction:
+    """
+    Bring an abstraction up to date after a graph patch, reusing what is unchanged.
+
+    Intra-cluster costs only depend on edges inside the cluster, so they are
+    recomputed only for clusters containing a changed edge or a new node,
+    or whose entrance set moved. Transitions are re-selected everywhere
+    (a linear pass). The old abstraction is not modified, so searches still
+    using it are unaffected.
+
+    Args:
+        abstraction (HierarchicalAbstraction): Abstraction of the previous version
+        graph (dict): Adjacency list after the change
+        node_coords (dict): Node coordinates after the change
+        delta (GraphDelta): Changes from graph_patch.LiveGraph.apply
+
+    Returns:
+        HierarchicalAbstraction: Abstraction of the new version
+
+    Raises:
+        ValueError: If a new node has no coordinates
+    """
+    cluster_size = abstraction.cluster_size
+    cluster_of = dict(abstraction.cluster_of)
+    members = {key: list(nodes) for key, nodes in abstraction.members.items()}
+    dirty = set()
+    for node in delta.added_nodes:
+        if node not in node_coords:
+            raise ValueError(f"Node {node} has no coordinates; cannot cluster the map")
+        x, y = node_coords[node]
+        key = (x // cluster_size, y // cluster_size)
+        cluster_of[node] = key
+        members.setdefault(key, []).append(node)
+        dirty.add(key)
+    for from_node, to_node in delta.edges:
+        if cluster_of[from_node] == cluster_of[to_node]:
+            dirty.add(cluster_of[from_node])
+
+    abstract_graph = {}
+    entrance_sets = {key: set() for key in members}
+    for node, neighbor_id, cost in _select_transitions(graph, node_coords, cluster_of):
+        entrance_sets[cluster_of[node]].add(node)
+        entrance_sets[cluster_of[neighbor_id]].add(neighbor_id)
+        abstract_graph.setdefault(node, []).append((neighbor_id, cost))
+        abstract_graph.setdefault(neighbor_id, [])
+
+    entrances = {}
+    for key, entrance_set in entrance_sets.items():
+        entrances[key] = sorted(entrance_set)
+        if key in dirty or entrances[key] != abstraction.entrances.get(key, []):
+            _add_intra_edges(abstract_graph, graph, cluster_of, key, entrances[key])
+            continue
+        # Unchanged cluster: copy its intra-cluster edges from the old abstraction
+        for entrance in entrances[key]:
+            abstract_graph[entrance].extend(
+                (other, cost) for other, cost in abstraction.abstract_graph[entrance]
+                if cluster_of[other] == key)
+
+    fingerprint = graph_fingerprint(graph, node_coords, cluster_size)
+    return HierarchicalAbstraction(cluster_size, cluster_of, members, entrances,
+                                   abstract_graph, fingerprint)
+
+
+def load_or_build_abstraction(graph: dict, node_coords: dict, cluster_size: int = None,
+                              cache_dir: str = None) -> HierarchicalAbstraction:
+    """
+    Load a cached abstraction from disk, building and saving it if missing.
+
+    Cache files are named after the graph fingerprint, so a changed map never
+    reuses a stale abstraction.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+        cluster_size (int): Cluster side length (default: default_cluster_size)
+        cache_dir (str): Directory for cache files (None disables the disk cache)
+
+    Returns:
+        HierarchicalAbstraction: The cluster abstraction
+    """
+    if cluster_size is None:
+        cluster_size = default_cluster_size(node_coords)
+    if cache_dir is None:
+        return build_abstraction(graph, node_coords, cluster_size)
+
+    fingerprint = graph_fingerprint(graph, node_coords, cluster_size)
+    cache_path = os.path.join(cache_dir, f"{fingerprint}.hpa")
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            abstraction = pickle.load(f)
+        if abstraction.fingerprint == fingerprint:
+            return abstraction
+
+    abstraction = build_abstraction(graph, node_coords, cluster_size)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Unique per writer, so threads or processes building the same map at
+    # once cannot interleave their writes
+    temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(abstraction, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, cache_path)
+    return abstraction
+
+
+def _query_graph(abstraction: HierarchicalAbstraction, graph: dict, origin: int, destinations: list) -> dict:
+    """
+    Abstract graph for one query, with origin and destinations linked in.
+
+    Only the adjacency lists that gain edges are copied; the rest are shared
+    with the cached abstraction.
+    """
+    query_graph = dict(abstraction.abstract_graph)
+    cluster_of = abstraction.cluster_of
+
+    def add_edge(from_node, to_node, cost):
+        neighbors = query_graph.get(from_node, [])
+        query_graph[from_node] = neighbors + [(to_node, cost)]
+        query_graph.setdefault(to_node, [])
+
+    # Origin -> entrances (and same-cluster destinations) of its cluster
+    origin_cluster = cluster_of[origin]
+    dist = _cluster_dijkstra(graph, origin, cluster_of, origin_cluster)
+    for target in abstraction.entrances[origin_cluster]:
+        if target != origin and target in dist:
+            add_edge(origin, target, dist[target])
+    for dest in destinations:
+        if dest != origin and dest in dist and dest not in abstraction.entrances[origin_cluster]:
+            add_edge(origin, dest, dist[dest])
+    query_graph.setdefault(origin, [])
+
+    # Entrances -> each destination, searched backwards inside its cluster
+    for dest in destinations:
+        if dest not in cluster_of:
+            continue
+        dest_cluster = cluster_of[dest]
+        reverse = {}
+        for node in abstraction.members[dest_cluster]:
+            for neighbor_id, cost in graph.get(node, []):
+                if cluster_of[neighbor_id] == dest_cluster:
+                    reverse.setdefault(neighbor_id, []).append((node, cost))
+        dist = _cluster_dijkstra(reverse, dest, cluster_of, dest_cluster)
+        for entrance in abstraction.entrances[dest_cluster]:
+            if entrance != dest and entrance in dist:
+                add_edge(entrance, dest, dist[entrance])
+
+    return query_graph
+
+
+def search_hpa(graph: dict, node_coords: dict, origin: int, destinations: list,
+               abstraction: HierarchicalAbstraction = None, cluster_size: int = None,
+               cache_dir: str = None, deadline: float = None) -> tuple:
+    """
+    Hierarchical A*: abstract search first, then corridor-restricted refinement.
+
+    The abstract search only uses the selected transitions, so its route can
+    be slightly longer than optimal. The refinement step searches the full
+    graph inside the corridor of clusters that route passes through, which
+    recovers the concrete path and often some of the lost cost.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        abstraction (HierarchicalAbstraction): Prebuilt abstraction (optional)
+        cluster_size (int): Cluster side length when building one
+        cache_dir (str): On-disk abstraction cache directory (optional)
+        deadline (float): Absolute time.time() passed on to both A* searches;
+            also checked after building the abstraction and the query graph
+
+    Returns:
+        SearchResult: (best_goal, nodes_created, best_path, second_goal, second_path)
+            nodes_created covers both the abstract and the refinement search;
+            counters has 'abstract_nodes' and 'refine_nodes' separately.
+    """
+    if abstraction is None:
+        abstraction = load_or_build_abstraction(graph, node_coords, cluster_size, cache_dir)
+    if origin not in abstraction.cluster_of:
+        return search_astar(graph, node_coords, origin, destinations, deadline=deadline)
+
+    query_graph = _query_graph(abstraction, graph, origin, destinations)
+    if deadline is not None and time.time() >= deadline:
+        return SearchResult(stopped_early=True)
+    abstract = search_astar(
+        query_graph, node_coords, origin, destinations, deadline=deadline, max_solutions=1)
+    goal, abstract_nodes, abstract_path, _, _ = abstract
+    if goal is None:
+        if abstract.stopped_early:
+            return SearchResult(nodes_created=abstract_nodes, stopped_early=True,
+                                counters={'abstract_nodes': abstract_nodes, 'refine_nodes': 0})
+        # The abstraction keeps only some transitions; before reporting no
+        # solution, make sure with a search of the full graph
+        full = search_astar(graph, node_coords, origin, destinations, deadline=deadline)
+        return full.replace(nodes_created=abstract_nodes + full.nodes_created,
+                            counters={'abstract_nodes': abstract_nodes,
+                                      'refine_nodes': full.nodes_created})
+
+    # Refine inside the corridor of clusters the abstract path touches
+    corridor = set(abstraction.cluster_of[node] for node in abstract_path)
+    corridor_graph = {}
+    for key in corridor:
+        for node in abstraction.members[key]:
+            corridor_graph[node] = [
+                (neighbor_id, cost) for neighbor_id, cost in graph.get(node, [])
+                if abstraction.cluster_of[neighbor_id] in corridor
+            ]
+    refined = search_astar(corridor_graph, node_coords, origin, destinations, deadline=deadline)
+    return refined.replace(nodes_created=abstract_nodes + refined.nodes_created,
+                           counters={'abstract_nodes': abstract_nodes,
+                                     'refine_nodes': refined.nodes_created})
+
+
+def report_optimality_gap(test_cases: list, cluster_size: int = None, cache_dir: str = None):
+    """
+    Compare search_hpa against plain search_astar on a list of input files.
+
+    Prints one row per file with both costs, the gap and nodes created.
+
+    Args:
+        test_cases (list): Input file paths
+        cluster_size (int): Cluster side length (default: per-map default)
+        cache_dir (str): On-disk abstraction cache directory (optional)
+    """
+    print(f"{'Test':<34} | {'A* Cost':<8} | {'HPA Cost':<8} | {'Gap':<7} | {'A* Nodes':<8} | {'HPA Nodes':<9}")
+    print("-" * 90)
+    for filename in test_cases:
+        graph, node_coords, origin, destinations = parse_input(filename)
+        astar = search_astar(graph, node_coords, origin, destinations)
+        hpa = search_hpa(graph, node_coords, origin, destinations,
+                         cluster_size=cluster_size, cache_dir=cache_dir)
+
+        astar_str = "-" if astar.cost is None else f"{astar.cost:.1f}"
+        hpa_str = "-" if hpa.cost is None else f"{hpa.cost:.1f}"
+        if astar.cost is None or hpa.cost is None:
+            gap_str = "-"
+        else:
+            gap = (hpa.cost - astar.cost) / astar.cost * 100 if astar.cost else 0.0
+            gap_str = f"{gap:.1f}%"
+        print(f"{filename:<34} | {astar_str:<8} | {hpa_str:<8} | {gap_str:<7} | "
+              f"{astar.nodes_created:<8} | {hpa.nodes_created:<9}")
+
+
+def main():
+    """Command-line entry point for the optimality gap report."""
+    args = sys.argv[1:]
+    if "--gap" not in args:
+        print("Usage: python hierarchical_search.py --gap [--cluster-size N] [--cache-dir DIR]")
+        sys.exit(1)
+
+    cluster_size = None
+    cache_dir = None
+    if "--cluster-size" in args:
+        cluster_size = int(args[args.index("--cluster-size") + 1])
+    if "--cache-dir" in args:
+        cache_dir = args[args.index("--cache-dir") + 1]
+
+    from test_runner import TEST_CASES
+    report_optimality_gap([test_file for test_file, _, _ in TEST_CASES], cluster_size, cache_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+"""
+Load-testing harness with latency percentiles for served queries.
+
+test_runner.print_summary shows one timing per method and test case. That
+says nothing about how the searches behave under concurrent load. This
+harness replays a query mix at a target rate and records what a capacity
+plan needs:
+- the mix: random origin/destination pairs drawn from the map's nodes, with
+  METHOD_MAP methods chosen by weight (e.g. AS:3,UCS:1,BFS:1)
+- the target: the in-process API (a batch_search.SearchPool thread pool)
+  or a running search_server.py, over its Unix socket or TCP port
+- open-loop arrivals: request i is due at i / rate seconds (or at Poisson
+  arrival times), whether or not earlier requests have finished. Latency
+  is measured from when a request was due, so a backlog shows up in the
+  numbers instead of slowing the generator down (no coordinated omission).
+- results: p50/p95/p99/max latency overall and per method, status counts,
+  achieved throughput, and a timeline of completions, latency and resident
+  memory (of this process, or of the server and its workers when
+  --server-pid is given) per sample interval
+
+Results go to PREFIX.json (summary and timeline), PREFIX.requests.csv (one
+row per request) and PREFIX.timeline.csv.
+
+Usage:
+    python load_test.py map.txt --rate 50 --duration 10 --methods AS:3,UCS:1 --workers 4
+    python load_test.py map.txt --rate 200 --duration 30 --socket /tmp/route.sock \\
+        --server-pid 1234 --out results/route-200rps
+"""
+
+import asyncio
+import csv
+import inspect
+import itertools
+import json
+import os
+import random
+import time
+
+from batch_search import SearchPool, PROCESS_METHODS
+from search import METHOD_MAP
+
+
+# Mix used when no --methods are given
+DEFAULT_MIX = {'AS': 3, 'UCS': 1, 'BFS': 1}
+
+# Seconds between memory samples and timeline buckets
+DEFAULT_SAMPLE_INTERVAL = 1.0
+
+# Long paths produce long response lines (same limit as search_server.py)
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+
+def parse_mix(text: str) -> dict:
+    """
+    Parse a method mix like "AS:3,UCS:1,BFS" (weight 1 when omitted).
+
+    Returns:
+        dict: Method -> weight
+
+    Raises:
+        ValueError: If a method is unknown, starts its own processes, or
+            has a weight that is not a positive number
+    """
+    mix = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        method, _, weight = part.partition(":")
+        method = method.strip().upper()
+        if method not in METHOD_MAP or method in PROCESS_METHODS:
+            raise ValueError(f"Invalid method '{method}' in the mix")
+        try:
+            mix[method] = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight '{weight}' for method '{method}'")
+        if mix[method] <= 0:
+            raise ValueError(f"Weight for method '{method}' must be positive")
+    if not mix:
+        raise ValueError("The method mix is empty")
+    return mix
+
+
+def make_query_mix(graph: dict, mix: dict, count: int, seed: int = 0) -> list:
+    """
+    Draw a reproducible list of requests.
+
+    Args:
+        graph (dict): Graph whose nodes are drawn from
+        mix (dict): Method -> weight
+        count (int): Number of requests
+        seed (int): Random seed
+
+    Returns:
+        list: Request dicts with "id", "method", "origin" and "destinations"
+    """
+    rng = random.Random(seed)
+    nodes = sorted(graph)
+    methods, weights = list(mix), list(mix.values())
+    return [{'id': i, 'method': rng.choices(methods, weights)[0],
+             'origin': rng.choice(nodes), 'destinations': [rng.choice(nodes)]}
+            for i in range(count)]
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Nearest-rank percentile of an ascending list (None if empty)."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _rss_bytes(pids: list) -> int:
+    """
+    Resident memory of the given processes and all their descendants.
+
+    Returns:
+        int: Bytes (None where /proc is not available)
+    """
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    seen = set()
+    stack = list(pids)
+    total = 0
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+            for tid in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{tid}/children") as f:
+                    stack.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            if pid == pids[0]:
+                return None
+    return total
+
+
+class InProcessTarget:
+    """Sends requests to a SearchPool in this process."""
+
+    def __init__(self, graph: dict, node_coords: dict, workers: int = None, timeout: float = None):
+        self.pool = SearchPool(graph, node_coords, workers)
+        self.timeout = timeout
+        self.pids = [os.getpid()]
+
+    async def open(self):
+        pass
+
+    async def send(self, request: dict) -> dict:
+        kwargs = {}
+        if self.timeout is not None and 'deadline' in inspect.signature(METHOD_MAP[request['method']]).parameters:
+            kwargs['deadline'] = time.time() + self.timeout
+        try:
+            result = await asyncio.wrap_future(self.pool.submit(
+                request['method'], request['origin'], request['destinations'], **kwargs))
+        except Exception as e:
+            return {'status': 'error', 'error': str(e)}
+        return {'status': 'timeout' if result.stopped_early else 'ok', 'cost': result.cost,
+                'counters': result.counters}
+
+    async def close(self):
+        self.pool.close()
+
+
+class ServerTarget:
+    """Sends requests to a running search_server.py over one connection."""
+
+    def __init__(self, filename: str, socket_path: str = None, host: str = '127.0.0.1',
+                 port: int = None, timeout: float = None, server_pid: int = None):
+        self.filename = os.path.abspath(filename)
+        self.socket_path = socket_path
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.pids = [server_pid] if server_pid is not None else []
+        self._ids = itertools.count()
+        self._pending = {}
+
+    async def open(self):
+        if self.socket_path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(
+                self.socket_path, limit=_STREAM_LIMIT)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port, limit=_STREAM_LIMIT)
+        self._receiver = asyncio.create_task(self._receive())
+
+    async def _receive(self):
+        # Responses come back in completion order; match them by id
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._pending.pop(response.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result({'status': 'error', 'error': "connection closed"})
+
+    async def send(self, request: dict) -> dict:
+        message = {'id': next(self._ids), 'file': self.filename, 'method': request['method'],
+                   'origin': request['origin'], 'destinations': request['destinations']}
+        if self.timeout is not None:
+            message['timeout'] = self.timeout
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message['id']] = future
+        self._writer.write((json.dumps(message) + "\n").encode())
+        await self._writer.drain()
+        return await future
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._receiver.cancel()
+
+
+async def run_load(target, requests: list, rate: float, poisson: bool = False, seed: int = 0,
+                   sample_interval: float = DEFAULT_SAMPLE_INTERVAL) -> dict:
+    """
+    Replay requests against a target at a fixed rate and measure them.
+
+    Args:
+        target: InProcessTarget or ServerTarget
+        requests (list): From make_query_mix
+        rate (float): Requests per second
+        poisson (bool): Exponential gaps between requests instead of even ones
+        seed (int): Random seed for the Poisson gaps
+        sample_interval (float): Seconds between memory samples
+
+    Returns:
+        dict: 'records' (per request: id, method, due_s, latency_ms, status,
+            cost, expansions), 'memory' ((t, rss_bytes) samples) and
+            'elapsed_s' (first due time to last completion)
+    """
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    records = []
+    memory = []
+    await target.open()
+    start = loop.time()
+
+    async def sample_memory():
+        while True:
+            if target.pids:
+                memory.append((loop.time() - start, _rss_bytes(target.pids)))
+            await asyncio.sleep(sample_interval)
+
+    async def fire(request, due):
+        response = await target.send(request)
+        finished = loop.time()
+        records.append({
+            'id': request['id'], 'method': request['method'], 'due_s': due - start,
+            'latency_ms': (finished - due) * 1000, 'status': response.get('status'),
+            'cost': response.get('cost'),
+            'expansions': (response.get('counters') or {}).get('expansions'),
+        })
+
+    sampler = asyncio.create_task(sample_memory())
+    tasks = []
+    due = start
+    try:
+        for request in requests:
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(fire(request, due)))
+            due += rng.expovariate(rate) if poisson else 1.0 / rate
+        await asyncio.gather(*tasks)
+    finally:
+        sampler.cancel()
+        await target.close()
+    if target.pids:
+        memory.append((loop.time() - start, _rss_bytes(target.pids)))
+    records.sort(key=lambda record: record['id'])
+    return {'records': records, 'memory': memory, 'elapsed_s': loop.time() - start}
+
+
+def _latency_stats(latencies: list) -> dict:
+    latencies = sorted(latencies)
+    if not latencies:
+        return {'count': 0, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None,
+                'mean_ms': None}
+    return {'count': len(latencies), 'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95), 'p99_ms': percentile(latencies, 99),
+            'max_ms': latencies[-1], 'mean_ms': sum(latencies) / len(latencies)}
+
+
+def summarize(run: dict, rate: float, sample_interval: float = DEFAULT_SAMPLE_INTERVAL) -> dict:
+    """
+    Turn run_load's records into the report.
+
+    Returns:
+        dict: offered/achieved rate, status counts, overall and per-method
+            latency stats (successful requests only), peak memory and a
+            timeline of per-interval completions, latency and memory
+    """
+    records = run['records']
+    ok = [record for record in records if record['status'] == 'ok']
+    statuses = {}
+    for record in records:
+        statuses[record['status']] = statuses.get(record['status'], 0) + 1
+    per_method = {}
+    for method in sorted({record['method'] for record in records}):
+        per_method[method] = _latency_stats(
+            [record['latency_ms'] for record in ok if record['method'] == method])
+
+    # A request completes at due + latency; bucket by completion time
+    buckets = {}
+    for record in records:
+        finished = record['due_s'] + record['latency_ms'] / 1000
+        buckets.setdefault(int(finished // sample_interval), []).append(record)
+    memory = {}
+    for t, rss in run['memory']:
+        memory.setdefault(int(t // sample_interval), rss)
+    timeline = []
+    for bucket in range(max(list(buckets) + list(memory) + [0]) + 1):
+        done = buckets.get(bucket, [])
+        latencies = sorted(record['latency_ms'] for record in done if record['status'] == 'ok')
+        rss = memory.get(bucket)
+        timeline.append({
+            't_s': bucket * sample_interval, 'completed': len(done),
+            'throughput_rps': len(done) / sample_interval,
+            'p50_ms': percentile(latencies, 50), 'p99_ms': percentile(latencies, 99),
+            'rss_mb': rss / (1 << 20) if rss is not None else None,
+        })
+
+    samples = [rss for _, rss in run['memory'] if rss is not None]
+    return {
+        'requests': len(records), 'offered_rps': rate,
+        'achieved_rps': len(records) / run['elapsed_s'] if run['elapsed_s'] > 0 else None,
+        'elapsed_s': run['elapsed_s'], 'statuses': statuses,
+        'latency': _latency_stats([record['latency_ms'] for record in ok]),
+        'per_method': per_method,
+        'peak_rss_mb': max(samples) / (1 << 20) if samples else None,
+        'timeline': timeline,
+    }
+
+
+def write_results(prefix: str, summary: dict, records: list):
+    """Write PREFIX.json, PREFIX.requests.csv and PREFIX.timeline.csv."""
+    directory = os.path.dirname(prefix)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(prefix + ".json", 'w') as f:
+        json.dump(summary, f, indent=1)
+    fields = ['id', 'method', 'due_s', 'latency_ms', 'status', 'cost', 'expansions']
+    with open(prefix + ".requests.csv", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(records)
+    fields = ['t_s', 'completed', 'throughput_rps', 'p50_ms', 'p99_ms', 'rss_mb']
+    with open(prefix + ".timeline.csv", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(summary['timeline'])
+
+
+def print_report(summary: dict):
+    """Print the summary as a table."""
+    def ms(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    print(f"Requests: {summary['requests']}  offered {summary['offered_rps']:g}/s  "
+          f"achieved {summary['achieved_rps']:.1f}/s  in {summary['elapsed_s']:.1f}s")
+    print("Statuses: " + ", ".join(f"{status} {count}" for status, count in sorted(summary['statuses'].items())))
+    if summary['peak_rss_mb'] is not None:
+        print(f"Peak RSS: {summary['peak_rss_mb']:.1f} MB")
+    print(f"\n{'Method':<8} | {'Count':<6} | {'p50 ms':<8} | {'p95 ms':<8} | {'p99 ms':<8} | {'max ms':<8}")
+    print("-" * 60)
+    rows = list(summary['per_method'].items()) + [('ALL', summary['latency'])]
+    for method, stats in rows:
+        print(f"{method:<8} | {stats['count']:<6} | {ms(stats['p50_ms']):<8} | {ms(stats['p95_ms']):<8} | "
+              f"{ms(stats['p99_ms']):<8} | {ms(stats['max_ms']):<8}")
+
+
+def main():
+    """Command-line entry point: run one load test and report it."""
+    import argparse
+    from graph_parser import parse_input
+
+    parser = argparse.ArgumentParser(description="Replay a query mix at a target rate")
+    parser.add_argument("filename", help="Graph file the queries are drawn from (and served)")
+    parser.add_argument("--rate", type=float, default=20.0, help="Requests per second (default: 20)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of arrivals (default: 10)")
+    parser.add_argument("--methods", default=",".join(f"{m}:{w}" for m, w in DEFAULT_MIX.items()),
+                        help="Weighted method mix (default: %(default)s)")
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals instead of evenly spaced")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for queries and arrivals")
+    parser.add_argument("--timeout", type=float, default=None, help="Per-request deadline in seconds")
+    parser.add_argument("--workers", type=int, default=None, help="In-process threads (default: CPU count)")
+    parser.add_argument("--socket", help="Load a search_server.py on this Unix socket instead")
+    parser.add_argument("--port", type=int, help="Load a search_server.py on this local TCP port instead")
+    parser.add_argument("--server-pid", type=int, help="Server PID, to sample its (and its workers') memory")
+    parser.add_argument("--sample-interval", type=float, default=DEFAULT_SAMPLE_INTERVAL,
+                        help="Seconds per timeline bucket and memory sample (default: %(default)s)")
+    parser.add_argument("--out", help="Write PREFIX.json, PREFIX.requests.csv and PREFIX.timeline.csv")
+    args = parser.parse_args()
+
+    if args.rate <= 0 or args.duration <= 0 or args.sample_interval <= 0:
+        parser.error("--rate, --duration and --sample-interval must be positive")
+    try:
+        mix = parse_mix(args.methods)
+    except ValueError as e:
+        parser.error(str(e))
+
+    graph, node_coords, _, _ = parse_input(args.filename)
+    requests = make_query_mix(graph, mix, max(1, int(args.rate * args.duration)), args.seed)
+    if args.socket is not None or args.port is not None:
+        target = ServerTarget(args.filename, args.socket, port=args.port, timeout=args.timeout,
+                              server_pid=args.server_pid)
+    else:
+        target = InProcessTarget(graph, node_coords, args.workers, args.timeout)
+
+    run = asyncio.run(run_load(target, requests, args.rate, args.poisson, args.seed, args.sample_interval))
+    summary = summarize(run, args.rate, args.sample_interval)
+    summary['target'] = 'server' if isinstance(target, ServerTarget) else 'in-process'
+    summary['mix'] = mix
+    print_report(summary)
+    if args.out:
+        write_results(args.out, summary, run['records'])
+        print(f"\nWrote {args.out}.json, {args.out}.requests.csv and {args.out}.timeline.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Hash-distributed parallel A* (HDA*) for single large queries.
+
+Batch parallelism does nothing for one huge query, and search_astar runs on
+one core. HDA* spreads a single A* over worker processes:
+- every node has one owner, chosen by hashing its ID; only the owner keeps
+  the node's best g, parent and open-list entry, so there is no shared
+  closed list and no locking per node
+- a worker pops its own best entry, expands it and sends each successor
+  (f, g, node, parent) to the successor's owner; messages are batched per
+  owner and flushed when a batch is full, every POLL_INTERVAL expansions,
+  and whenever the worker runs out of work
+- a popped destination becomes the incumbent if it is cheaper; every worker
+  drops entries with f >= incumbent, so with an admissible heuristic the
+  incumbent is optimal once nobody holds a cheaper entry
+- a node reached again with a smaller g is simply reopened by its owner,
+  since workers do not expand in one global f order
+
+Termination detection: workers count every batch sent and received, and
+flag themselves idle once they have no entry below the incumbent and have
+flushed their outgoing batches. Counters and flags change under one lock,
+so the coordinator can read them atomically. It stops the workers when
+every worker is idle and every sent batch was received. No message is then
+in flight, and no worker can be woken up again.
+
+Workers are forked and share the parsed graph copy-on-write (see
+portfolio.py). Only the best path is returned; unlike search_astar there
+is no second-best solution. The Euclidean heuristic is admissible only if
+no edge is cheaper than its straight-line length, as for A*.
+
+Usage:
+    search_hda(graph, node_coords, origin, destinations, workers=4)
+
+    python search.py map.txt HDA --workers 4
+    python parallel_astar.py --grid 300 --workers 1 2 4     # speedup report
+    python parallel_astar.py map.txt --workers 1 2 4
+"""
+
+import heapq
+import math
+import multiprocessing
+import os
+import queue
+import random
+import time
+from multiprocessing.sharedctypes import RawArray, RawValue
+
+from search_result import SearchResult
+from utils import get_closest_destination_heuristic
+
+
+# Successors buffered per owner before a batch is sent
+DEFAULT_BATCH_SIZE = 64
+
+# Expansions between inbox polls and forced flushes of partly filled batches
+POLL_INTERVAL = 128
+
+# Seconds an idle worker blocks on its inbox before re-checking for stop
+IDLE_WAIT = 0.005
+
+# Seconds between the coordinator's termination checks
+TERMINATION_CHECK = 0.001
+
+# Seconds to wait for a stopped worker's report before giving up on it
+REPORT_TIMEOUT = 30.0
+
+# Layout of the shared counter array: batches sent, batches received, then
+# one idle flag per worker
+_SENT, _RECEIVED, _IDLE = 0, 1, 2
+
+
+def _owner(node: int, workers: int) -> int:
+    """Worker owning a node (multiplicative hash, so ID stripes spread evenly)."""
+    return ((node * 2654435761) & 0xFFFFFFFF) % workers
+
+
+def _context():
+    """Fork where available so workers share the graph without pickling it."""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def _hda_worker(rank: int, workers: int, graph: dict, node_coords: dict, destinations: list,
+                inboxes: list, reports, lock, state, incumbent, stop, batch_size: int):
+    """
+    Worker body: run A* over the nodes this worker owns until told to stop.
+
+    Puts (rank, best_goal, best_cost, parents, expansions, generated, batches_sent)
+    on reports when done.
+    """
+    # Batches still queued at shutdown (deadline stop) may be dropped
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+    inbox = inboxes[rank]
+    goals = set(destinations)
+    best_g = {}
+    parents = {}
+    open_list = []
+    outgoing = [[] for _ in range(workers)]
+    best_goal, best_cost = None, math.inf
+    expansions = generated = batches_sent = 0
+    since_poll = 0
+    idle = False
+
+    def heuristic(node):
+        return get_closest_destination_heuristic(node_coords, node, destinations)
+
+    def receive(batch):
+        nonlocal idle
+        with lock:
+            state[_RECEIVED] += 1
+            state[_IDLE + rank] = 0
+        idle = False
+        for entry in batch:
+            f, g, node, parent = entry
+            if g < best_g.get(node, math.inf):
+                best_g[node] = g
+                parents[node] = parent
+                heapq.heappush(open_list, entry)
+
+    def flush():
+        nonlocal batches_sent
+        for target, batch in enumerate(outgoing):
+            if batch:
+                # Counted before it is queued, so it is never in flight uncounted
+                with lock:
+                    state[_SENT] += 1
+                inboxes[target].put(batch)
+                outgoing[target] = []
+                batches_sent += 1
+
+    while not stop.value:
+        if since_poll >= POLL_INTERVAL or not open_list:
+            since_poll = 0
+            flush()
+            while True:
+                try:
+                    batch = inbox.get_nowait()
+                except queue.Empty:
+                    break
+                receive(batch)
+
+        # Drop stale entries; once the best entry cannot beat the incumbent,
+        # none can (the incumbent only decreases)
+        bound = incumbent.value
+        while open_list and open_list[0][1] > best_g[open_list[0][2]]:
+            heapq.heappop(open_list)
+        if open_list and open_list[0][0] >= bound:
+            open_list.clear()
+
+        if not open_list:
+            flush()
+            if not idle:
+                with lock:
+                    state[_IDLE + rank] = 1
+                idle = True
+            try:
+                receive(inbox.get(timeout=IDLE_WAIT))
+            except queue.Empty:
+                pass
+            continue
+
+        _, g, node, _ = heapq.heappop(open_list)
+        expansions += 1
+        since_poll += 1
+        if node in goals:
+            if g < best_cost:
+                best_goal, best_cost = node, g
+            with lock:
+                if g < incumbent.value:
+                    incumbent.value = g
+            continue
+
+        for neighbor_id, edge_cost in graph.get(node, []):
+            new_g = g + edge_cost
+            new_f = new_g + heuristic(neighbor_id)
+            # Also skips h = inf, as search_astar does
+            if new_f >= bound:
+                continue
+            generated += 1
+            target = _owner(neighbor_id, workers)
+            entry = (new_f, new_g, neighbor_id, node)
+            if target == rank:
+                if new_g < best_g.get(neighbor_id, math.inf):
+                    best_g[neighbor_id] = new_g
+                    parents[neighbor_id] = node
+                    heapq.heappush(open_list, entry)
+            else:
+                batch = outgoing[target]
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    with lock:
+                        state[_SENT] += 1
+                    inboxes[target].put(batch)
+                    outgoing[target] = []
+                    batches_sent += 1
+
+    reports.put((rank, best_goal, best_cost, parents, expansions, generated, batches_sent))
+
+
+def search_hda(graph: dict, node_coords: dict, origin: int, destinations: list,
+               deadline: float = None, workers: int = None,
+               batch_size: int = DEFAULT_BATCH_SIZE) -> tuple:
+    """
+    Hash-distributed parallel A* (HDA*).
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        deadline (float): Absolute time.time() at which to stop early and
+            return the best path found so far (default: no limit)
+        workers (int): Worker processes (default: CPU count)
+        batch_size (int): Successors per message to another worker
+
+    Returns:
+        SearchResult: (best_goal, nodes_created, best_path, None, [])
+            counters has 'expansions' (including re-expansions), 'messages'
+            (batches exchanged) and 'workers'.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    ctx = _context()
+    lock = ctx.Lock()
+    state = RawArray('q', _IDLE + workers)
+    incumbent = RawValue('d', math.inf)
+    stop = RawValue('b', 0)
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    reports = ctx.Queue()
+
+    h = get_closest_destination_heuristic(node_coords, origin, destinations)
+    state[_SENT] = 1
+    inboxes[_owner(origin, workers)].put([(h, 0.0, origin, None)])
+
+    processes = [ctx.Process(target=_hda_worker, daemon=True,
+                             args=(rank, workers, graph, node_coords, destinations, inboxes,
+                                   reports, lock, state, incumbent, stop, batch_size))
+                 for rank in range(workers)]
+    for process in processes:
+        process.start()
+
+    stopped_early = False
+    collected = []
+    try:
+        while True:
+            time.sleep(TERMINATION_CHECK)
+            with lock:
+                done = (state[_SENT] == state[_RECEIVED]
+                        and all(state[_IDLE + rank] for rank in range(workers)))
+            if done:
+                break
+            if deadline is not None and time.time() >= deadline:
+                stopped_early = True
+                break
+        stop.value = 1
+        for _ in range(workers):
+            collected.append(reports.get(timeout=REPORT_TIMEOUT))
+    finally:
+        stop.value = 1
+        for process in processes:
+            process.join(timeout=REPORT_TIMEOUT if len(collected) == workers else 0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for inbox in inboxes:
+            inbox.cancel_join_thread()
+            inbox.close()
+        reports.close()
+
+    parents = {}
+    best_goal, best_cost = None, math.inf
+    expansions = generated = messages = 0
+    for _, goal, cost, worker_parents, worker_expansions, worker_generated, sent in sorted(collected):
+        parents.update(worker_parents)
+        if goal is not None and (cost < best_cost or (cost == best_cost and goal < best_goal)):
+            best_goal, best_cost = goal, cost
+        expansions += worker_expansions
+        generated += worker_generated
+        messages += sent
+
+    path = []
+    if best_goal is not None:
+        node = best_goal
+        while node is not None:
+            path.append(node)
+            node = parents[node]
+        path.reverse()
+    return SearchResult(best_goal, path, best_cost if best_goal is not None else None,
+                        nodes_created=1 + generated, stopped_early=stopped_early,
+                        counters={'expansions': expansions, 'messages': messages, 'workers': workers})
+
+
+def grid_graph(side: int, obstacle_ratio: float = 0.2, seed: int = 0) -> tuple:
+    """
+    Random 4-connected unit-cost grid for benchmarks.
+
+    Args:
+        side (int): Cells per side
+        obstacle_ratio (float): Share of cells that are blocked
+        seed (int): Random seed
+
+    Returns:
+        tuple: (graph, node_coords, origin, destinations) as from parse_input,
+            routing from the top-left free cell to the bottom-right one
+    """
+    rng = random.Random(seed)
+    free = {}
+    for y in range(side):
+        for x in range(side):
+            if rng.random() >= obstacle_ratio or (x, y) in ((0, 0), (side - 1, side - 1)):
+                free[(x, y)] = y * side + x + 1
+    graph = {node: [] for node in free.values()}
+    node_coords = {node: cell for cell, node in free.items()}
+    for (x, y), node in free.items():
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            neighbor = free.get((x + dx, y + dy))
+            if neighbor is not None:
+                graph[node].append((neighbor, 1.0))
+    return graph, node_coords, free[(0, 0)], [free[(side - 1, side - 1)]]
+
+
+def speedup_report(graph: dict, node_coords: dict, origin: int, destinations: list,
+                   worker_counts: list, batch_size: int = DEFAULT_BATCH_SIZE) -> list:
+    """
+    Time serial search_astar (stopping at the first goal) against search_hda.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        worker_counts (list): Worker counts to run search_hda with
+        batch_size (int): Successors per message
+
+    Returns:
+        list: (label, seconds, cost, expansions, messages) rows, serial A* first
+    """
+    from search_algorithms import search_astar
+
+    start = time.perf_counter()
+    serial = search_astar(graph, node_coords, origin, destinations, max_solutions=1)
+    rows = [("A*", time.perf_counter() - start, serial.cost, serial.counters['expansions'], 0)]
+    for workers in worker_counts:
+        start = time.perf_counter()
+        result = search_hda(graph, node_coords, origin, destinations, workers=workers,
+                            batch_size=batch_size)
+        rows.append((f"HDA* x{workers}", time.perf_counter() - start, result.cost,
+                     result.counters['expansions'], result.counters['messages']))
+    return rows
+
+
+def main():
+    """Command-line entry point: print the speedup of HDA* over serial A*."""
+    import argparse
+    from graph_parser import parse_input
+
+    parser = argparse.ArgumentParser(description="Compare parallel HDA* with serial A*")
+    parser.add_argument("filename", nargs="?", help="Graph file (default: a synthetic grid)")
+    parser.add_argument("--grid", type=int, default=300, help="Side of the synthetic grid (default: 300)")
+    parser.add_argument("--obstacles", type=float, default=0.2, help="Blocked share of grid cells")
+    parser.add_argument("--seed", type=int, default=0, help="Grid random seed")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to try")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Successors per message")
+    args = parser.parse_args()
+
+    if args.filename:
+        graph, node_coords, origin, destinations = parse_input(args.filename)
+        print(f"{args.filename}: {len(graph)} nodes, {os.cpu_count()} CPUs")
+    else:
+        graph, node_coords, origin, destinations = grid_graph(args.grid, args.obstacles, args.seed)
+        print(f"{args.grid}x{args.grid} grid, {len(graph)} nodes, {os.cpu_count()} CPUs")
+
+    rows = speedup_report(graph, node_coords, origin, destinations, args.workers, args.batch_size)
+    serial_seconds = rows[0][1]
+    print(f"{'Search':<9} | {'Seconds':<8} | {'Speedup':<7} | {'Cost':<8} | {'Expanded':<9} | {'Messages':<8}")
+    print("-" * 64)
+    for label, seconds, cost, expansions, messages in rows:
+        cost = "-" if cost is None else f"{cost:.1f}"
+        print(f"{label:<9} | {seconds:<8.2f} | {serial_seconds / seconds:<7.2f} | {cost:<8} | "
+              f"{expansions:<9} | {messages:<8}")
+
+
+if __name__ == "__main__":
+    main()
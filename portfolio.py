@@ -0,0 +1,267 @@
+"""
+Parallel algorithm portfolio.
+
+No single method wins everywhere: GBFS is fastest on some maps, A* on
+others, and DFS gets lucky on test_depth.txt. The portfolio runs several
+METHOD_MAP methods at once, one worker process each, and:
+- returns as soon as a method that proves optimality (UCS or A*) finishes
+- otherwise returns at the deadline with the cheapest path found so far
+- terminates every method still running when it returns
+
+Workers are forked, so they share the parent's parsed graph copy-on-write
+instead of each receiving a pickled copy. Where fork is unavailable the
+graph is pickled once per worker.
+
+A* only proves optimality when the heuristic never overestimates; with the
+Euclidean default that means no edge may be cheaper than its geometric
+length. Keep UCS in the portfolio when that is not guaranteed.
+
+Usage:
+    search_portfolio(graph, node_coords, origin, destinations,
+                     methods=['AS', 'GBFS', 'DFS'], timeout=2.0)
+
+    python search.py map.txt PORTFOLIO --methods AS,GBFS,DFS --timeout 2
+    python portfolio.py map.txt [--methods AS,GBFS,DFS] [--timeout 2]
+"""
+
+import inspect
+import multiprocessing
+import queue
+import time
+
+from search_result import SearchResult
+
+
+# Methods run when none are given
+DEFAULT_METHODS = ['AS', 'UCS', 'GBFS', 'DFS']
+
+# Methods whose finished (not deadline-stopped) result is provably optimal
+PROVING_METHODS = {'UCS', 'CUS1', 'AS', 'ASTAR'}
+
+# Seconds to wait past the deadline for members to report their partial results
+DEADLINE_GRACE = 0.25
+
+
+class MemberResult:
+    """
+    What one portfolio member reported.
+
+    Attributes:
+        method (str): METHOD_MAP key
+        outcome (SearchResult): The member's result (None on error)
+        search_ms (float): Wall time of the search inside the worker
+        error (str): Error message if the method raised (None otherwise)
+    """
+
+    def __init__(self, method, outcome, search_ms, error=None):
+        self.method = method
+        self.outcome = outcome
+        self.search_ms = search_ms
+        self.error = error
+
+    @property
+    def cost(self) -> float:
+        """Cost of its best path (None if it found none or failed)."""
+        return self.outcome.cost if self.outcome is not None else None
+
+    @property
+    def stopped_early(self) -> bool:
+        """True if it stopped at the deadline."""
+        return self.outcome is not None and self.outcome.stopped_early
+
+
+class PortfolioResult:
+    """
+    Result of solve_portfolio().
+
+    Attributes:
+        outcome (SearchResult): Winning result; stopped_early is True if
+            no proving method finished and the deadline cut a member short.
+            nodes_created is summed over every member that reported.
+        winner (str): Method whose path was returned (None if no path)
+        proven (bool): True if a proving method finished, so the cost is optimal
+        members (list): MemberResult for every method that reported
+        cancelled (list): Methods terminated before they reported
+    """
+
+    def __init__(self, outcome, winner, proven, members, cancelled):
+        self.outcome = outcome
+        self.winner = winner
+        self.proven = proven
+        self.members = members
+        self.cancelled = cancelled
+
+
+def _run_member(method: str, graph: dict, node_coords: dict, origin: int, destinations: list,
+                deadline: float, results):
+    """Worker body: run one method and put a MemberResult on the results queue."""
+    from search import METHOD_MAP
+
+    start = time.perf_counter()
+    try:
+        search_function = METHOD_MAP[method]
+        kwargs = {}
+        if deadline is not None and 'deadline' in inspect.signature(search_function).parameters:
+            kwargs['deadline'] = deadline
+        outcome = search_function(graph, node_coords, origin, destinations, **kwargs)
+        member = MemberResult(method, outcome, (time.perf_counter() - start) * 1000)
+    except Exception as e:
+        member = MemberResult(method, None, (time.perf_counter() - start) * 1000, str(e))
+    results.put(member)
+
+
+def _context():
+    """Fork where available so workers share the graph without pickling it."""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def solve_portfolio(graph: dict, node_coords: dict, origin: int, destinations: list,
+                    methods: list = None, timeout: float = None,
+                    deadline: float = None) -> PortfolioResult:
+    """
+    Race several search methods and keep the best answer.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        methods (list): METHOD_MAP keys to run (default: DEFAULT_METHODS)
+        timeout (float): Seconds from now until the deadline
+        deadline (float): Absolute time.time() deadline (the earlier of the
+            two applies; default: wait for a proving method or all methods)
+
+    Returns:
+        PortfolioResult: Winning outcome plus per-method details
+
+    Raises:
+        ValueError: If a method is unknown, repeated, PORTFOLIO itself or HDA
+            (members run in daemon processes, which cannot start HDA's workers)
+    """
+    from search import METHOD_MAP
+
+    methods = list(methods or DEFAULT_METHODS)
+    for method in methods:
+        if method not in METHOD_MAP or method in ('PORTFOLIO', 'HDA'):
+            raise ValueError(f"Invalid portfolio method '{method}'")
+    if len(set(methods)) != len(methods):
+        raise ValueError("Portfolio methods must not repeat")
+    if timeout is not None:
+        timeout_deadline = time.time() + timeout
+        deadline = timeout_deadline if deadline is None else min(deadline, timeout_deadline)
+
+    ctx = _context()
+    results = ctx.Queue()
+    workers = {}
+    for method in methods:
+        worker = ctx.Process(target=_run_member, daemon=True,
+                             args=(method, graph, node_coords, origin, destinations, deadline, results))
+        worker.start()
+        workers[method] = worker
+
+    members = []
+    proof = None
+    try:
+        while len(members) < len(methods):
+            wait = None if deadline is None else max(0.0, deadline + DEADLINE_GRACE - time.time())
+            try:
+                member = results.get(timeout=wait)
+            except queue.Empty:
+                break
+            members.append(member)
+            if (member.method in PROVING_METHODS and member.error is None
+                    and not member.stopped_early):
+                proof = member
+                break
+    finally:
+        # Cancel whatever is still running
+        reported = {member.method for member in members}
+        cancelled = [method for method in methods if method not in reported]
+        for method in cancelled:
+            workers[method].terminate()
+        for worker in workers.values():
+            worker.join()
+        results.close()
+
+    nodes_created = sum(member.outcome.nodes_created for member in members
+                        if member.outcome is not None)
+    stopped_early = proof is None and (bool(cancelled) or any(m.stopped_early for m in members))
+    if proof is not None:
+        winner = proof if proof.cost is not None else None
+    else:
+        found = [member for member in members if member.cost is not None]
+        winner = min(found, key=lambda member: (member.cost, member.outcome.hops)) if found else None
+
+    if winner is None:
+        outcome = SearchResult(nodes_created=nodes_created, stopped_early=stopped_early)
+        return PortfolioResult(outcome, None, proof is not None, members, cancelled)
+    outcome = winner.outcome.replace(nodes_created=nodes_created, stopped_early=stopped_early)
+    return PortfolioResult(outcome, winner.method, proof is not None, members, cancelled)
+
+
+def search_portfolio(graph: dict, node_coords: dict, origin: int, destinations: list,
+                     methods: list = None, timeout: float = None,
+                     deadline: float = None) -> tuple:
+    """
+    PORTFOLIO method: solve_portfolio() reduced to the uniform result.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        methods (list): METHOD_MAP keys to run (default: DEFAULT_METHODS)
+        timeout (float): Seconds from now until the deadline
+        deadline (float): Absolute time.time() deadline
+
+    Returns:
+        SearchResult: (best_goal, nodes_created, best_path, second_goal, second_path)
+            stopped_early is True if the deadline passed before a proving
+            method finished.
+    """
+    return solve_portfolio(graph, node_coords, origin, destinations,
+                           methods=methods, timeout=timeout, deadline=deadline).outcome
+
+
+def main():
+    """Command-line entry point: race the methods on one file and show each result."""
+    import argparse
+    from graph_parser import parse_input
+
+    parser = argparse.ArgumentParser(description="Race several search methods on one map")
+    parser.add_argument("filename", help="Graph file in the assignment format")
+    parser.add_argument("--methods", default=",".join(DEFAULT_METHODS),
+                        help="Comma-separated METHOD_MAP keys (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=None, help="Deadline in seconds")
+    args = parser.parse_args()
+
+    graph, node_coords, origin, destinations = parse_input(args.filename)
+    methods = [method.strip().upper() for method in args.methods.split(",") if method.strip()]
+    start = time.perf_counter()
+    try:
+        result = solve_portfolio(graph, node_coords, origin, destinations,
+                                 methods=methods, timeout=args.timeout)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'Method':<8} | {'Status':<9} | {'Cost':<8} | {'Nodes':<8} | {'ms':<8}")
+    print("-" * 52)
+    for member in result.members:
+        if member.error is not None:
+            status, cost, nodes = "error", "-", "-"
+        else:
+            status = "stopped" if member.stopped_early else "finished"
+            cost = "-" if member.cost is None else f"{member.cost:.1f}"
+            nodes = member.outcome.nodes_created
+        print(f"{member.method:<8} | {status:<9} | {cost:<8} | {nodes:<8} | {member.search_ms:<8.1f}")
+    for method in result.cancelled:
+        print(f"{method:<8} | {'cancelled':<9} | {'-':<8} | {'-':<8} | {'-':<8}")
+    proof = "proven optimal" if result.proven else "cheapest path reported, not proven optimal"
+    print(f"\nWinner: {result.winner or '-'} ({proof}), {elapsed_ms:.1f} ms total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Monotone priority queues for UCS and A*.
+
+Both searches pop entries in nondecreasing key order, and every key they
+push is at least the key just popped (UCS always; A* whenever its heuristic
+is consistent). That lets a queue avoid a full binary heap:
+
+    HeapQueue    heapq over one list; works for any keys (the reference)
+    DialQueue    Dial's bucket queue: a ring of max_cost + 1 buckets, one
+                 per integer key. Needs whole-number keys that never exceed
+                 the current minimum by more than max_cost, which is what UCS
+                 produces when every edge cost is an integer <= max_cost.
+    RadixHeap    buckets by the highest bit in which a key differs from the
+                 last popped key (keys compared as IEEE-754 bit patterns, so
+                 any non-negative float works). Each entry moves between
+                 buckets at most 64 times; a key below the last popped one
+                 goes to a small side heap, so results stay exact even when
+                 the keys are not monotone.
+
+Entries are tuples with the key first, e.g. (cost, node_id, push_number,
+search_node). Entries with equal keys come out in tuple order (by node ID,
+then first pushed first), exactly as heapq would pop them, so every queue
+returns the same paths and counts. The push number keeps tuple comparison
+from ever reaching the SearchNode.
+
+Usage:
+    queue = make_queue('dial', max_cost=integral_cost_bound(graph))
+    queue.push((0, origin, 0, initial_node))
+    while queue:
+        cost, node_id, _, node = queue.pop()
+"""
+
+import heapq
+import struct
+from functools import partial
+
+
+# Queue kinds accepted by make_queue (and the searches' queue argument)
+QUEUE_KINDS = ('heap', 'dial', 'radix')
+
+# Largest edge cost for which a Dial ring is used; above it the ring would be
+# mostly empty buckets, so the radix heap is picked instead
+MAX_DIAL_COST = 1 << 16
+
+_DOUBLE = struct.Struct("<d")
+
+
+def _key_bits(key) -> int:
+    # Non-negative doubles order the same as their bit patterns
+    return int.from_bytes(_DOUBLE.pack(key + 0.0), 'little')
+
+
+class HeapQueue:
+    """heapq-backed queue; push and pop go straight to heapq."""
+
+    kind = 'heap'
+
+    def __init__(self):
+        self.heap = []
+        self.push = partial(heapq.heappush, self.heap)
+        self.pop = partial(heapq.heappop, self.heap)
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def entries(self) -> list:
+        """Every queued entry, in an order that re-pushing reproduces the queue from."""
+        return list(self.heap)
+
+
+class DialQueue:
+    """
+    Bucket queue for integer keys within max_cost of the current minimum.
+
+    The bucket being popped is sorted once when it is reached (largest entry
+    first, so entries leave it with list.pop()); the other buckets are plain
+    lists, so a push is an append. Keys outside the window are not detected
+    (they would pop in the wrong order), so only use it with whole-number
+    edge costs <= max_cost.
+
+    Attributes:
+        max_cost (int): Largest key step allowed above the current minimum
+    """
+
+    kind = 'dial'
+
+    def __init__(self, max_cost: int):
+        self.max_cost = int(max_cost)
+        self._span = self.max_cost + 1
+        self._buckets = [[] for _ in range(self._span)]
+        # Key of the bucket being popped (None before the first pop) and,
+        # before the first pop, the lowest key pushed
+        self._current = None
+        self._lowest = None
+        self._size = 0
+
+    def push(self, entry: tuple):
+        """Queue an entry whose first item is its key."""
+        key = int(entry[0])
+        bucket = self._buckets[key % self._span]
+        bucket.append(entry)
+        if key == self._current:
+            # Zero-cost edge into the bucket being popped: restore its order
+            # (one pass over an almost sorted list)
+            bucket.sort(reverse=True)
+        elif self._current is None and (self._lowest is None or key < self._lowest):
+            self._lowest = key
+        self._size += 1
+
+    def pop(self) -> tuple:
+        """Remove and return the smallest entry."""
+        if not self._size:
+            raise IndexError("pop from an empty queue")
+        self._size -= 1
+        buckets, span = self._buckets, self._span
+        current = self._current
+        if current is None:
+            current = self._lowest
+        else:
+            bucket = buckets[current % span]
+            if bucket:
+                return bucket.pop()
+            current += 1
+        while not buckets[current % span]:
+            current += 1
+        self._current = current
+        bucket = buckets[current % span]
+        # Entries in a bucket share the key, so this orders them by the rest
+        bucket.sort(reverse=True)
+        return bucket.pop()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def entries(self) -> list:
+        return [entry for bucket in self._buckets for entry in bucket]
+
+
+class RadixHeap:
+    """Radix heap over non-negative float keys, exact for non-monotone keys too."""
+
+    kind = 'radix'
+
+    def __init__(self):
+        # Bucket 0 holds keys equal to the last popped one, as a heap;
+        # bucket b > 0 holds (bits, entry) pairs whose highest differing bit is b - 1
+        self._buckets = [[] for _ in range(65)]
+        self._last = 0
+        self._below = []
+        self._size = 0
+
+    def push(self, entry: tuple):
+        """Queue an entry whose first item is its (non-negative) key."""
+        bits = _key_bits(entry[0])
+        if bits < self._last:
+            heapq.heappush(self._below, entry)
+        else:
+            bucket = (bits ^ self._last).bit_length()
+            if bucket:
+                self._buckets[bucket].append((bits, entry))
+            else:
+                heapq.heappush(self._buckets[0], entry)
+        self._size += 1
+
+    def pop(self) -> tuple:
+        """Remove and return the smallest entry."""
+        if not self._size:
+            raise IndexError("pop from an empty queue")
+        self._size -= 1
+        if self._below:
+            return heapq.heappop(self._below)
+        buckets = self._buckets
+        if not buckets[0]:
+            # Move the first non-empty bucket down, relative to its minimum
+            index = 1
+            while not buckets[index]:
+                index += 1
+            moving = buckets[index]
+            buckets[index] = []
+            last = min(bits for bits, _ in moving)
+            self._last = last
+            lowest = buckets[0]
+            for bits, entry in moving:
+                bucket = (bits ^ last).bit_length()
+                if bucket:
+                    buckets[bucket].append((bits, entry))
+                else:
+                    lowest.append(entry)
+            heapq.heapify(lowest)
+        return heapq.heappop(buckets[0])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def entries(self) -> list:
+        return (self._below + self._buckets[0]
+                + [entry for bucket in self._buckets[1:] for _, entry in bucket])
+
+
+def make_queue(kind: str, max_cost: int = None):
+    """
+    Create a priority queue by name.
+
+    Args:
+        kind (str): One of QUEUE_KINDS
+        max_cost (int): Largest integer edge cost (required for 'dial')
+
+    Returns:
+        HeapQueue, DialQueue or RadixHeap
+
+    Raises:
+        ValueError: If kind is unknown or 'dial' has no integer max_cost
+    """
+    if kind == 'heap':
+        return HeapQueue()
+    if kind == 'radix':
+        return RadixHeap()
+    if kind == 'dial':
+        if max_cost is None or max_cost is False:
+            raise ValueError("The 'dial' queue needs integer edge costs")
+        return DialQueue(max_cost)
+    raise ValueError(f"Unknown queue '{kind}' (expected one of {', '.join(QUEUE_KINDS)})")
@@ -0,0 +1,234 @@
+"""
+Profiling support for the search CLI (--profile).
+
+Wraps the parse / search / format stages in cProfile and tracemalloc and
+produces three things:
+1. A per-function time table for each stage (self and cumulative time)
+2. The top allocation sites of each stage (tracemalloc, by source line)
+3. A collapsed-stack file ("stage;caller;callee <microseconds>" per line)
+   that flamegraph.pl or speedscope can turn into a flame graph offline
+
+cProfile only records caller -> callee edges, not whole stacks, so the
+collapsed stacks are rebuilt from those edges: each function's self time is
+split between its callers in proportion to the time each caller spent in it.
+This is exact for functions with a single caller and a good approximation
+for the search hot paths.
+
+Usage:
+    profiler = Profiler()
+    with profiler.stage("parse"):
+        graph, node_coords, origin, destinations = parse_input(filename)
+    ...
+    profiler.print_report()
+    profiler.write_collapsed("profile.folded")
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+# Collapsed stacks stop this many frames above the leaf
+MAX_STACK_DEPTH = 48
+
+# Call paths carrying less than this many microseconds are dropped
+MIN_STACK_US = 1
+
+
+def function_label(func: tuple) -> str:
+    """
+    Turn a pstats function key (file, line, name) into a readable label.
+
+    Args:
+        func (tuple): (filename, line_number, function_name) from pstats
+
+    Returns:
+        str: e.g. "search_ucs (search_algorithms.py:120)" or "<built-in method _heapq.heappush>"
+    """
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+class StageProfile:
+    """
+    Measurements collected for one stage.
+
+    Attributes:
+        name (str): Stage name ("parse", "search", ...)
+        wall_ms (float): Wall-clock time of the stage in milliseconds
+        stats (pstats.Stats): cProfile statistics of the stage
+        peak_bytes (int): Peak traced memory reached during the stage
+        allocations (list): tracemalloc StatisticDiff entries, largest first
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_ms = 0.0
+        self.stats = None
+        self.peak_bytes = 0
+        self.allocations = []
+
+
+class Profiler:
+    """
+    Collects CPU and allocation profiles for named stages.
+
+    A disabled profiler turns every stage into a no-op so callers can use
+    the same code path with and without --profile.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Profile the body of the with-block as stage `name`."""
+        if not self.enabled:
+            yield
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            result = StageProfile(name)
+            result.wall_ms = (time.perf_counter() - start) * 1000
+            result.peak_bytes = tracemalloc.get_traced_memory()[1]
+            after = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+
+            # Ignore allocations made by the profiling machinery itself
+            filters = [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ]
+            diffs = after.filter_traces(filters).compare_to(
+                before.filter_traces(filters), 'lineno')
+            result.allocations = [d for d in diffs if d.size_diff > 0]
+            result.stats = pstats.Stats(profile)
+            self.stages.append(result)
+
+    def format_report(self, top: int = 15) -> str:
+        """
+        Format the time table and allocation sites of every stage.
+
+        Args:
+            top (int): Number of functions / allocation sites shown per stage
+
+        Returns:
+            str: Multi-line report
+        """
+        lines = ["=" * 100, "PROFILE", "=" * 100]
+        total_ms = sum(stage.wall_ms for stage in self.stages)
+        for stage in self.stages:
+            share = stage.wall_ms / total_ms * 100 if total_ms else 0.0
+            lines.append("")
+            lines.append(f"[{stage.name}] {stage.wall_ms:.2f} ms ({share:.1f}%), "
+                         f"peak traced memory {stage.peak_bytes / 1024:.1f} KiB")
+            lines.append(f"  {'calls':>10} {'self ms':>10} {'cum ms':>10}  function")
+
+            entries = sorted(stage.stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+            for func, (_, ncalls, tottime, cumtime, _) in entries[:top]:
+                lines.append(f"  {ncalls:>10} {tottime * 1000:>10.3f} {cumtime * 1000:>10.3f}  "
+                             f"{function_label(func)}")
+
+            if stage.allocations:
+                lines.append(f"  {'alloc KiB':>10} {'blocks':>10}  allocation site")
+                for diff in stage.allocations[:top]:
+                    frame = diff.traceback[0]
+                    lines.append(f"  {diff.size_diff / 1024:>10.1f} {diff.count_diff:>10}  "
+                                 f"{os.path.basename(frame.filename)}:{frame.lineno}")
+        lines.append("=" * 100)
+        return "\n".join(lines)
+
+    def print_report(self, stream=None, top: int = 15):
+        """Print format_report() to `stream` (default: stderr)."""
+        print(self.format_report(top), file=stream or sys.stderr)
+
+    def collapsed_stacks(self) -> dict:
+        """
+        Rebuild collapsed call stacks from the caller edges of every stage.
+
+        Returns:
+            dict: "stage;outer;...;inner" -> self time in microseconds
+        """
+        folded = {}
+        for stage in self.stages:
+            raw = stage.stats.stats
+            for func, (_, _, tottime, _, _) in raw.items():
+                self_us = tottime * 1e6
+                if self_us >= MIN_STACK_US:
+                    _fold_callers(raw, func, [function_label(func)], self_us,
+                                  {func}, stage.name, folded)
+        return {stack: int(round(us)) for stack, us in folded.items() if us >= MIN_STACK_US}
+
+    def write_collapsed(self, path: str) -> int:
+        """
+        Write the collapsed stacks to `path`, one "stack count" pair per line.
+
+        Args:
+            path (str): Output file (parent directories are created)
+
+        Returns:
+            int: Number of stack lines written
+        """
+        folded = self.collapsed_stacks()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            for stack in sorted(folded):
+                f.write(f"{stack} {folded[stack]}\n")
+        return len(folded)
+
+
+def _fold_callers(raw: dict, func: tuple, stack: list, weight: float,
+                  on_stack: set, root: str, folded: dict):
+    """
+    Walk from `func` up through its callers, splitting `weight` between them.
+
+    Args:
+        raw (dict): pstats raw table {func: (cc, nc, tt, ct, callers)}
+        func (tuple): Function whose callers are expanded next
+        stack (list): Labels collected so far, innermost first
+        weight (float): Microseconds attributed to this partial stack
+        on_stack (set): Functions already on the stack (recursion guard)
+        root (str): Stage name placed at the bottom of every stack
+        folded (dict): Output accumulator
+    """
+    callers = raw[func][4]
+    # Callers that would recurse are folded into the current frame
+    callers = {caller: edge for caller, edge in callers.items() if caller not in on_stack}
+    total = sum(edge[3] for edge in callers.values())
+
+    if not callers or total <= 0 or len(stack) >= MAX_STACK_DEPTH:
+        key = ";".join([root] + stack[::-1])
+        folded[key] = folded.get(key, 0.0) + weight
+        return
+
+    for caller, edge in callers.items():
+        share = weight * edge[3] / total
+        if share < MIN_STACK_US:
+            continue
+        on_stack.add(caller)
+        stack.append(function_label(caller))
+        _fold_callers(raw, caller, stack, share, on_stack, root, folded)
+        stack.pop()
+        on_stack.discard(caller)
@@ -2,11 +2,19 @@
 Main entry point for the route finding search algorithms.
 
 Usage:
-    python search.py <filename> <method> [--simple]
+    python search.py <filename> <method> [options]
 
 Example:
     python search.py test_cases/test1.txt DFS
     python search.py test_cases/test1.txt BFS --simple
+    python search.py test_cases/test1.txt AS --json
+    python search.py test_cases/test1.txt UCS --reduce
+    python search.py test_cases/test1.txt AS --profile --profile-out profile.folded
+    python search.py big_map.txt UCS --checkpoint run.ckpt
+    python search.py big_map.txt UCS --resume run.ckpt
+    python search.py big_map.txt AS --arc-flags
+    python search.py continent.tiles AS --tile-cache 64
+    python search.py test_cases/test_exponential.txt IDDFS --by-cost
 """
 
 # The flow:
@@ -17,72 +25,318 @@ Example:
 # 5. Gets results back
 # 6. Calls format_output() to print results
 
+import os
 import sys
-from graph_parser import parse_input
+from graph_parser import parse_input, detect_grid
 from search_algorithms import (
     search_dfs,
     search_bfs,
     search_ucs,
     search_gbfs,
     search_astar,
-    search_ida_star
+    search_ida_star,
+    search_iddfs,
+    search_jps,
+    search_sma_star,
+    search_beam,
+    nodes_for_memory_budget
 )
-from utils_2 import format_output, format_output_simple
-
-
-# ==============================================================================
-# NEW HELPER FUNCTION
-# Add this function to calculate the cost of a found path.
-# ==============================================================================
-def calculate_path_cost(graph, path):
-    """Calculate total cost of a path by summing edge costs."""
-    if not path or len(path) < 2:
-        return 0.0
-    
-    total_cost = 0.0
-    for i in range(len(path) - 1):
-        current = path[i]
-        next_node = path[i + 1]
-        
-        if current in graph:
-            for neighbor, cost in graph[current]:
-                if neighbor == next_node:
-                    total_cost += cost
-                    break
-    
-    return total_cost
+from hierarchical_search import search_hpa
+from vectorized_bfs import search_bfs_vectorized
+from portfolio import search_portfolio
+from parallel_astar import search_hda
+from graph_reduction import reduce_graph, expand_path, format_reduction_report
+from exact_heuristic import ExactHeuristic
+from checkpoint import Checkpointer, checkpoint_query, load_checkpoint, DEFAULT_INTERVAL
+from priority_queues import QUEUE_KINDS
+from arc_flags import load_or_build_arc_flags
+from tiled_graph import is_tiled_map, load_tiled_graph, DEFAULT_CACHE_BYTES
+from utils import format_result
+from search_result import encode_json
+from profiling import Profiler
 
 
 # Mapping of method names to search functions
 METHOD_MAP = {
     'DFS': search_dfs,
     'BFS': search_bfs,
+    'VBFS': search_bfs_vectorized,  # Level-at-a-time BFS over CSR arrays (numpy)
     'UCS': search_ucs,
     'CUS1': search_ucs,      # Alternative name for UCS (uninformed)
     'GBFS': search_gbfs,
     'AS': search_astar,
     'ASTAR': search_astar,   # Alternative name for A* 
     'IDASTAR': search_ida_star,
-    'CUS2': search_ida_star  # Alternative name for IDA* based on the assignment (informed)
+    'CUS2': search_ida_star,  # Alternative name for IDA* based on the assignment (informed)
+    'IDDFS': search_iddfs,   # Iterative deepening DFS in O(depth) memory (uninformed)
+    'JPS': search_jps,       # Jump Point Search (uniform-cost grids, falls back to A*)
+    'HPA': search_hpa,       # Hierarchical A* over coordinate clusters
+    'SMASTAR': search_sma_star,  # Memory-bounded A* (--max-nodes / --max-mb)
+    'BEAM': search_beam,     # Width-limited beam search (--beam-width)
+    'PORTFOLIO': search_portfolio,  # Races several methods in worker processes
+    'HDA': search_hda        # One A* query hash-distributed over worker processes
+}
+
+# Optional keyword arguments each method accepts from the command line
+METHOD_OPTIONS = {
+    'DFS': ['dedupe'],
+    'BFS': ['dedupe'],
+    'UCS': ['checkpoint', 'resume', 'queue', 'arc_flags'],
+    'CUS1': ['checkpoint', 'resume', 'queue', 'arc_flags'],
+    'GBFS': ['heuristic', 'max_solutions'],
+    'AS': ['heuristic', 'max_solutions', 'queue', 'arc_flags'],
+    'ASTAR': ['heuristic', 'max_solutions', 'queue', 'arc_flags'],
+    'IDASTAR': ['heuristic', 'checkpoint', 'resume'],
+    'CUS2': ['heuristic', 'checkpoint', 'resume'],
+    'IDDFS': ['max_depth', 'by_cost'],
+    'JPS': ['grid'],
+    'HPA': ['cluster_size', 'cache_dir'],
+    'SMASTAR': ['max_nodes'],
+    'BEAM': ['beam_width'],
+    'PORTFOLIO': ['methods', 'timeout'],
+    'HDA': ['workers'],
+}
+
+# Methods whose result only depends on path cost, so --reduce is safe for them.
+# Contracted chains count as a single hop, which would change what DFS, BFS,
+# GBFS and IDA* explore and what their "fewest hops" answers mean.
+REDUCIBLE_METHODS = {'UCS', 'CUS1', 'AS', 'ASTAR', 'SMASTAR', 'BEAM'}
+
+# Methods that only look up neighbors and coordinates node by node, so they
+# can run on a tiled map (see tiled_graph.py) without loading all of it
+TILED_METHODS = {'DFS', 'BFS', 'UCS', 'CUS1', 'GBFS', 'AS', 'ASTAR', 'IDASTAR', 'CUS2',
+                 'IDDFS', 'SMASTAR', 'BEAM'}
+
+# Command-line flag behind each METHOD_OPTIONS entry, for error messages
+OPTION_FLAGS = {
+    'dedupe': '--dedupe',
+    'max_solutions': '--max-solutions',
+    'max_nodes': '--max-nodes/--max-mb',
+    'beam_width': '--beam-width',
+    'cluster_size': '--cluster-size',
+    'cache_dir': '--cache-dir',
+    'methods': '--methods',
+    'timeout': '--timeout',
+    'checkpoint': '--checkpoint',
+    'resume': '--resume',
+    'queue': '--queue',
+    'arc_flags': '--arc-flags',
+    'workers': '--workers',
+    'max_depth': '--max-depth',
+    'by_cost': '--by-cost',
 }
 
 
 def print_usage():
     """Print usage information."""
-    print("Usage: python search.py <filename> <method> [--simple]")
+    print("Usage: python search.py <filename> <method> [options]")
+    print("       (<filename> may also be a tiled map directory from tiled_graph.py)")
     print("\nAvailable methods:")
     print("  DFS    - Depth-First Search")
     print("  BFS    - Breadth-First Search")
+    print("  VBFS   - Vectorized BFS (whole levels at once over CSR arrays, needs numpy)")
     print("  UCS    - Uniform Cost Search (also: CUS1)")
     print("  GBFS   - Greedy Best-First Search")
     print("  AS     - A* Search (also: ASTAR)")
     print("  IDASTAR    - IDA* Search (also: IDASTAR, CUS2)")
+    print("  IDDFS  - Iterative Deepening DFS (O(depth) memory, no coordinates needed)")
+    print("  JPS    - Jump Point Search (grid maps; other graphs fall back to A*)")
+    print("  HPA    - Hierarchical A* (cluster abstraction, then corridor refinement)")
+    print("  SMASTAR    - Simplified Memory-bounded A* (node cap)")
+    print("  BEAM   - Beam search (width-limited)")
+    print("  PORTFOLIO  - Run several methods in parallel; first proven-optimal answer wins")
+    print("  HDA    - Parallel A* (nodes hash-partitioned over worker processes; best path only)")
     print("\nOptions:")
     print("  --simple  Use simple output format (for assignment submission)")
+    print("  --json    Print the result as one compact JSON line (goal, path, cost, hops, counters, ...)")
+    print("  --reduce  Shrink the graph before searching (prune dead ends, contract chains);")
+    print("            cost-based methods only: UCS, AS, SMASTAR, BEAM")
+    print("  --max-nodes N  Memory cap for SMASTAR in search nodes")
+    print("  --max-mb M     Memory cap for SMASTAR in megabytes")
+    print("  --beam-width W Beam width for BEAM (default: 3)")
+    print("  --exact-h      GBFS/AS/IDASTAR: use exact goal distances (one reverse Dijkstra) as heuristic;")
+    print("                 AS stops at the first goal unless --max-solutions is given")
+    print("  --max-solutions K  GBFS/AS: stop after K goals instead of exploring everything")
+    print("  --cluster-size N  HPA: cluster side length in coordinate units (default: ~n^0.25 per side)")
+    print("  --cache-dir DIR    HPA: keep the cluster abstraction on disk and reuse it across runs")
+    print("  --methods A,B,...  PORTFOLIO: methods to race (default: AS,UCS,GBFS,DFS)")
+    print("  --timeout S        PORTFOLIO: return the best path found after S seconds")
+    print("  --workers N        HDA: worker processes (default: CPU count)")
+    print("  --max-depth N      IDDFS: longest path in edges to try (default: node count - 1)")
+    print("  --by-cost          IDDFS: deepen by path cost (cheapest path) instead of by hops")
+    print(f"  --tile-cache MB    Tiled maps: memory budget for loaded tiles (default: {DEFAULT_CACHE_BYTES >> 20})")
+    print("  --checkpoint FILE  UCS/IDASTAR: save the search state to FILE periodically")
+    print(f"  --checkpoint-every S  Seconds between checkpoints (default: {DEFAULT_INTERVAL:g})")
+    print("  --resume FILE      UCS/IDASTAR: continue from a checkpoint (and keep checkpointing to it)")
+    print("  --queue Q      UCS: heap, dial or radix (default: dial for whole-number costs, else heap);")
+    print("                 AS: heap or radix (default: heap)")
+    print("  --arc-flags [FILE]  UCS/AS: skip edges off every shortest path into the destination regions;")
+    print("                 flags are built once and kept in FILE (default: <filename>.arcflags)")
+    print("  --dedupe       DFS/BFS: skip nodes already generated (smaller frontier, fewer nodes created)")
+    print("  --profile      Print a time/allocation profile of parse, search and format to stderr")
+    print("  --profile-out FILE  Collapsed-stack output for --profile (default: profile.folded)")
     print("\nExamples:")
     print("  python search.py test_cases/test1.txt DFS")
     print("  python search.py test_cases/test1.txt BFS --simple")
     print("  python search.py test_cases/test1.txt IDA")
+    print("  python search.py test_cases/test_sparse.txt UCS --reduce")
+    print("  python search.py test_cases/test_exponential.txt SMASTAR --max-nodes 8")
+
+
+def parse_options(args):
+    """
+    Parse the optional flags that follow <filename> <method>.
+
+    Args:
+        args (list): Remaining command-line arguments
+
+    Returns:
+        dict: Option name -> value
+
+    Raises:
+        ValueError: If an unknown option is given
+    """
+    options = {
+        'simple': False,
+        'json': False,
+        'reduce': False,
+        'max_nodes': None,
+        'beam_width': None,
+        'dedupe': None,
+        'exact_h': False,
+        'heuristic': None,
+        'max_solutions': None,
+        'grid': None,
+        'cluster_size': None,
+        'cache_dir': None,
+        'methods': None,
+        'timeout': None,
+        'workers': None,
+        'max_depth': None,
+        'by_cost': None,
+        'tile_cache': None,
+        'checkpoint': None,
+        'checkpoint_every': None,
+        'resume': None,
+        'queue': None,
+        'arc_flags': None,
+        'profile': False,
+        'profile_out': 'profile.folded',
+    }
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--simple":
+            options['simple'] = True
+        elif arg == "--json":
+            options['json'] = True
+        elif arg == "--reduce":
+            options['reduce'] = True
+        elif arg == "--exact-h":
+            options['exact_h'] = True
+        elif arg == "--dedupe":
+            options['dedupe'] = True
+        elif arg == "--by-cost":
+            options['by_cost'] = True
+        elif arg == "--profile":
+            options['profile'] = True
+        elif arg == "--profile-out":
+            if i + 1 >= len(args):
+                raise ValueError(f"Option '{arg}' needs a value")
+            options['profile_out'] = args[i + 1]
+            options['profile'] = True
+            i += 1
+        elif arg == "--cache-dir":
+            if i + 1 >= len(args):
+                raise ValueError(f"Option '{arg}' needs a value")
+            options['cache_dir'] = args[i + 1]
+            i += 1
+        elif arg in ("--checkpoint", "--resume"):
+            if i + 1 >= len(args):
+                raise ValueError(f"Option '{arg}' needs a value")
+            options[arg[2:]] = args[i + 1]
+            i += 1
+        elif arg == "--queue":
+            if i + 1 >= len(args):
+                raise ValueError(f"Option '{arg}' needs a value")
+            options['queue'] = args[i + 1].lower()
+            if options['queue'] not in QUEUE_KINDS:
+                raise ValueError(f"Invalid value '{args[i + 1]}' for option '{arg}' "
+                                 f"(expected one of {', '.join(QUEUE_KINDS)})")
+            i += 1
+        elif arg == "--arc-flags":
+            # The file is optional; '' stands for <filename>.arcflags
+            options['arc_flags'] = ''
+            if i + 1 < len(args) and not args[i + 1].startswith("--"):
+                options['arc_flags'] = args[i + 1]
+                i += 1
+        elif arg == "--checkpoint-every":
+            if i + 1 >= len(args):
+                raise ValueError(f"Option '{arg}' needs a value")
+            try:
+                options['checkpoint_every'] = float(args[i + 1])
+            except ValueError:
+                raise ValueError(f"Invalid value '{args[i + 1]}' for option '{arg}'")
+            if options['checkpoint_every'] <= 0:
+                raise ValueError(f"Option '{arg}' must be positive")
+            i += 1
+        elif arg == "--methods":
+            if i + 1 >= len(args):
+                raise ValueError(f"Option '{arg}' needs a value")
+            options['methods'] = [name.strip().upper() for name in args[i + 1].split(",") if name.strip()]
+            i += 1
+        elif arg == "--tile-cache":
+            if i + 1 >= len(args):
+                raise ValueError(f"Option '{arg}' needs a value")
+            try:
+                options['tile_cache'] = float(args[i + 1])
+            except ValueError:
+                raise ValueError(f"Invalid value '{args[i + 1]}' for option '{arg}'")
+            if options['tile_cache'] <= 0:
+                raise ValueError(f"Option '{arg}' must be positive")
+            i += 1
+        elif arg == "--timeout":
+            if i + 1 >= len(args):
+                raise ValueError(f"Option '{arg}' needs a value")
+            try:
+                options['timeout'] = float(args[i + 1])
+            except ValueError:
+                raise ValueError(f"Invalid value '{args[i + 1]}' for option '{arg}'")
+            if options['timeout'] <= 0:
+                raise ValueError(f"Option '{arg}' must be positive")
+            i += 1
+        elif arg in ("--max-nodes", "--max-mb", "--beam-width", "--max-solutions", "--cluster-size",
+                     "--workers", "--max-depth"):
+            if i + 1 >= len(args):
+                raise ValueError(f"Option '{arg}' needs a value")
+            value = args[i + 1]
+            i += 1
+            try:
+                if arg == "--max-nodes":
+                    options['max_nodes'] = int(value)
+                elif arg == "--max-mb":
+                    options['max_nodes'] = nodes_for_memory_budget(float(value))
+                elif arg == "--max-solutions":
+                    options['max_solutions'] = int(value)
+                elif arg == "--cluster-size":
+                    options['cluster_size'] = int(value)
+                elif arg == "--workers":
+                    options['workers'] = int(value)
+                elif arg == "--max-depth":
+                    options['max_depth'] = int(value)
+                else:
+                    options['beam_width'] = int(value)
+            except ValueError:
+                raise ValueError(f"Invalid value '{value}' for option '{arg}'")
+            if arg in ("--max-solutions", "--cluster-size", "--beam-width", "--workers",
+                       "--max-depth") and int(value) < 1:
+                raise ValueError(f"Option '{arg}' must be at least 1")
+        else:
+            raise ValueError(f"Unknown option '{arg}'")
+        i += 1
+    if options['simple'] and options['json']:
+        raise ValueError("Options '--simple' and '--json' cannot be combined")
+    return options
 
 
 def main():
@@ -92,8 +346,8 @@ def main():
     Parses command-line arguments, loads the graph from file,
     executes the requested search algorithm, and prints results.
     """
-    # Check command-line arguments (minimum 2, maximum 3)
-    if len(sys.argv) < 3 or len(sys.argv) > 4:
+    # Check command-line arguments (filename and method are required)
+    if len(sys.argv) < 3:
         print("Error: Incorrect number of arguments\n")
         print_usage()
         sys.exit(1)
@@ -101,15 +355,14 @@ def main():
     filename = sys.argv[1]
     method = sys.argv[2].upper()  # Convert to uppercase for case-insensitive matching
     
-    # Check for --simple flag
-    use_simple_output = False
-    if len(sys.argv) == 4:
-        if sys.argv[3] == "--simple":
-            use_simple_output = True
-        else:
-            print(f"Error: Unknown option '{sys.argv[3]}'\n")
-            print_usage()
-            sys.exit(1)
+    # Parse optional flags (--simple, --reduce, --profile, ...)
+    try:
+        options = parse_options(sys.argv[3:])
+    except ValueError as e:
+        print(f"Error: {e}\n")
+        print_usage()
+        sys.exit(1)
+    use_simple_output = options['simple']
     
     # Validate method name
     if method not in METHOD_MAP:
@@ -117,35 +370,152 @@ def main():
         print_usage()
         sys.exit(1)
     
+    # Reduction changes hop counts, so only cost-based methods may use it
+    if options['reduce'] and method not in REDUCIBLE_METHODS:
+        print(f"Error: Option '--reduce' does not apply to method '{method}' "
+              f"(hop counts change on the reduced graph)\n")
+        print_usage()
+        sys.exit(1)
+    
+    # --exact-h only makes sense for methods that take a heuristic
+    if options['exact_h'] and 'heuristic' not in METHOD_OPTIONS.get(method, []):
+        print(f"Error: Option '--exact-h' does not apply to method '{method}'\n")
+        print_usage()
+        sys.exit(1)
+    
+    # Method-specific flags are rejected rather than silently ignored
+    for name, flag in OPTION_FLAGS.items():
+        if options[name] is not None and name not in METHOD_OPTIONS.get(method, []):
+            print(f"Error: Option '{flag}' does not apply to method '{method}'\n")
+            print_usage()
+            sys.exit(1)
+    
+    if options['queue'] == 'dial' and method in ('AS', 'ASTAR'):
+        print("Error: A* cannot use '--queue dial' (f values are not whole numbers)\n")
+        print_usage()
+        sys.exit(1)
+    
+    if options['checkpoint_every'] is not None and options['checkpoint'] is None and options['resume'] is None:
+        print("Error: Option '--checkpoint-every' needs '--checkpoint' or '--resume'\n")
+        print_usage()
+        sys.exit(1)
+    
+    # Flags are built for the whole map, and checkpoints do not record them
+    if options['arc_flags'] is not None:
+        for flag, name in (('--reduce', 'reduce'), ('--checkpoint', 'checkpoint'), ('--resume', 'resume')):
+            if options[name]:
+                print(f"Error: Options '--arc-flags' and '{flag}' cannot be combined\n")
+                print_usage()
+                sys.exit(1)
+    
+    # A tiled map is only paged in where the search goes, so anything that
+    # walks the whole graph is ruled out
+    tiled = is_tiled_map(filename)
+    if tiled:
+        if method not in TILED_METHODS:
+            print(f"Error: Method '{method}' needs the whole graph and cannot run on a tiled map\n")
+            print_usage()
+            sys.exit(1)
+        for flag, name in (('--reduce', 'reduce'), ('--exact-h', 'exact_h'), ('--arc-flags', 'arc_flags'),
+                           ('--checkpoint', 'checkpoint'), ('--resume', 'resume')):
+            if options[name] not in (None, False):
+                print(f"Error: Option '{flag}' cannot be used with a tiled map\n")
+                print_usage()
+                sys.exit(1)
+    elif options['tile_cache'] is not None:
+        print("Error: Option '--tile-cache' needs a tiled map directory\n")
+        print_usage()
+        sys.exit(1)
+    
+    # A disabled profiler makes every stage below a no-op
+    profiler = Profiler(enabled=options['profile'])
+    
     try:
         # Parse the input file to extract graph structure
-        graph, node_coords, origin, destinations = parse_input(filename)
+        with profiler.stage("parse"):
+            if tiled:
+                cache_bytes = (int(options['tile_cache'] * (1 << 20)) if options['tile_cache'] is not None
+                               else DEFAULT_CACHE_BYTES)
+                graph, node_coords, origin, destinations = load_tiled_graph(filename, cache_bytes)
+            else:
+                graph, node_coords, origin, destinations = parse_input(filename)
+            # Grid detection is part of loading the map (False = not a grid)
+            if method == 'JPS':
+                options['grid'] = detect_grid(graph, node_coords) or False
+        
+        # Optionally shrink the graph; searches then run on the reduced graph
+        # and paths are expanded back to original node IDs afterwards
+        reduction_stats = None
+        search_graph, search_coords = graph, node_coords
+        if options['reduce']:
+            with profiler.stage("reduce"):
+                search_graph, search_coords, expansion, reduction_stats = reduce_graph(
+                    graph, node_coords, origin, destinations)
+        
+        # Exact heuristic: one backward Dijkstra from the destinations. With a
+        # perfect heuristic the first goal A* pops is optimal, so A* stops
+        # there unless the user asked for more solutions. GBFS ignores path
+        # cost, so its first goal can be worse and it keeps collecting
+        if options['exact_h']:
+            with profiler.stage("heuristic"):
+                options['heuristic'] = ExactHeuristic(search_graph, destinations)
+            if options['max_solutions'] is None and method in ('AS', 'ASTAR'):
+                options['max_solutions'] = 1
         
-        # Get the appropriate search function
+        # Arc flags are precomputed once per map and reloaded from disk
+        if options['arc_flags'] is not None:
+            with profiler.stage("arc_flags"):
+                options['arc_flags'] = load_or_build_arc_flags(
+                    graph, node_coords, options['arc_flags'] or filename + ".arcflags")
+        
+        # Get the appropriate search function and any options it takes
         search_function = METHOD_MAP[method]
         
-        # Execute the search algorithm and get both paths
-        # NOTE: Your search algorithms must be modified to return a second_path
-        goal, nodes_created, path, second_goal, second_path = search_function(graph, node_coords, origin, destinations)
+        # Checkpoints are tied to this exact query; --resume keeps writing to
+        # the file it resumed from unless --checkpoint names another one
+        checkpoint_path = options['checkpoint'] or options['resume']
+        if checkpoint_path is not None:
+            query = checkpoint_query(search_function, search_graph, search_coords, origin, destinations,
+                                     heuristic='exact' if options['exact_h'] else 'euclidean')
+            if options['resume'] is not None:
+                options['resume'] = load_checkpoint(options['resume'], query)
+            options['checkpoint'] = Checkpointer(checkpoint_path, query,
+                                                 options['checkpoint_every'] or DEFAULT_INTERVAL)
+        search_kwargs = {
+            name: options[name] for name in METHOD_OPTIONS.get(method, [])
+            if options[name] is not None
+        }
+        # UCS would otherwise scan every edge to pick its queue
+        if tiled and search_function is search_ucs:
+            search_kwargs['cost_bound'] = graph.cost_bound
+        
+        # Execute the search algorithm; the result carries goal, paths and costs
+        with profiler.stage("search"):
+            result = search_function(
+                search_graph, search_coords, origin, destinations, **search_kwargs)
+        
+        # A finished search no longer needs its checkpoint
+        if checkpoint_path is not None and not result.stopped_early and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        
+        # Contracted chains keep their summed cost, so only the paths change
+        if options['reduce']:
+            result = result.replace(path=expand_path(result.path, expansion),
+                                    second_path=expand_path(result.second_path, expansion))
         
-        # ========================================================================
-        # MODIFIED SECTION
-        # Calculate costs and update the call to the simple formatter
-        # ========================================================================
-        if use_simple_output:
-            if goal is not None:
-                # Calculate costs for the paths
-                best_cost = calculate_path_cost(graph, path)
-                second_cost = calculate_path_cost(graph, second_path) if second_path else None
-                
-                # Call the updated simple formatter with the new cost information
-                format_output_simple(filename, method, goal, nodes_created, path, second_path, best_cost, second_cost)
+        with profiler.stage("format"):
+            if options['json']:
+                sys.stdout.write(encode_json([result], labels=[f"{filename}:{method}"]))
             else:
-                # Handle the "No solution" case for the simple output
-                format_output_simple(filename, method, None, 0, [], [], 0.0, None)
-        else:
-            # The detailed output format is unchanged for now
-            format_output(filename, method, goal, nodes_created, path, second_goal, second_path)
+                format_result(filename, method, result, simple=use_simple_output)
+                if reduction_stats is not None and not use_simple_output:
+                    print(format_reduction_report(reduction_stats))
+                    print()
+        
+        
+        if profiler.enabled:
+            profiler.print_report()
+            profiler.write_collapsed(options['profile_out'])
         
     except FileNotFoundError as e:
         print("=" * 50)
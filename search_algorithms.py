@@ -1,7 +1,33 @@
 from collections import deque
 import heapq
+import itertools
+import math
+import time
 from search_node import SearchNode
+from search_result import SearchResult
 from utils import euclidean_distance, get_closest_destination_heuristic
+from graph_parser import detect_grid, integral_cost_bound
+from priority_queues import MAX_DIAL_COST, make_queue
+from visited_marks import VisitedMarks
+
+
+# How many loop iterations a search runs between deadline checks
+DEADLINE_CHECK_INTERVAL = 256
+
+
+def _deadline_passed(deadline: float, expansions: int) -> bool:
+    """
+    Cooperative cancellation check used inside the search loops.
+
+    Only reads the clock every DEADLINE_CHECK_INTERVAL expansions so the check
+    stays cheap. deadline is an absolute time.time() value (None = no limit).
+    """
+    return (deadline is not None and expansions % DEADLINE_CHECK_INTERVAL == 0
+            and time.time() >= deadline)
+
+
+class _DeadlineExpired(Exception):
+    """Raised inside recursive searches to unwind once the deadline passes."""
 
 
 def _select_two_best(solutions: list):
@@ -17,24 +43,35 @@ def _select_two_best(solutions: list):
     return (best, second)
 
 
-def _format_two_results(best, second, nodes_created):
+def _format_two_results(best, second, nodes_created, stopped_early=False, counters=None):
     """
     Uniform return format for all search algorithms.
-    Returns: (best_goal, nodes_created, best_path, second_goal, second_path)
+    Returns: SearchResult, which unpacks as
+        (best_goal, nodes_created, best_path, second_goal, second_path)
     """
-    best_goal = best.current_node if best else None
-    best_path = best.path if best else []
-    second_goal = second.current_node if second else None
-    second_path = second.path if second else []
-    return (best_goal, nodes_created, best_path, second_goal, second_path)
+    return SearchResult.from_nodes(best, second, nodes_created, stopped_early, counters)
 
 
 
-def search_dfs(graph: dict, node_coords: dict, origin: int, destinations: list) -> tuple:
+def search_dfs(graph: dict, node_coords: dict, origin: int, destinations: list,
+               deadline: float = None, dedupe: bool = False,
+               visited: VisitedMarks = None) -> tuple:
     """
     Depth-First Search algorithm using GRAPH SEARCH.
     Returns best and second-best solutions found.
     
+    If deadline (an absolute time.time() value) passes, the search stops
+    early and returns the best solutions found so far.
+
+    With dedupe=True a node is skipped as soon as it has been generated once
+    (generation-time duplicate detection), so the frontier never holds more
+    entries than there are nodes and nodes_created drops accordingly. The
+    default (False) keeps the original pop-time check and node counts.
+    
+    visited may be a VisitedMarks reused across queries on the same graph;
+    it is moved to a new epoch instead of being cleared. Without one, plain
+    sets are used, which are faster for a single query.
+    
     Returns:
         tuple: (best_goal, nodes_created, best_path, second_goal, second_path)
     """
@@ -42,10 +79,23 @@ def search_dfs(graph: dict, node_coords: dict, origin: int, destinations: list)
     initial_node = SearchNode(current_node=origin, path=[origin], cost=0, hops=0)
     stack.append(initial_node)
     nodes_created = 1
-    visited = set()
+    if visited is None:
+        visited = set()
+        seen = set()
+    else:
+        visited.new_query()
+        seen = visited.seen
+    if dedupe:
+        seen.add(origin)
     solutions = []
 
+    expansions = 0
+    stopped_early = False
     while stack:
+        expansions += 1
+        if deadline is not None and _deadline_passed(deadline, expansions):
+            stopped_early = True
+            break
         current = stack.pop()
 
         if current.current_node in destinations:
@@ -62,7 +112,11 @@ def search_dfs(graph: dict, node_coords: dict, origin: int, destinations: list)
         neighbor_list.sort(reverse=True, key=lambda x: x[0])
 
         for neighbor_id, edge_cost in neighbor_list:
-            if neighbor_id in visited:
+            if dedupe:
+                if neighbor_id in seen:
+                    continue
+                seen.add(neighbor_id)
+            elif neighbor_id in visited:
                 continue
             
             new_node = SearchNode(
@@ -75,15 +129,30 @@ def search_dfs(graph: dict, node_coords: dict, origin: int, destinations: list)
             stack.append(new_node)
 
     best, second = _select_two_best(solutions)
-    return _format_two_results(best, second, nodes_created)
+    return _format_two_results(best, second, nodes_created, stopped_early,
+                               {'expansions': expansions})
     
 
 
-def search_bfs(graph: dict, node_coords: dict, origin: int, destinations: list) -> tuple:
+def search_bfs(graph: dict, node_coords: dict, origin: int, destinations: list,
+               deadline: float = None, dedupe: bool = False,
+               visited: VisitedMarks = None) -> tuple:
     """
     Breadth-First Search algorithm using GRAPH SEARCH.
     Returns best and second-best solutions found.
     
+    If deadline (an absolute time.time() value) passes, the search stops
+    early and returns the best solutions found so far.
+
+    With dedupe=True a node is skipped as soon as it has been generated once
+    (generation-time duplicate detection), so the frontier never holds more
+    entries than there are nodes and nodes_created drops accordingly. The
+    default (False) keeps the original pop-time check and node counts.
+    
+    visited may be a VisitedMarks reused across queries on the same graph;
+    it is moved to a new epoch instead of being cleared. Without one, plain
+    sets are used, which are faster for a single query.
+    
     Returns:
         tuple: (best_goal, nodes_created, best_path, second_goal, second_path)
     """
@@ -91,10 +160,23 @@ def search_bfs(graph: dict, node_coords: dict, origin: int, destinations: list)
     initial_node = SearchNode(current_node=origin, path=[origin], cost=0, hops=0)
     queue.append(initial_node)
     nodes_created = 1
-    visited = set()
+    if visited is None:
+        visited = set()
+        seen = set()
+    else:
+        visited.new_query()
+        seen = visited.seen
+    if dedupe:
+        seen.add(origin)
     solutions = []
 
+    expansions = 0
+    stopped_early = False
     while queue:
+        expansions += 1
+        if deadline is not None and _deadline_passed(deadline, expansions):
+            stopped_early = True
+            break
         current = queue.popleft()
 
         if current.current_node in destinations:
@@ -111,7 +193,11 @@ def search_bfs(graph: dict, node_coords: dict, origin: int, destinations: list)
         neighbor_list.sort(key=lambda x: x[0])
 
         for neighbor_id, edge_cost in neighbor_list:
-            if neighbor_id in visited:
+            if dedupe:
+                if neighbor_id in seen:
+                    continue
+                seen.add(neighbor_id)
+            elif neighbor_id in visited:
                 continue
 
             new_node = SearchNode(
@@ -124,25 +210,100 @@ def search_bfs(graph: dict, node_coords: dict, origin: int, destinations: list)
             queue.append(new_node)
 
     best, second = _select_two_best(solutions)
-    return _format_two_results(best, second, nodes_created)
+    return _format_two_results(best, second, nodes_created, stopped_early,
+                               {'expansions': expansions})
+
+def _ucs_queue(graph: dict, queue: str, cost_bound):
+    """
+    Create the open list for UCS.
+
+    Args:
+        graph (dict): Graph being searched
+        queue (str): 'heap', 'dial' or 'radix'; None picks 'dial' when every
+            edge cost is a whole number (the radix heap if the largest is
+            above MAX_DIAL_COST) and 'heap' otherwise
+        cost_bound: Result of integral_cost_bound(graph) if already known
+            (False: costs are not integral; None: check now)
+
+    Returns:
+        Queue object from priority_queues
+    """
+    if cost_bound is None and queue in (None, 'dial'):
+        cost_bound = integral_cost_bound(graph)
+    if cost_bound is None:
+        cost_bound = False
+    if queue is None:
+        if cost_bound is False:
+            queue = 'heap'
+        else:
+            queue = 'dial' if cost_bound <= MAX_DIAL_COST else 'radix'
+    return make_queue(queue, cost_bound)
+
 
-def search_ucs(graph: dict, node_coords: dict, origin: int, destinations: list) -> tuple:
+def search_ucs(graph: dict, node_coords: dict, origin: int, destinations: list,
+               deadline: float = None, checkpoint=None, resume: dict = None,
+               queue: str = None, cost_bound=None, arc_flags=None) -> tuple:
     """
     Uniform-Cost Search algorithm using GRAPH SEARCH.
     Returns best and second-best solutions found.
     
+    If deadline (an absolute time.time() value) passes, the search stops
+    early and returns the best solutions found so far.
+    
+    checkpoint (a checkpoint.Checkpointer) periodically saves the open list,
+    closed set, solutions and counters; passing a saved state back as resume
+    continues from there with the same result as an uninterrupted run.
+    
+    The open list is a Dial bucket queue when every edge cost is a whole
+    number (a radix heap if the largest cost is huge) and a binary heap
+    otherwise; queue ('heap', 'dial' or 'radix') overrides the choice and
+    cost_bound passes in a cached integral_cost_bound(graph) (False if the
+    costs are not integral). All queues give the same result.
+    
+    arc_flags (an arc_flags.ArcFlags for this graph) skips every edge that
+    is not on a shortest path into a destination's region: same best path
+    and cost with fewer expansions, but the second-best solution may be
+    missed.
+    
     Returns:
         tuple: (best_goal, nodes_created, best_path, second_goal, second_path)
     """
-    pq = []
-    initial_node = SearchNode(current_node=origin, path=[origin], cost=0, hops=0)
-    heapq.heappush(pq, (initial_node.cost, initial_node))
-    nodes_created = 1
-    visited = set()
-    solutions = []
+    # Entries are (cost, node ID, push number, node): equal costs pop by node
+    # ID, then first generated first, so every queue kind pops the same order
+    sequence = itertools.count()
+    if resume is not None:
+        # The open list was saved in pop order; re-pushing it in that order
+        # renumbers the entries without changing how ties are broken
+        pq = _ucs_queue(graph, queue, cost_bound)
+        for node in resume['open']:
+            pq.push((node.cost, node.current_node, next(sequence), node))
+        nodes_created = resume['nodes_created']
+        visited = resume['closed']
+        solutions = resume['solutions']
+        expansions = resume['expansions']
+    else:
+        pq = _ucs_queue(graph, queue, cost_bound)
+        initial_node = SearchNode(current_node=origin, path=[origin], cost=0, hops=0)
+        pq.push((initial_node.cost, origin, next(sequence), initial_node))
+        nodes_created = 1
+        visited = set()
+        solutions = []
+        expansions = 0
+    push, pop = pq.push, pq.pop
+    if arc_flags is not None:
+        region_mask = arc_flags.mask_for(node_coords, destinations)
 
+    stopped_early = False
     while pq:
-        _, current = heapq.heappop(pq)
+        expansions += 1
+        if deadline is not None and _deadline_passed(deadline, expansions):
+            stopped_early = True
+            break
+        if checkpoint is not None and checkpoint.due(expansions):
+            checkpoint.save({'open': [entry[-1] for entry in sorted(pq.entries())],
+                             'closed': visited, 'solutions': solutions,
+                             'nodes_created': nodes_created, 'expansions': expansions - 1})
+        _, _, _, current = pop()
 
         if current.current_node in destinations:
             solutions.append(current)
@@ -153,7 +314,10 @@ def search_ucs(graph: dict, node_coords: dict, origin: int, destinations: list)
 
         visited.add(current.current_node)
 
-        neighbors = graph.get(current.current_node, [])
+        if arc_flags is None:
+            neighbors = graph.get(current.current_node, [])
+        else:
+            neighbors = arc_flags.neighbors(graph, current.current_node, region_mask)
         neighbor_list = [(neighbor_id, cost) for neighbor_id, cost in neighbors]
         neighbor_list.sort(key=lambda x: x[0])
 
@@ -168,13 +332,16 @@ def search_ucs(graph: dict, node_coords: dict, origin: int, destinations: list)
                 hops=current.hops + 1
             )
             nodes_created += 1
-            heapq.heappush(pq, (new_node.cost, new_node))
+            push((new_node.cost, neighbor_id, next(sequence), new_node))
 
     best, second = _select_two_best(solutions)
-    return _format_two_results(best, second, nodes_created)
+    return _format_two_results(best, second, nodes_created, stopped_early,
+                               {'expansions': expansions})
 
 
-def search_gbfs(graph: dict, node_coords: dict, origin: int, destinations: list) -> tuple:
+def search_gbfs(graph: dict, node_coords: dict, origin: int, destinations: list,
+                deadline: float = None, visited: VisitedMarks = None,
+                heuristic=None, max_solutions: int = None) -> tuple:
     """
     Greedy Best-First Search algorithm using GRAPH SEARCH.
     
@@ -189,6 +356,14 @@ def search_gbfs(graph: dict, node_coords: dict, origin: int, destinations: list)
         node_coords (dict): Coordinates of each node
         origin (int): Starting node ID
         destinations (list): List of goal node IDs
+        deadline (float): Absolute time.time() at which to stop early and
+            return the best solutions found so far (default: no limit)
+        visited (VisitedMarks): Closed-set marks to reuse across queries on
+            the same graph (default: a plain set for this query)
+        heuristic (callable): h(node) to use instead of the Euclidean
+            estimate, e.g. an ExactHeuristic; nodes with h = inf are skipped
+        max_solutions (int): Stop once this many goals were reached
+            (default: explore everything)
         
     Returns:
         tuple: (best_goal, nodes_created, best_path, second_goal, second_path)
@@ -201,20 +376,35 @@ def search_gbfs(graph: dict, node_coords: dict, origin: int, destinations: list)
     # Initialize priority queue (min-heap)
     # Calculate initial heuristic for origin
     # Visited set for GRAPH SEARCH
+    # Default heuristic: Euclidean distance to the closest destination
+    if heuristic is None:
+        def heuristic(node):
+            return get_closest_destination_heuristic(node_coords, node, destinations)
+
     priority_queue = []
     initial_node = SearchNode(current_node=origin, path=[origin], cost=0, hops=0)
-    heuristic = get_closest_destination_heuristic(node_coords, origin, destinations)
-    heapq.heappush(priority_queue, (heuristic, initial_node))
+    heapq.heappush(priority_queue, (heuristic(origin), initial_node))
     nodes_created = 1
-    visited = set()
+    if visited is None:
+        visited = set()
+    else:
+        visited.new_query()
     solutions = []
 
+    expansions = 0
+    stopped_early = False
     while priority_queue:
+        expansions += 1
+        if deadline is not None and _deadline_passed(deadline, expansions):
+            stopped_early = True
+            break
         _, current = heapq.heappop(priority_queue)
 
         # Goal test
         if current.current_node in destinations:
             solutions.append(current)
+            if max_solutions is not None and len(solutions) >= max_solutions:
+                break
             continue  # Keep exploring for more solutions
 
         # Skip if already visited
@@ -232,6 +422,9 @@ def search_gbfs(graph: dict, node_coords: dict, origin: int, destinations: list)
         for neighbor_id, edge_cost in neighbor_list:
             if neighbor_id in visited:
                 continue
+            h = heuristic(neighbor_id)
+            if h == math.inf:
+                continue
 
             new_node = SearchNode(
                 current_node=neighbor_id,
@@ -242,35 +435,75 @@ def search_gbfs(graph: dict, node_coords: dict, origin: int, destinations: list)
 
             # Priority is the heuristic; neighbor_id used to break ties deterministically
             nodes_created += 1
-            h = get_closest_destination_heuristic(node_coords, neighbor_id, destinations)
             heapq.heappush(priority_queue, (h, new_node))
 
     # No solution found
     best, second = _select_two_best(solutions)
-    return _format_two_results(best, second, nodes_created)
+    return _format_two_results(best, second, nodes_created, stopped_early,
+                               {'expansions': expansions})
 
 
-def search_astar(graph: dict, node_coords: dict, origin: int, destinations: list) -> tuple:
+def search_astar(graph: dict, node_coords: dict, origin: int, destinations: list,
+                 deadline: float = None, heuristic=None, max_solutions: int = None,
+                 queue: str = 'heap', arc_flags=None) -> tuple:
     """
     A* Search algorithm using GRAPH SEARCH.
     Returns best and second-best solutions found.
     
+    If deadline (an absolute time.time() value) passes, the search stops
+    early and returns the best solutions found so far.
+    
+    heuristic is an optional callable h(node) replacing the Euclidean
+    estimate (e.g. an ExactHeuristic from exact_heuristic.py). Nodes with
+    h = inf cannot reach a goal and are not generated; ties on f are broken
+    towards smaller h so a perfect heuristic walks straight down one optimal
+    path. max_solutions stops the search once that many goals were popped
+    (default: explore everything to rank all solutions).
+    
+    queue picks the open list: 'heap' (binary heap) or 'radix' (radix heap,
+    see priority_queues.py; same result). A Dial queue does not fit: f
+    includes the heuristic, so the keys are not whole numbers.
+    
+    arc_flags prunes edges exactly as in search_ucs.
+    
     Returns:
         tuple: (best_goal, nodes_created, best_path, second_goal, second_path)
     """
-    priority_queue = []
+    if queue == 'dial':
+        raise ValueError("A* cannot use the 'dial' queue (f values are not whole numbers)")
+    # Only a caller-supplied heuristic changes the order of equal-f nodes
+    prefer_small_h = heuristic is not None
+    # Default heuristic: Euclidean distance to the closest destination
+    if heuristic is None:
+        def heuristic(node):
+            return get_closest_destination_heuristic(node_coords, node, destinations)
+
+    priority_queue = make_queue(queue)
+    push, pop = priority_queue.push, priority_queue.pop
     initial_node = SearchNode(current_node=origin, path=[origin], cost=0, hops=0)
-    heuristic = get_closest_destination_heuristic(node_coords, origin, destinations)
-    heapq.heappush(priority_queue, (initial_node.cost + heuristic, initial_node))
+    h = heuristic(origin)
+    # Entries are (f, tie-break h, node ID, push number, node), as in search_ucs
+    sequence = itertools.count()
+    push((initial_node.cost + h, h if prefer_small_h else 0, origin, next(sequence), initial_node))
     nodes_created = 1
     visited = set()
     solutions = []
+    if arc_flags is not None:
+        region_mask = arc_flags.mask_for(node_coords, destinations)
 
+    expansions = 0
+    stopped_early = False
     while priority_queue:
-        _, current = heapq.heappop(priority_queue)
+        expansions += 1
+        if deadline is not None and _deadline_passed(deadline, expansions):
+            stopped_early = True
+            break
+        current = pop()[-1]
 
         if current.current_node in destinations:
             solutions.append(current)
+            if max_solutions is not None and len(solutions) >= max_solutions:
+                break
             continue
 
         if current.current_node in visited:
@@ -278,13 +511,19 @@ def search_astar(graph: dict, node_coords: dict, origin: int, destinations: list
 
         visited.add(current.current_node)
 
-        neighbors = graph.get(current.current_node, [])
+        if arc_flags is None:
+            neighbors = graph.get(current.current_node, [])
+        else:
+            neighbors = arc_flags.neighbors(graph, current.current_node, region_mask)
         neighbor_list = [(neighbor_id, cost) for neighbor_id, cost in neighbors]
         neighbor_list.sort(key=lambda x: x[0])
 
         for neighbor_id, edge_cost in neighbor_list:
             if neighbor_id in visited:
                 continue
+            h = heuristic(neighbor_id)
+            if h == math.inf:
+                continue
 
             new_node = SearchNode(
                 current_node=neighbor_id,
@@ -293,24 +532,64 @@ def search_astar(graph: dict, node_coords: dict, origin: int, destinations: list
                 hops=current.hops + 1
             )
             nodes_created += 1
-            h = get_closest_destination_heuristic(node_coords, neighbor_id, destinations)
-            heapq.heappush(priority_queue, (new_node.cost + h, new_node))
+            push((new_node.cost + h, h if prefer_small_h else 0, neighbor_id, next(sequence), new_node))
 
     best, second = _select_two_best(solutions)
-    return _format_two_results(best, second, nodes_created)
+    return _format_two_results(best, second, nodes_created, stopped_early,
+                               {'expansions': expansions})
 
 
-def search_ida_star(graph: dict, node_coords: dict, origin: int, destinations: list) -> tuple:
+def search_ida_star(graph: dict, node_coords: dict, origin: int, destinations: list,
+                    deadline: float = None, heuristic=None, checkpoint=None,
+                    resume: dict = None) -> tuple:
     """
     Iterative Deepening A* Search algorithm using TREE SEARCH.
     Returns best and second-best solutions found.
     
+    If deadline (an absolute time.time() value) passes, the search stops
+    early and returns the best solutions found so far.
+    
+    heuristic is an optional callable h(node) replacing the Euclidean
+    estimate, e.g. an ExactHeuristic. With a caller-supplied heuristic the
+    search returns on the first goal it reaches, tries children in
+    ascending h and never generates children with h = inf. With an exact
+    heuristic the first f-limit is already the optimal cost, so this walks
+    straight down one optimal path instead of enumerating every tied one.
+    
+    checkpoint (a checkpoint.Checkpointer) periodically saves the f-limit,
+    iteration, current path and, for each node on it, which child it is
+    exploring; passing a saved state back as resume re-descends that path
+    and continues mid-iteration with the same result as an uninterrupted run.
+    
     Returns:
         tuple: (best_goal, nodes_created, best_path, second_goal, second_path)
+    
+    Raises:
+        ValueError: If resume does not match this graph
     """
-    def ida_search(current_node, f_limit, current_path, current_cost, solutions, nodes_created):
+    # A caller-supplied heuristic switches to first-goal, best-child-first mode
+    first_goal_only = heuristic is not None
+    # Default heuristic: Euclidean distance to the closest destination
+    if heuristic is None:
+        def heuristic(node):
+            return get_closest_destination_heuristic(node_coords, node, destinations)
+
+    # One [child index, smallest pruned f so far] per node on the current path
+    frames = []
+
+    def ida_search(current_node, f_limit, current_path, current_cost, solutions, nodes_created,
+                   resume_frames=None):
+        if deadline is not None and _deadline_passed(deadline, nodes_created[0]):
+            raise _DeadlineExpired()
+        if checkpoint is not None and checkpoint.due(nodes_created[0]):
+            checkpoint.save({'f_limit': f_limit, 'iterations': iterations,
+                             'nodes_created': nodes_created[0], 'solutions': solutions,
+                             'path': current_path,
+                             'frame_index': [frame[0] for frame in frames],
+                             'frame_min_f': [frame[1] for frame in frames]})
+
         # Calculate f(n) = g(n) + h(n)
-        h = get_closest_destination_heuristic(node_coords, current_node, destinations)
+        h = heuristic(current_node)
         f = current_cost + h
         
         # If f exceeds limit, return f as new minimum for next iteration
@@ -333,10 +612,38 @@ def search_ida_star(graph: dict, node_coords: dict, origin: int, destinations: l
         neighbors = graph.get(current_node, [])
         neighbor_list = [(neighbor_id, cost) for neighbor_id, cost in neighbors]
         neighbor_list.sort(key=lambda x: x[0])  # Consistent ordering
+        if first_goal_only:
+            # Most promising child first; children that cannot reach a goal are dropped
+            neighbor_list = [(neighbor_id, cost) for neighbor_id, cost in neighbor_list
+                             if heuristic(neighbor_id) != math.inf]
+            neighbor_list.sort(key=lambda x: heuristic(x[0]))
+
+        # Resuming: skip to the child this node was exploring at the checkpoint
+        depth = len(current_path) - 1
+        start = 0
+        if resume_frames is not None and depth < len(resume_frames['frame_index']):
+            start = resume_frames['frame_index'][depth]
+            min_f = resume_frames['frame_min_f'][depth]
+            if (start >= len(neighbor_list)
+                    or neighbor_list[start][0] != resume_frames['path'][depth + 1]):
+                raise ValueError("Checkpoint does not match this graph")
+        else:
+            resume_frames = None
         
-        for neighbor_id, edge_cost in neighbor_list:
+        # Frames are only needed when checkpoints are taken
+        if checkpoint is not None:
+            frame = [start, min_f]
+            frames.append(frame)
+        for index in range(start, len(neighbor_list)):
+            neighbor_id, edge_cost = neighbor_list[index]
             if neighbor_id not in current_path:  # Tree search - only check path
-                nodes_created[0] += 1
+                # The resumed child was already counted before the checkpoint
+                resumed = resume_frames is not None and index == start
+                if not resumed:
+                    nodes_created[0] += 1
+                if checkpoint is not None:
+                    frame[0] = index
+                    frame[1] = min_f
                 # Recursively search with updated path and cost
                 next_f, _ = ida_search(
                     neighbor_id,
@@ -344,30 +651,787 @@ def search_ida_star(graph: dict, node_coords: dict, origin: int, destinations: l
                     current_path + [neighbor_id],
                     current_cost + edge_cost,
                     solutions,
-                    nodes_created
+                    nodes_created,
+                    resume_frames if resumed else None
                 )
                 min_f = min(min_f, next_f)
+                if first_goal_only and solutions:
+                    break
+        if checkpoint is not None:
+            frames.pop()
                 
         return min_f, nodes_created
 
-    nodes_created = [1]  # Using list to allow modification in nested function
-    solutions = []
-    initial_h = get_closest_destination_heuristic(node_coords, origin, destinations)
-    f_limit = initial_h  # Initial f-limit is just the heuristic
     initial_path = [origin]
+    if resume is not None:
+        nodes_created = [resume['nodes_created']]
+        solutions = resume['solutions']
+        f_limit = resume['f_limit']
+        iterations = resume['iterations'] - 1
+        resume_frames = resume
+        if resume['path'][0] != origin:
+            raise ValueError("Checkpoint does not match this origin")
+    else:
+        nodes_created = [1]  # Using list to allow modification in nested function
+        solutions = []
+        f_limit = heuristic(origin)  # Initial f-limit is just the heuristic
+        iterations = 0
+        resume_frames = None
     
     while True:
-        next_f, _ = ida_search(origin, f_limit, initial_path, 0, solutions, nodes_created)
+        iterations += 1
+        frames.clear()
+        try:
+            next_f, _ = ida_search(origin, f_limit, initial_path, 0, solutions, nodes_created,
+                                   resume_frames)
+        except _DeadlineExpired:
+            best, second = _select_two_best(solutions)
+            return _format_two_results(best, second, nodes_created[0], stopped_early=True,
+                                       counters={'iterations': iterations})
+        resume_frames = None
         
         # No solution exists if we've exhausted all possibilities
         if not solutions and next_f == float('inf'):
-            return None, nodes_created[0], [], None, []
+            return _format_two_results(None, None, nodes_created[0],
+                                       counters={'iterations': iterations})
             
         # If we have solutions, process them
         if solutions:
             best, second = _select_two_best(solutions)
-            return _format_two_results(best, second, nodes_created[0])
+            return _format_two_results(best, second, nodes_created[0],
+                                       counters={'iterations': iterations})
             
         # No solutions found yet at this f-limit, increase bound and continue
         f_limit = next_f
+
+
+def search_iddfs(graph: dict, node_coords: dict, origin: int, destinations: list,
+                 deadline: float = None, max_depth: int = None, by_cost: bool = False) -> tuple:
+    """
+    Iterative Deepening Depth-First Search using TREE SEARCH in O(depth) memory.
+    Returns best and second-best solutions found.
+
+    search_dfs keeps every generated sibling on its stack, each with its own
+    copy of the path, so its memory grows with branching x depth x depth.
+    This search repeats a depth-limited DFS with limits 1, 2, 3, ... and
+    keeps only:
+    - one neighbor iterator per node on the current path (over the graph's
+      own adjacency lists, so neighbors are tried in adjacency order and
+      nothing is copied)
+    - a single path buffer and the path cost at each depth
+    - an on-path bitset indexed by node ID (node IDs are the non-negative
+      integers from parse_input), used for the cycle check
+    Paths are only copied for the two best solutions. Coordinates are never
+    used, so it also serves as an uninformed fallback for maps without
+    usable ones.
+
+    By depth, the first limit that reaches a goal gives the solutions with
+    the fewest hops; best and second-best are the cheapest of those. With
+    by_cost=True the limit is on path cost instead, and each new limit is
+    the smallest cost that exceeded the last one (IDA* with h = 0), so the
+    best solution has the least cost, like search_ucs.
+
+    If deadline (an absolute time.time() value) passes, the search stops
+    early and returns the best solutions found so far.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node (unused)
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        deadline (float): Absolute time.time() at which to stop early
+        max_depth (int): Longest path in edges to try (default: one less
+            than the number of nodes, the longest simple path)
+        by_cost (bool): Deepen by path cost instead of by depth
+
+    Returns:
+        tuple: (best_goal, nodes_created, best_path, second_goal, second_path)
+    """
+    goals = set(destinations)
+    if max_depth is None:
+        max_depth = max(len(graph) - 1, 1)
+    nodes_created = 1
+    expansions = 0
+    iterations = 0
+    deepest = 0
+    if origin in goals:
+        return _format_two_results(SearchNode(current_node=origin, path=[origin], cost=0, hops=0), None,
+                                   nodes_created, counters={'expansions': 0, 'iterations': 0,
+                                                            'deepest': 0})
+
+    # Bit (node & 7) of byte (node >> 3) is set while node is on the path
+    on_path = bytearray((origin >> 3) + 1)
+    limit = 0 if by_cost else 1
+    solutions = []
+    stopped_early = False
+    while True:
+        iterations += 1
+        next_limit = math.inf
+        path = [origin]
+        costs = [0]
+        iterators = [iter(graph.get(origin, ()))]
+        on_path[origin >> 3] |= 1 << (origin & 7)
+        expansions += 1
+
+        while iterators:
+            try:
+                neighbor_id, edge_cost = next(iterators[-1])
+            except StopIteration:
+                # Every child tried: backtrack
+                iterators.pop()
+                node = path.pop()
+                costs.pop()
+                on_path[node >> 3] &= ~(1 << (node & 7))
+                continue
+
+            # Cycle check: skip nodes already on the current path
+            byte = neighbor_id >> 3
+            if byte < len(on_path) and on_path[byte] >> (neighbor_id & 7) & 1:
+                continue
+            cost = costs[-1] + edge_cost
+            depth = len(path)
+            if by_cost and cost > limit:
+                next_limit = min(next_limit, cost)
+                continue
+            nodes_created += 1
+
+            if neighbor_id in goals:
+                solutions.append(SearchNode(current_node=neighbor_id, path=path + [neighbor_id],
+                                            cost=cost, hops=depth))
+                if len(solutions) > 2:
+                    solutions = list(_select_two_best(solutions))
+                continue
+
+            # Depth limit: the node is generated but not expanded
+            if depth >= (max_depth if by_cost else limit):
+                if depth < max_depth and any(
+                        not (n >> 3 < len(on_path) and on_path[n >> 3] >> (n & 7) & 1)
+                        for n, _ in graph.get(neighbor_id, ())):
+                    next_limit = limit + 1
+                continue
+
+            expansions += 1
+            if deadline is not None and _deadline_passed(deadline, expansions):
+                stopped_early = True
+                break
+            if byte >= len(on_path):
+                on_path.extend(bytes(byte + 1 - len(on_path)))
+            on_path[byte] |= 1 << (neighbor_id & 7)
+            path.append(neighbor_id)
+            costs.append(cost)
+            iterators.append(iter(graph.get(neighbor_id, ())))
+            deepest = max(deepest, depth)
+
+        counters = {'expansions': expansions, 'iterations': iterations, 'deepest': deepest}
+        if stopped_early or solutions or next_limit == math.inf:
+            best, second = _select_two_best(solutions)
+            return _format_two_results(best, second, nodes_created, stopped_early, counters)
+        # The on-path bits are all clear again; deepen and repeat
+        limit = next_limit
+
+
+def _jps_heuristic(grid, col: int, row: int, goal_cells: list) -> float:
+    """Octile (8-connected) or Manhattan (4-connected) distance to the nearest goal cell."""
+    best = float('inf')
+    for goal_col, goal_row in goal_cells:
+        dx = abs(goal_col - col)
+        dy = abs(goal_row - row)
+        if grid.connectivity == 8:
+            h = grid.diag_cost * min(dx, dy) + grid.orth_cost * (max(dx, dy) - min(dx, dy))
+        else:
+            h = grid.orth_cost * (dx + dy)
+        if h < best:
+            best = h
+    return best
+
+
+def _jps_jump(grid, col: int, row: int, dx: int, dy: int, goal_cells: set):
+    """
+    Move from (col, row) in direction (dx, dy) until a jump point is found.
+
+    A jump point is a goal cell, a cell with a forced neighbor (an obstacle
+    makes it the only optimal way around a corner), or - for diagonal moves
+    on 8-connected grids and vertical moves on 4-connected grids - a cell from
+    which a straight sub-jump finds a jump point.
+
+    Returns:
+        tuple: (col, row) of the jump point, or None if the ray hits an obstacle
+    """
+    free = grid.is_free
+    while True:
+        col += dx
+        row += dy
+        if not free(col, row):
+            return None
+        if (col, row) in goal_cells:
+            return (col, row)
+
+        if dx and dy:
+            if (_jps_jump(grid, col, row, dx, 0, goal_cells)
+                    or _jps_jump(grid, col, row, 0, dy, goal_cells)):
+                return (col, row)
+            # No corner cutting: the next diagonal step needs both sides open
+            if not (free(col + dx, row) and free(col, row + dy)):
+                return None
+        elif dx:
+            if ((free(col, row - 1) and not free(col - dx, row - 1))
+                    or (free(col, row + 1) and not free(col - dx, row + 1))):
+                return (col, row)
+        else:
+            if ((free(col - 1, row) and not free(col - 1, row - dy))
+                    or (free(col + 1, row) and not free(col + 1, row - dy))):
+                return (col, row)
+            if grid.connectivity == 4:
+                if (_jps_jump(grid, col, row, 1, 0, goal_cells)
+                        or _jps_jump(grid, col, row, -1, 0, goal_cells)):
+                    return (col, row)
+
+
+def _jps_directions(grid, col: int, row: int, parent_cell) -> list:
+    """
+    Pruned set of directions to jump in from (col, row).
+
+    Without a parent (the origin) every legal move is tried. Otherwise only
+    the natural and forced neighbors for the incoming direction are kept.
+    """
+    if parent_cell is None:
+        return [(c - col, r - row) for c, r in grid.free_neighbors(col, row)]
+
+    free = grid.is_free
+    dx = (col > parent_cell[0]) - (col < parent_cell[0])
+    dy = (row > parent_cell[1]) - (row < parent_cell[1])
+    directions = []
+
+    if grid.connectivity == 4:
+        if dx:
+            candidates = [(0, -1), (0, 1), (dx, 0)]
+        else:
+            candidates = [(-1, 0), (1, 0), (0, dy)]
+        return [(ddx, ddy) for ddx, ddy in candidates if free(col + ddx, row + ddy)]
+
+    if dx and dy:
+        vertical_open = free(col, row + dy)
+        horizontal_open = free(col + dx, row)
+        if vertical_open:
+            directions.append((0, dy))
+        if horizontal_open:
+            directions.append((dx, 0))
+        if vertical_open and horizontal_open and free(col + dx, row + dy):
+            directions.append((dx, dy))
+    elif dx:
+        next_open = free(col + dx, row)
+        up_open = free(col, row + 1)
+        down_open = free(col, row - 1)
+        if next_open:
+            directions.append((dx, 0))
+            if up_open and free(col + dx, row + 1):
+                directions.append((dx, 1))
+            if down_open and free(col + dx, row - 1):
+                directions.append((dx, -1))
+        if up_open:
+            directions.append((0, 1))
+        if down_open:
+            directions.append((0, -1))
+    else:
+        next_open = free(col, row + dy)
+        right_open = free(col + 1, row)
+        left_open = free(col - 1, row)
+        if next_open:
+            directions.append((0, dy))
+            if right_open and free(col + 1, row + dy):
+                directions.append((1, dy))
+            if left_open and free(col - 1, row + dy):
+                directions.append((-1, dy))
+        if right_open:
+            directions.append((1, 0))
+        if left_open:
+            directions.append((-1, 0))
+    return directions
+
+
+def _jps_segment_cost(grid, from_cell: tuple, to_cell: tuple) -> float:
+    """Cost of the straight or diagonal segment between two jump points."""
+    dx = abs(to_cell[0] - from_cell[0])
+    dy = abs(to_cell[1] - from_cell[1])
+    diagonal_steps = min(dx, dy)
+    straight_steps = max(dx, dy) - diagonal_steps
+    cost = straight_steps * grid.orth_cost
+    if diagonal_steps:
+        cost += diagonal_steps * grid.diag_cost
+    return cost
+
+
+def _jps_expand_path(grid, jump_path: list, node_coords: dict) -> list:
+    """Fill in the intermediate cells between consecutive jump points."""
+    full_path = [jump_path[0]]
+    for from_node, to_node in zip(jump_path, jump_path[1:]):
+        col, row = grid.cell_of(node_coords[from_node])
+        end_col, end_row = grid.cell_of(node_coords[to_node])
+        dx = (end_col > col) - (end_col < col)
+        dy = (end_row > row) - (end_row < row)
+        while (col, row) != (end_col, end_row):
+            col += dx
+            row += dy
+            full_path.append(grid.cells[(col, row)])
+    return full_path
+
+
+def search_jps(graph: dict, node_coords: dict, origin: int, destinations: list,
+               deadline: float = None, grid=None) -> tuple:
+    """
+    Jump Point Search for uniform-cost grid maps, using GRAPH SEARCH.
+
+    When detect_grid recognizes the input as a 4- or 8-connected uniform-cost
+    grid, A* runs over jump points only: straight and diagonal runs through
+    symmetric open space are skipped in one step, and neighbors come from the
+    bit-packed GridMap instead of the dict adjacency. The cost found is the
+    same optimal cost search_astar finds, with far fewer nodes created.
     
+    Inputs that are not such grids (for example one-way edges) fall back to
+    search_astar unchanged.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        deadline (float): Absolute time.time() at which to give up (default: no limit)
+        grid: GridMap from detect_grid, computed once when the map is loaded.
+            None runs detect_grid here; False means the caller already knows
+            the graph is not a grid.
+
+    Returns:
+        tuple: (best_goal, nodes_created, best_path, second_goal, second_path)
+            JPS stops at the first (optimal) goal, so no second-best path is
+            reported. nodes_created counts jump-point nodes.
+    """
+    if grid is None:
+        grid = detect_grid(graph, node_coords)
+    if not grid or origin not in graph or any(dest not in graph for dest in destinations):
+        return search_astar(graph, node_coords, origin, destinations, deadline=deadline)
+
+    goal_cells = set(grid.cell_of(node_coords[dest]) for dest in destinations)
+    goal_list = sorted(goal_cells)
+
+    priority_queue = []
+    origin_cell = grid.cell_of(node_coords[origin])
+    initial_node = SearchNode(current_node=origin, path=[origin], cost=0, hops=0)
+    heuristic = _jps_heuristic(grid, origin_cell[0], origin_cell[1], goal_list)
+    heapq.heappush(priority_queue, (initial_node.cost + heuristic, initial_node))
+    nodes_created = 1
+    visited = set()
+
+    expansions = 0
+    stopped_early = False
+    while priority_queue:
+        expansions += 1
+        if deadline is not None and _deadline_passed(deadline, expansions):
+            stopped_early = True
+            break
+        _, current = heapq.heappop(priority_queue)
+
+        if current.current_node in destinations:
+            full_path = _jps_expand_path(grid, current.path, node_coords)
+            best = SearchNode(
+                current_node=current.current_node,
+                path=full_path,
+                cost=current.cost,
+                hops=len(full_path) - 1
+            )
+            return _format_two_results(best, None, nodes_created, counters={'expansions': expansions})
+
+        if current.current_node in visited:
+            continue
+
+        visited.add(current.current_node)
+
+        col, row = grid.cell_of(node_coords[current.current_node])
+        parent_cell = None
+        if len(current.path) > 1:
+            parent_cell = grid.cell_of(node_coords[current.path[-2]])
+
+        for dx, dy in _jps_directions(grid, col, row, parent_cell):
+            jump_cell = _jps_jump(grid, col, row, dx, dy, goal_cells)
+            if jump_cell is None:
+                continue
+            neighbor_id = grid.cells[jump_cell]
+            if neighbor_id in visited:
+                continue
+
+            new_node = SearchNode(
+                current_node=neighbor_id,
+                path=current.path + [neighbor_id],
+                cost=current.cost + _jps_segment_cost(grid, (col, row), jump_cell),
+                hops=current.hops + 1
+            )
+            nodes_created += 1
+            h = _jps_heuristic(grid, jump_cell[0], jump_cell[1], goal_list)
+            heapq.heappush(priority_queue, (new_node.cost + h, new_node))
+
+    return _format_two_results(None, None, nodes_created, stopped_early,
+                               {'expansions': expansions})
+
+
+# Rough upper bound on the memory held by one SMA* tree node (the node object,
+# its pending-successor list and its share of the two open-list heaps), as
+# measured with tracemalloc on grid maps. Used to turn a megabyte budget into
+# a node cap.
+SMA_NODE_BYTES = 1536
+
+
+def nodes_for_memory_budget(megabytes: float) -> int:
+    """
+    Convert a memory budget in MB into an SMA* node cap.
+
+    Args:
+        megabytes (float): Memory budget in megabytes
+
+    Returns:
+        int: Maximum number of nodes to keep in memory (at least 2)
+    """
+    return max(2, int(megabytes * 1024 * 1024 // SMA_NODE_BYTES))
+
+
+class _SMANode:
+    """
+    Node of the SMA* search tree.
+
+    Unlike SearchNode, it stores a parent pointer instead of a full path copy,
+    so every node costs the same amount of memory regardless of depth.
+    """
+
+    __slots__ = ('node_id', 'parent', 'g', 'f', 'depth', 'seq', 'version',
+                 'in_open', 'pending', 'children', 'forgotten')
+
+    def __init__(self, node_id: int, parent, g: float, f: float, depth: int, seq: int):
+        self.node_id = node_id
+        self.parent = parent
+        self.g = g
+        self.f = f
+        self.depth = depth
+        self.seq = seq
+        self.version = 0        # Bumped whenever the node's open-list entries go stale
+        self.in_open = False
+        self.pending = None     # Successors not generated yet (filled on first expansion)
+        self.children = []      # Successors currently held in memory
+        self.forgotten = {}     # (neighbor_id, edge_cost) -> backed-up f of dropped children
+
+    def path(self) -> list:
+        """Rebuild the path from the origin by following parent pointers."""
+        path = []
+        node = self
+        while node is not None:
+            path.append(node.node_id)
+            node = node.parent
+        path.reverse()
+        return path
+
+
+def _sma_key(node: _SMANode) -> float:
+    """Lowest f-value of anything this node can still generate."""
+    if node.pending is None or node.pending:
+        return node.f
+    return min(node.forgotten.values(), default=float('inf'))
+
+
+class _SMAOpenList:
+    """
+    Open list for SMA* supporting "best" and "worst leaf" selection.
+
+    Two heaps hold lazily invalidated entries: the best heap orders by
+    (f, deepest first) and the worst heap by (f descending, shallowest first).
+    Whenever a node's key or leaf status changes it is re-pushed with a new
+    version and old entries are skipped on pop. The heaps are rebuilt when
+    stale entries pile up, so their size stays proportional to the node cap.
+    """
+
+    def __init__(self, capacity: int):
+        self.nodes = {}     # Insertion-ordered set of open nodes
+        self.best_heap = []
+        self.worst_heap = []
+        self.compact_at = 2 * capacity + 64
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def push(self, node: _SMANode):
+        """Add a node, or refresh its entries after its key changed."""
+        node.version += 1
+        node.in_open = True
+        self.nodes[node] = None
+        key = _sma_key(node)
+        heapq.heappush(self.best_heap, (key, -node.depth, node.node_id, node.seq, node.version, node))
+        if not node.children:
+            heapq.heappush(self.worst_heap, (-key, node.depth, -node.node_id, -node.seq, node.version, node))
+        if len(self.best_heap) + len(self.worst_heap) > self.compact_at:
+            self._compact()
+
+    def remove(self, node: _SMANode):
+        """Take a node off the open list (its heap entries become stale)."""
+        if node.in_open:
+            node.in_open = False
+            node.version += 1
+            del self.nodes[node]
+
+    def best(self) -> _SMANode:
+        """Open node with the lowest f (deepest on ties), or None."""
+        heap = self.best_heap
+        while heap:
+            node = heap[0][-1]
+            if node.in_open and heap[0][-2] == node.version:
+                return node
+            heapq.heappop(heap)
+        return None
+
+    def worst_leaf(self, root: _SMANode) -> _SMANode:
+        """Open leaf (other than the root) with the highest f (shallowest on ties), or None."""
+        heap = self.worst_heap
+        while heap:
+            node = heap[0][-1]
+            if node.in_open and heap[0][-2] == node.version and not node.children and node is not root:
+                return node
+            # Stale, or no longer a leaf: a fresh entry is pushed when it becomes one again
+            heapq.heappop(heap)
+        return None
+
+    def _compact(self):
+        """Rebuild both heaps from the live open nodes."""
+        self.best_heap = []
+        self.worst_heap = []
+        for node in self.nodes:
+            node.version += 1
+            key = _sma_key(node)
+            self.best_heap.append((key, -node.depth, node.node_id, node.seq, node.version, node))
+            if not node.children:
+                self.worst_heap.append((-key, node.depth, -node.node_id, -node.seq, node.version, node))
+        heapq.heapify(self.best_heap)
+        heapq.heapify(self.worst_heap)
+
+
+def _sma_backup(node: _SMANode):
+    """Propagate the best child f-value up once all of a node's successors exist."""
+    while node is not None and not node.pending and not node.forgotten and node.children:
+        new_f = min(child.f for child in node.children)
+        if new_f == node.f:
+            break
+        node.f = new_f
+        node = node.parent
+
+
+def _sma_drop_dead_end(node: _SMANode, open_list: _SMAOpenList) -> int:
+    """
+    Remove a node that has nothing left to generate and no children.
+
+    Parents left without children or successors are removed as well, since
+    they can no longer lead anywhere either. The root is never removed.
+
+    Returns:
+        int: Number of nodes freed
+    """
+    freed = 0
+    while (node.parent is not None and not node.children
+           and not node.pending and not node.forgotten):
+        parent = node.parent
+        parent.children.remove(node)
+        open_list.remove(node)
+        freed += 1
+        node = parent
+    if node.parent is None and not node.children and not node.pending and not node.forgotten:
+        # The root itself is exhausted: nothing left to search
+        node.f = float('inf')
+        open_list.remove(node)
+    else:
+        _sma_backup(node)
+        if node.in_open:
+            # It may have just become a leaf
+            open_list.push(node)
+    return freed
+
+
+def search_sma_star(graph: dict, node_coords: dict, origin: int, destinations: list,
+                    max_nodes: int = 1000, deadline: float = None) -> tuple:
+    """
+    Simplified Memory-bounded A* (SMA*) using TREE SEARCH.
+
+    Never holds more than max_nodes search nodes. Successors are generated one
+    at a time; when memory is full, the shallowest leaf with the highest f is
+    forgotten and its f-value is backed up into its parent so the subtree can
+    be regenerated later if it becomes promising again. Optimal when the
+    optimal path fits in memory (depth < max_nodes); otherwise returns the
+    best solution reachable within the cap, or none.
+
+    As a tree search it can regenerate the same graph node along many
+    different paths, so it trades a lot of time for its memory guarantee.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        max_nodes (int): Maximum number of nodes held in memory (at least 2)
+        deadline (float): Absolute time.time() at which to give up (default: no limit)
+
+    Returns:
+        tuple: (best_goal, nodes_created, best_path, second_goal, second_path)
+            SMA* stops at the first goal it selects, so there is no second path.
+
+    Raises:
+        ValueError: If max_nodes is smaller than 2
+    """
+    if max_nodes < 2:
+        raise ValueError("SMA* needs room for at least 2 nodes")
+
+    def h(node_id):
+        return get_closest_destination_heuristic(node_coords, node_id, destinations)
+
+    root = _SMANode(origin, None, 0.0, h(origin), 0, 0)
+    open_list = _SMAOpenList(max_nodes)
+    open_list.push(root)
+    nodes_created = 1
+    in_memory = 1
+    forgotten = 0
+    stopped_early = False
+
+    while True:
+        if deadline is not None and _deadline_passed(deadline, nodes_created):
+            stopped_early = True
+            break
+        best = open_list.best()
+        if best is None or _sma_key(best) == float('inf'):
+            break
+
+        if best.node_id in destinations:
+            solution = SearchNode(
+                current_node=best.node_id,
+                path=best.path(),
+                cost=best.g,
+                hops=best.depth
+            )
+            return _format_two_results(solution, None, nodes_created,
+                                       counters={'forgotten': forgotten})
+
+        if best.pending is None:
+            on_path = set(best.path())
+            neighbors = [(n, c) for n, c in graph.get(best.node_id, []) if n not in on_path]
+            neighbors.sort(reverse=True, key=lambda x: x[0])
+            best.pending = neighbors
+
+        # Generate the next fresh successor, or regenerate the best forgotten one
+        if best.pending:
+            neighbor_id, edge_cost = best.pending.pop()
+            g = best.g + edge_cost
+            f = max(best.f, g + h(neighbor_id))
+        elif best.forgotten:
+            neighbor_id, edge_cost = min(best.forgotten, key=lambda k: (best.forgotten[k], k))
+            g = best.g + edge_cost
+            f = max(best.forgotten.pop((neighbor_id, edge_cost)), g + h(neighbor_id))
+        else:
+            # Dead end: drop it (and any ancestors it leaves childless) for good
+            in_memory -= _sma_drop_dead_end(best, open_list)
+            continue
+
+        # A non-goal node at the memory depth limit can never lead to a solution
+        if neighbor_id not in destinations and best.depth + 1 >= max_nodes - 1:
+            f = float('inf')
+
+        child = _SMANode(neighbor_id, best, g, f, best.depth + 1, nodes_created)
+        nodes_created += 1
+        in_memory += 1
+        best.children.append(child)
+        open_list.push(child)
+
+        if not best.pending and not best.forgotten:
+            open_list.remove(best)
+            _sma_backup(best)
+        else:
+            open_list.push(best)
+
+        # Enforce the memory ceiling by forgetting the worst leaves
+        while in_memory > max_nodes:
+            worst = open_list.worst_leaf(root)
+            if worst is None:
+                break
+            parent = worst.parent
+            parent.children.remove(worst)
+            key = (worst.node_id, worst.g - parent.g)
+            parent.forgotten[key] = min(parent.forgotten.get(key, float('inf')), _sma_key(worst))
+            open_list.remove(worst)
+            in_memory -= 1
+            forgotten += 1
+            open_list.push(parent)
+
+    return _format_two_results(None, None, nodes_created, stopped_early,
+                               {'forgotten': forgotten})
+
+
+def search_beam(graph: dict, node_coords: dict, origin: int, destinations: list,
+                beam_width: int = 3, deadline: float = None) -> tuple:
+    """
+    Width-limited beam search using TREE SEARCH.
+
+    Expands the search level by level like BFS, but keeps only the
+    beam_width most promising nodes of each level, ranked by
+    f(n) = g(n) + h(n). No visited set is kept (cycles are avoided by checking
+    the node's own path), so memory is bounded by
+    beam_width * branching factor * depth. Neither complete nor optimal.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        beam_width (int): Number of nodes kept per level (at least 1)
+        deadline (float): Absolute time.time() at which to stop early and
+            return the best solutions found so far (default: no limit)
+
+    Returns:
+        tuple: (best_goal, nodes_created, best_path, second_goal, second_path)
+
+    Raises:
+        ValueError: If beam_width is smaller than 1
+    """
+    if beam_width < 1:
+        raise ValueError("Beam width must be at least 1")
+
+    beam = [SearchNode(current_node=origin, path=[origin], cost=0, hops=0)]
+    nodes_created = 1
+    solutions = []
+    levels = 0
+    stopped_early = False
+
+    while beam:
+        # Each level is a large batch of work, so check the clock every level
+        if deadline is not None and time.time() >= deadline:
+            stopped_early = True
+            break
+        levels += 1
+        candidates = []
+        for current in beam:
+            if current.current_node in destinations:
+                solutions.append(current)
+                continue
+
+            neighbors = graph.get(current.current_node, [])
+            neighbor_list = [(neighbor_id, cost) for neighbor_id, cost in neighbors]
+            neighbor_list.sort(key=lambda x: x[0])
+
+            for neighbor_id, edge_cost in neighbor_list:
+                if neighbor_id in current.path:
+                    continue
+
+                new_node = SearchNode(
+                    current_node=neighbor_id,
+                    path=current.path + [neighbor_id],
+                    cost=current.cost + edge_cost,
+                    hops=current.hops + 1
+                )
+                nodes_created += 1
+                h = get_closest_destination_heuristic(node_coords, neighbor_id, destinations)
+                candidates.append((new_node.cost + h, new_node))
+
+        # Only the two best solutions are ever needed
+        solutions = [node for node in _select_two_best(solutions) if node is not None]
+        beam = [node for _, node in heapq.nsmallest(beam_width, candidates)]
+
+    best, second = _select_two_best(solutions)
+    return _format_two_results(best, second, nodes_created, stopped_early, {'levels': levels})
@@ -0,0 +1,383 @@
+"""
+Search diagnostics: effective branching factor and heuristic accuracy.
+
+It is hard to tell whether the Euclidean heuristic of utils.get_heuristic
+helps or hurts on a given map. test_misleading.txt shows it can actively
+mislead GBFS. This module runs the informed searches on a map's queries
+and reports, per map:
+- effective branching factor b* of every run: the branching factor a
+  uniform tree as deep as the solution would need to hold the nodes the
+  search created (N + 1 = 1 + b* + b*^2 + ... + b*^d). Close to 1 means
+  the search walked straight to the goal.
+- heuristic error against the true cost-to-go from a reverse Dijkstra
+  (exact_heuristic.distances_to_nearest_goal): mean h/h* ratio, mean
+  absolute error and the largest overestimate, for every heuristic type
+  get_heuristic supports
+- admissibility violations (h > h*) and consistency violations
+  (h(u) > c(u, v) + h(v) on an edge). With either, A* and IDA* may return
+  a path that is not the cheapest.
+- IDA* iterations and its re-expansion ratio: nodes IDA* created divided by
+  the nodes A* with the same heuristic created to reach its first goal
+- a recommendation: the candidate search.py command that found the optimal
+  cost on every query while creating the fewest nodes. For --exact-h
+  candidates the nodes settled by the reverse Dijkstra are added, so the
+  comparison holds for one-off queries. With shared destinations, the
+  preprocessing is paid once, so exact-h is cheaper than shown.
+
+Usage:
+    python search_diagnostics.py test_cases/test_misleading.txt
+    python search_diagnostics.py map.txt --queries 20 --time-limit 5 --json report.json
+
+    report = diagnose(graph, node_coords, [(origin, destinations)])
+    print(report['recommendation'])
+"""
+
+import json
+import random
+import time
+
+from exact_heuristic import ExactHeuristic
+from search import METHOD_MAP
+from utils import get_closest_destination_heuristic
+
+
+# Candidate runs as (search.py flags, METHOD_MAP key, exact heuristic, max_solutions).
+# search.py stops --exact-h runs of AS at the first goal, as here; GBFS keeps
+# collecting because its first goal need not be the cheapest.
+CANDIDATES = [
+    ('UCS', 'UCS', False, None),
+    ('GBFS', 'GBFS', False, None),
+    ('GBFS --exact-h', 'GBFS', True, None),
+    ('AS', 'AS', False, None),
+    ('AS --max-solutions 1', 'AS', False, 1),
+    ('AS --exact-h', 'AS', True, 1),
+    ('IDASTAR', 'IDASTAR', False, None),
+    ('IDASTAR --exact-h', 'IDASTAR', True, None),
+]
+
+# Heuristic types of utils.get_heuristic whose accuracy is measured
+HEURISTIC_TYPES = ('euclidean', 'hop_estimate')
+
+# Slack for floating-point sums when comparing costs and heuristic values
+TOLERANCE = 1e-6
+
+# Seconds each run may take before it is cut off and ruled out
+DEFAULT_TIME_LIMIT = 10.0
+
+
+def effective_branching_factor(nodes_created: int, depth: int) -> float:
+    """
+    Solve nodes_created = 1 + b + b^2 + ... + b^depth for b by bisection.
+
+    Args:
+        nodes_created (int): Nodes the search created, root included
+        depth (int): Edges on the solution path
+
+    Returns:
+        float: b* (None when depth is 0 or unknown)
+    """
+    if not depth:
+        return None
+
+    def tree_size(b):
+        return depth + 1 if b == 1 else (b ** (depth + 1) - 1) / (b - 1)
+
+    low, high = 1.0, max(2.0, float(nodes_created))
+    if tree_size(low) >= nodes_created:
+        return 1.0
+    for _ in range(100):
+        middle = (low + high) / 2
+        if tree_size(middle) < nodes_created:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def heuristic_accuracy(graph: dict, node_coords: dict, destinations: list, distances: dict,
+                       heuristic_type: str = 'euclidean') -> dict:
+    """
+    Compare a get_heuristic type with the true distances to the nearest goal.
+
+    Only nodes that can reach a destination (and have coordinates) are
+    measured; edges are checked for consistency when both ends are.
+
+    Args:
+        graph (dict): Adjacency list
+        node_coords (dict): Node coordinates
+        destinations (list): List of goal node IDs
+        distances (dict): node_id -> true cost to the nearest goal, from
+            distances_to_nearest_goal
+        heuristic_type (str): Type passed to get_heuristic
+
+    Returns:
+        dict: nodes, mean_ratio (mean h/h* where h* > 0), mean_abs_error,
+            admissibility_violations, max_overestimate, edges,
+            consistency_violations, max_inconsistency
+    """
+    h = {node: get_closest_destination_heuristic(node_coords, node, destinations, heuristic_type)
+         for node in distances if node in node_coords}
+    ratios = [h[node] / distances[node] for node in h if distances[node] > 0]
+    overestimates = [h[node] - distances[node] for node in h if h[node] > distances[node] + TOLERANCE]
+
+    edges = 0
+    inconsistencies = []
+    for node, h_node in h.items():
+        for neighbor, cost in graph.get(node, []):
+            if neighbor not in h:
+                continue
+            edges += 1
+            gap = h_node - cost - h[neighbor]
+            if gap > TOLERANCE:
+                inconsistencies.append(gap)
+
+    return {
+        'nodes': len(h),
+        'mean_ratio': sum(ratios) / len(ratios) if ratios else None,
+        'mean_abs_error': sum(abs(h[node] - distances[node]) for node in h) / len(h) if h else None,
+        'admissibility_violations': len(overestimates),
+        'max_overestimate': max(overestimates, default=0.0),
+        'edges': edges,
+        'consistency_violations': len(inconsistencies),
+        'max_inconsistency': max(inconsistencies, default=0.0),
+    }
+
+
+def _run_candidate(graph: dict, node_coords: dict, origin: int, destinations: list,
+                   method: str, heuristic, max_solutions: int, time_limit: float) -> tuple:
+    kwargs = {'deadline': time.time() + time_limit}
+    if heuristic is not None:
+        kwargs['heuristic'] = heuristic
+    if max_solutions is not None:
+        kwargs['max_solutions'] = max_solutions
+    start = time.perf_counter()
+    result = METHOD_MAP[method](graph, node_coords, origin, destinations, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def diagnose_query(graph: dict, node_coords: dict, origin: int, destinations: list,
+                   time_limit: float = DEFAULT_TIME_LIMIT) -> dict:
+    """
+    Run every candidate and measure the heuristics on one query.
+
+    Args:
+        graph (dict): Adjacency list
+        node_coords (dict): Node coordinates
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        time_limit (float): Seconds allowed per run
+
+    Returns:
+        dict: origin, destinations, optimal_cost (None if unreachable),
+            heuristics (type -> heuristic_accuracy), preprocessing (nodes
+            and seconds of the reverse Dijkstra) and runs (flags -> cost,
+            hops, nodes_created, seconds, branching_factor, optimal,
+            timed_out, plus iterations for IDA*)
+    """
+    start = time.perf_counter()
+    exact = ExactHeuristic(graph, destinations)
+    preprocessing = {'nodes': len(exact.distances), 'seconds': time.perf_counter() - start}
+    optimal_cost = exact.distances.get(origin)
+
+    report = {
+        'origin': origin, 'destinations': list(destinations), 'optimal_cost': optimal_cost,
+        'heuristics': {heuristic_type: heuristic_accuracy(graph, node_coords, destinations,
+                                                          exact.distances, heuristic_type)
+                       for heuristic_type in HEURISTIC_TYPES},
+        'preprocessing': preprocessing, 'runs': {},
+    }
+    for flags, method, use_exact, max_solutions in CANDIDATES:
+        result, seconds = _run_candidate(graph, node_coords, origin, destinations, method,
+                                         exact if use_exact else None, max_solutions, time_limit)
+        optimal = (result.goal is None if optimal_cost is None
+                   else result.cost is not None and result.cost <= optimal_cost + TOLERANCE)
+        run = {
+            'cost': result.cost, 'hops': result.hops, 'nodes_created': result.nodes_created,
+            'seconds': seconds,
+            'branching_factor': effective_branching_factor(result.nodes_created, result.hops),
+            'optimal': optimal and not result.stopped_early, 'timed_out': result.stopped_early,
+        }
+        if 'iterations' in result.counters:
+            run['iterations'] = result.counters['iterations']
+        report['runs'][flags] = run
+    return report
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else None
+
+
+def summarize_queries(queries: list) -> dict:
+    """
+    Combine diagnose_query reports for one map and pick a recommendation.
+
+    Returns:
+        dict: queries, heuristics (violations summed, ratios averaged over
+            nodes), runs (per candidate: total nodes and seconds, queries
+            solved optimally, mean branching factor), ida_star (mean
+            iterations and re-expansion ratio per heuristic) and
+            recommendation (flags, total nodes and a one-line reason)
+    """
+    heuristics = {}
+    for heuristic_type in HEURISTIC_TYPES:
+        stats = [query['heuristics'][heuristic_type] for query in queries]
+        nodes = sum(stat['nodes'] for stat in stats)
+        heuristics[heuristic_type] = {
+            'nodes': nodes,
+            'mean_ratio': _ratio(sum((stat['mean_ratio'] or 0) * stat['nodes'] for stat in stats), nodes),
+            'mean_abs_error': _ratio(sum((stat['mean_abs_error'] or 0) * stat['nodes'] for stat in stats),
+                                     nodes),
+            'admissibility_violations': sum(stat['admissibility_violations'] for stat in stats),
+            'max_overestimate': max(stat['max_overestimate'] for stat in stats),
+            'edges': sum(stat['edges'] for stat in stats),
+            'consistency_violations': sum(stat['consistency_violations'] for stat in stats),
+            'max_inconsistency': max(stat['max_inconsistency'] for stat in stats),
+        }
+
+    runs = {}
+    preprocessing_nodes = sum(query['preprocessing']['nodes'] for query in queries)
+    for flags, _, use_exact, _ in CANDIDATES:
+        per_query = [query['runs'][flags] for query in queries]
+        factors = [run['branching_factor'] for run in per_query if run['branching_factor'] is not None]
+        runs[flags] = {
+            'nodes_created': sum(run['nodes_created'] for run in per_query),
+            'charged_nodes': (sum(run['nodes_created'] for run in per_query)
+                              + (preprocessing_nodes if use_exact else 0)),
+            'seconds': sum(run['seconds'] for run in per_query),
+            'optimal': sum(run['optimal'] for run in per_query),
+            'timed_out': sum(run['timed_out'] for run in per_query),
+            'branching_factor': _ratio(sum(factors), len(factors)),
+        }
+
+    # IDA* against A* stopping at its first goal with the same heuristic
+    ida_star = {}
+    for ida_flags, astar_flags in (('IDASTAR', 'AS --max-solutions 1'), ('IDASTAR --exact-h', 'AS --exact-h')):
+        iterations = [query['runs'][ida_flags]['iterations'] for query in queries]
+        ida_star[ida_flags] = {
+            'mean_iterations': sum(iterations) / len(iterations),
+            're_expansion_ratio': _ratio(runs[ida_flags]['nodes_created'], runs[astar_flags]['nodes_created']),
+        }
+
+    return {'queries': len(queries), 'heuristics': heuristics, 'runs': runs,
+            'ida_star': ida_star, 'recommendation': _recommend(runs, heuristics['euclidean'], len(queries))}
+
+
+def _recommend(runs: dict, euclidean: dict, query_count: int) -> dict:
+    """Cheapest candidate that was optimal on every query, with a reason."""
+    optimal = [flags for flags in runs if runs[flags]['optimal'] == query_count]
+    if not optimal:
+        return {'flags': None, 'charged_nodes': None,
+                'reason': "no candidate found the optimal cost on every query within the time limit"}
+    # Ties go to the simpler candidate (CANDIDATES order), not to timing noise
+    flags = min(optimal, key=lambda flags: runs[flags]['charged_nodes'])
+
+    if flags == 'UCS':
+        reason = "the Euclidean heuristic saved no work over blind search on this map"
+    elif 'exact-h' in flags:
+        reason = "exact goal distances beat the Euclidean estimate even counting the reverse Dijkstra"
+    else:
+        reason = "the Euclidean heuristic is cheapest and stayed optimal on these queries"
+    if euclidean['admissibility_violations'] and 'exact-h' not in flags and flags != 'UCS':
+        reason += (f"; but the Euclidean estimate overestimates at {euclidean['admissibility_violations']}"
+                   f" of {euclidean['nodes']} nodes, so other queries may get a more expensive path")
+    elif euclidean['consistency_violations'] and flags.startswith('AS') and 'exact-h' not in flags:
+        reason += (f"; it is inconsistent on {euclidean['consistency_violations']} of {euclidean['edges']} edges,"
+                   " so A* graph search may close a node before its cheapest path")
+
+    # Point out a cheaper non-optimal run (usually GBFS) and what it costs
+    cheaper = [other for other in runs if runs[other]['charged_nodes'] < runs[flags]['charged_nodes']
+               and runs[other]['optimal'] < query_count and not runs[other]['timed_out']]
+    if cheaper:
+        other = min(cheaper, key=lambda other: runs[other]['charged_nodes'])
+        reason += (f"; {other} creates fewer nodes but was optimal on only "
+                   f"{runs[other]['optimal']} of {query_count} queries")
+    return {'flags': flags, 'charged_nodes': runs[flags]['charged_nodes'], 'reason': reason}
+
+
+def diagnose(graph: dict, node_coords: dict, queries: list, time_limit: float = DEFAULT_TIME_LIMIT) -> dict:
+    """
+    Diagnose a map on a list of (origin, destinations) queries.
+
+    Args:
+        graph (dict): Adjacency list
+        node_coords (dict): Node coordinates
+        queries (list): (origin, destinations) pairs
+        time_limit (float): Seconds allowed per run
+
+    Returns:
+        dict: summarize_queries output plus 'per_query' (diagnose_query reports)
+    """
+    per_query = [diagnose_query(graph, node_coords, origin, destinations, time_limit)
+                 for origin, destinations in queries]
+    report = summarize_queries(per_query)
+    report['per_query'] = per_query
+    return report
+
+
+def print_report(filename: str, report: dict):
+    """Print a diagnose report as tables."""
+    def number(value, digits=2):
+        return "-" if value is None else f"{value:.{digits}f}"
+
+    def gap(value):
+        # Small violations (an edge a little cheaper than its length) stay visible
+        return f"{value:.3g}"
+
+    print(f"{filename}: {report['queries']} queries")
+    print(f"\n{'Heuristic':<13} | {'h/h*':<5} | {'Mean err':<8} | {'Overest.':<8} | {'Max over':<8} | "
+          f"{'Inconsist.':<10} | {'Max gap':<7}")
+    print("-" * 78)
+    for heuristic_type, stats in report['heuristics'].items():
+        print(f"{heuristic_type:<13} | {number(stats['mean_ratio']):<5} | {number(stats['mean_abs_error']):<8} | "
+              f"{stats['admissibility_violations']:<8} | {gap(stats['max_overestimate']):<8} | "
+              f"{stats['consistency_violations']:<10} | {gap(stats['max_inconsistency']):<7}")
+
+    print(f"\n{'Run':<21} | {'Nodes':<8} | {'Charged':<8} | {'Seconds':<7} | {'b*':<5} | {'Optimal':<7}")
+    print("-" * 70)
+    for flags, run in report['runs'].items():
+        optimal = f"{run['optimal']}/{report['queries']}" + ("*" if run['timed_out'] else "")
+        print(f"{flags:<21} | {run['nodes_created']:<8} | {run['charged_nodes']:<8} | "
+              f"{run['seconds']:<7.3f} | {number(run['branching_factor']):<5} | {optimal:<7}")
+    if any(run['timed_out'] for run in report['runs'].values()):
+        print("* some runs hit the time limit")
+
+    for flags, stats in report['ida_star'].items():
+        print(f"\n{flags}: {stats['mean_iterations']:.1f} iterations per query, "
+              f"re-expansion ratio {number(stats['re_expansion_ratio'])} (nodes vs A* to first goal)", end="")
+    print()
+
+    recommendation = report['recommendation']
+    print(f"\nRecommendation: {recommendation['flags'] or 'none'}")
+    print(f"  {recommendation['reason']}")
+
+
+def main():
+    """Command-line entry point: diagnose one map."""
+    import argparse
+    from graph_parser import parse_input
+
+    parser = argparse.ArgumentParser(description="Branching factor and heuristic accuracy report")
+    parser.add_argument("filename", help="Graph file in the assignment format")
+    parser.add_argument("--queries", type=int, default=0,
+                        help="Random origin/destination pairs to add to the file's own query")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the extra queries")
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT,
+                        help="Seconds per run before it is ruled out (default: %(default)s)")
+    parser.add_argument("--json", metavar="FILE", help="Also write the full report as JSON")
+    args = parser.parse_args()
+
+    graph, node_coords, origin, destinations = parse_input(args.filename)
+    queries = [(origin, destinations)]
+    rng = random.Random(args.seed)
+    nodes = sorted(graph)
+    queries += [(rng.choice(nodes), [rng.choice(nodes)]) for _ in range(args.queries)]
+
+    report = diagnose(graph, node_coords, queries, args.time_limit)
+    print_report(args.filename, report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Result object returned by every search method.
+
+SearchResult carries what a caller needs from one query: the goal, path,
+cost and hop count of the best and second-best solutions, nodes_created,
+whether the deadline cut the search short, and the search's own
+instrumentation counters (e.g. expansions). The costs are the g-values the
+search already tracked, so nothing downstream has to walk the path again
+to price it.
+
+It is still a tuple and unpacks exactly like the original 5-tuple
+(best_goal, nodes_created, best_path, second_goal, second_path), so older
+callers need no changes.
+
+For bulk output (the test runner, benchmarks) results serialize to:
+- JSON Lines: one compact object per result (encode_json / decode_json)
+- a compact binary form: fixed-size record headers followed by the paths as
+  int64 arrays (encode_binary / decode_binary), about 8 bytes per path node
+
+Usage:
+    result = search_astar(graph, node_coords, origin, destinations)
+    result.goal, result.cost, result.hops, result.counters['expansions']
+
+    data = encode_binary(results, labels=["test_linear.txt:AS", ...])
+    results, labels = decode_binary(data)
+"""
+
+import json
+import struct
+import sys
+from array import array
+
+
+class SearchResult(tuple):
+    """
+    Outcome of one search query.
+
+    Attributes:
+        goal (int): Destination reached by the best path (None = no solution)
+        path (list): Best path from origin to goal ([] if none)
+        cost (float): Total edge cost of path (None if no solution)
+        hops (int): Edges on path (None if no solution)
+        nodes_created (int): Search nodes created
+        second_goal (int): Destination of the second-best path (None if none)
+        second_path (list): Second-best path ([] if none)
+        second_cost (float): Total edge cost of second_path (None if none)
+        second_hops (int): Edges on second_path (None if none)
+        stopped_early (bool): True if the search returned because its
+            deadline passed, so the result may be partial
+        counters (dict): Instrumentation counters (name -> int), e.g.
+            'expansions' for the frontier-based searches
+    """
+
+    def __new__(cls, goal: int = None, path: list = None, cost: float = None,
+                nodes_created: int = 0, second_goal: int = None, second_path: list = None,
+                second_cost: float = None, stopped_early: bool = False, counters: dict = None):
+        path = path if path is not None else []
+        second_path = second_path if second_path is not None else []
+        result = super().__new__(cls, (goal, nodes_created, path, second_goal, second_path))
+        result.cost = cost
+        result.second_cost = second_cost
+        result.stopped_early = stopped_early
+        result.counters = counters if counters is not None else {}
+        return result
+
+    @classmethod
+    def from_nodes(cls, best, second, nodes_created: int, stopped_early: bool = False,
+                   counters: dict = None) -> 'SearchResult':
+        """
+        Build a result from the best and second-best SearchNode (either may be None).
+
+        Args:
+            best (SearchNode): Best solution node
+            second (SearchNode): Second-best solution node
+            nodes_created (int): Search nodes created
+            stopped_early (bool): True if the deadline cut the search short
+            counters (dict): Instrumentation counters
+
+        Returns:
+            SearchResult: The result, priced with the nodes' g-values
+        """
+        return cls(best.current_node if best else None, best.path if best else [],
+                   best.cost if best else None, nodes_created,
+                   second.current_node if second else None, second.path if second else [],
+                   second.cost if second else None, stopped_early, counters)
+
+    @property
+    def goal(self) -> int:
+        return self[0]
+
+    @property
+    def nodes_created(self) -> int:
+        return self[1]
+
+    @property
+    def path(self) -> list:
+        return self[2]
+
+    @property
+    def second_goal(self) -> int:
+        return self[3]
+
+    @property
+    def second_path(self) -> list:
+        return self[4]
+
+    @property
+    def hops(self) -> int:
+        return len(self[2]) - 1 if self[2] else None
+
+    @property
+    def second_hops(self) -> int:
+        return len(self[4]) - 1 if self[4] else None
+
+    def replace(self, **changes) -> 'SearchResult':
+        """
+        Copy of this result with some fields changed.
+
+        Args:
+            **changes: New values for any __new__ argument
+
+        Returns:
+            SearchResult: The copy
+        """
+        fields = self.to_dict()
+        del fields['hops']
+        fields.update(changes)
+        return SearchResult(**fields)
+
+    def to_dict(self) -> dict:
+        """Plain dict of every field (hops included), ready for json.dumps."""
+        return {
+            'goal': self.goal, 'path': list(self.path), 'cost': self.cost, 'hops': self.hops,
+            'nodes_created': self.nodes_created,
+            'second_goal': self.second_goal, 'second_path': list(self.second_path),
+            'second_cost': self.second_cost,
+            'stopped_early': self.stopped_early, 'counters': dict(self.counters),
+        }
+
+    @classmethod
+    def from_dict(cls, fields: dict) -> 'SearchResult':
+        """Inverse of to_dict (derived fields such as hops are ignored)."""
+        return cls(fields.get('goal'), fields.get('path'), fields.get('cost'),
+                   fields.get('nodes_created', 0), fields.get('second_goal'),
+                   fields.get('second_path'), fields.get('second_cost'),
+                   fields.get('stopped_early', False), fields.get('counters'))
+
+    def __reduce__(self):
+        # Pickle by field, not as a bare tuple (worker processes send results back)
+        return (SearchResult, (self.goal, self.path, self.cost, self.nodes_created,
+                               self.second_goal, self.second_path, self.second_cost,
+                               self.stopped_early, self.counters))
+
+    def __repr__(self):
+        return (f"SearchResult(goal={self.goal}, cost={self.cost}, hops={self.hops}, "
+                f"nodes_created={self.nodes_created}, second_goal={self.second_goal}, "
+                f"second_cost={self.second_cost}, stopped_early={self.stopped_early}, "
+                f"counters={self.counters})")
+
+
+def encode_json(results: list, labels: list = None) -> str:
+    """
+    Serialize results as JSON Lines, one compact object per result.
+
+    Args:
+        results (list): SearchResult objects
+        labels (list): Optional string per result (e.g. "file:method"),
+            stored under "label"
+
+    Returns:
+        str: The JSON Lines text (newline-terminated)
+    """
+    lines = []
+    for i, result in enumerate(results):
+        fields = result.to_dict()
+        if labels is not None:
+            fields['label'] = labels[i]
+        lines.append(json.dumps(fields, separators=(',', ':')))
+    return "".join(line + "\n" for line in lines)
+
+
+def decode_json(text: str) -> tuple:
+    """
+    Parse encode_json output.
+
+    Args:
+        text (str): JSON Lines text
+
+    Returns:
+        tuple: (results, labels); labels is None if no line had one
+    """
+    results, labels = [], []
+    for line in text.splitlines():
+        if line.strip():
+            fields = json.loads(line)
+            labels.append(fields.get('label'))
+            results.append(SearchResult.from_dict(fields))
+    return results, (labels if any(label is not None for label in labels) else None)
+
+
+# Binary layout (little-endian):
+#   file header:   magic b"SRES", format version (u16), result count (u32)
+#   record header: flags (u8), goal, second_goal, nodes_created (i64),
+#                  cost, second_cost (f64), path and second_path lengths (u32),
+#                  counter count (u16), label length in bytes (u16)
+#   then: both paths as i64 arrays, each counter as name length (u8) + UTF-8
+#         name + value (i64), and the UTF-8 label
+BINARY_MAGIC = b"SRES"
+BINARY_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sHI")
+_RECORD_HEADER = struct.Struct("<BqqqddIIHH")
+_COUNTER_VALUE = struct.Struct("<q")
+
+# Record flags: which optional fields are present
+_HAS_GOAL, _HAS_SECOND, _STOPPED_EARLY, _HAS_COST, _HAS_SECOND_COST = 1, 2, 4, 8, 16
+
+
+def _int64_bytes(values: list) -> bytes:
+    packed = array('q', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def encode_binary(results: list, labels: list = None) -> bytes:
+    """
+    Serialize results compactly; node IDs must be integers.
+
+    Args:
+        results (list): SearchResult objects (counter values must be integers)
+        labels (list): Optional string per result
+
+    Returns:
+        bytes: The encoded results
+    """
+    chunks = [_FILE_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(results))]
+    for i, result in enumerate(results):
+        flags = ((_HAS_GOAL if result.goal is not None else 0)
+                 | (_HAS_SECOND if result.second_goal is not None else 0)
+                 | (_STOPPED_EARLY if result.stopped_early else 0)
+                 | (_HAS_COST if result.cost is not None else 0)
+                 | (_HAS_SECOND_COST if result.second_cost is not None else 0))
+        label = labels[i].encode() if labels is not None else b""
+        chunks.append(_RECORD_HEADER.pack(
+            flags, result.goal or 0, result.second_goal or 0, result.nodes_created,
+            result.cost or 0.0, result.second_cost or 0.0,
+            len(result.path), len(result.second_path), len(result.counters), len(label)))
+        chunks.append(_int64_bytes(list(result.path) + list(result.second_path)))
+        for name, value in result.counters.items():
+            name_bytes = name.encode()
+            chunks.append(bytes([len(name_bytes)]) + name_bytes + _COUNTER_VALUE.pack(value))
+        chunks.append(label)
+    return b"".join(chunks)
+
+
+def decode_binary(data: bytes) -> tuple:
+    """
+    Parse encode_binary output.
+
+    Args:
+        data (bytes): Encoded results
+
+    Returns:
+        tuple: (results, labels); labels is None if every label was empty
+
+    Raises:
+        ValueError: If data is not in this format or is truncated
+    """
+    try:
+        magic, version, count = _FILE_HEADER.unpack_from(data, 0)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError("Not a search result file (or an unsupported version)")
+        position = _FILE_HEADER.size
+        results, labels = [], []
+        for _ in range(count):
+            (flags, goal, second_goal, nodes_created, cost, second_cost,
+             path_length, second_length, counter_count, label_length) = \
+                _RECORD_HEADER.unpack_from(data, position)
+            position += _RECORD_HEADER.size
+
+            nodes = array('q')
+            end = position + 8 * (path_length + second_length)
+            if end > len(data):
+                raise ValueError("Search result data is truncated")
+            nodes.frombytes(data[position:end])
+            if sys.byteorder == 'big':
+                nodes.byteswap()
+            position = end
+
+            counters = {}
+            for _ in range(counter_count):
+                name_length = data[position]
+                name = data[position + 1:position + 1 + name_length].decode()
+                position += 1 + name_length
+                counters[name] = _COUNTER_VALUE.unpack_from(data, position)[0]
+                position += _COUNTER_VALUE.size
+
+            labels.append(data[position:position + label_length].decode())
+            position += label_length
+            results.append(SearchResult(
+                goal if flags & _HAS_GOAL else None, nodes[:path_length].tolist(),
+                cost if flags & _HAS_COST else None, nodes_created,
+                second_goal if flags & _HAS_SECOND else None, nodes[path_length:].tolist(),
+                second_cost if flags & _HAS_SECOND_COST else None,
+                bool(flags & _STOPPED_EARLY), counters))
+    except (struct.error, IndexError, UnicodeDecodeError):
+        raise ValueError("Search result data is truncated or corrupt")
+    return results, (labels if any(labels) else None)
@@ -0,0 +1,511 @@
+"""
+Asyncio query server for the route finding searches.
+
+Accepts many concurrent route requests over a local socket and runs the
+CPU-bound searches in a pool of worker processes. Each request gets a
+deadline; searches check it every DEADLINE_CHECK_INTERVAL expansions and
+return the best result found so far when it passes. When too many requests
+are waiting, new ones are rejected immediately with status "busy" instead of
+queueing without bound.
+
+Protocol: one JSON object per line in each direction. Requests on the same
+connection are answered as they finish, so match responses by "id".
+
+    Request:  {"id": 1, "file": "test_cases/test_wide.txt", "method": "AS",
+               "origin": 1, "destinations": [8], "timeout": 2.0}
+    Response: {"id": 1, "status": "ok", "goal": 8, "nodes_created": 10,
+               "path": [1, 2, 5, 8], "cost": 6.0, "hops": 3,
+               "counters": {"expansions": 7}, "search_ms": 0.1, "version": 0,
+               "elapsed_ms": 3.2}
+
+"origin", "destinations" and "timeout" are optional (defaults: the values in
+the file and the server's --timeout). Status is one of "ok", "timeout" (the
+result is partial, possibly with no path), "busy" or "error". "version" counts
+the patch batches from "<file>.patch" applied to the map (see graph_patch.py);
+with --shared-store it is the published version in the store instead.
+
+With --shared-store, workers do not parse maps themselves: each map is
+published once to a shared-memory store (see shared_graph.py) and every
+worker searches a read-only mmapped view of it, so a large map is held in
+memory once rather than once per worker. A changed map or patch file is
+republished as a whole new version by the first worker that notices.
+
+Usage:
+    python search_server.py --socket /tmp/route.sock [--workers 4] [--max-queue 64] [--timeout 10] [--preload map.txt]
+    python search_server.py --port 8765 [...]
+    python search_server.py --socket /tmp/route.sock --shared-store [DIR] --preload map.txt
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compiled_graph import CompiledGraph
+from graph_parser import detect_grid, integral_cost_bound
+from graph_patch import LiveGraph
+from hierarchical_search import build_abstraction, update_abstraction
+from search import METHOD_MAP
+from shared_graph import SharedGraphStore, default_store_dir, store_key
+from visited_marks import VisitedMarks
+
+
+# Long paths produce long response lines; allow up to 16 MB per line
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+# Parsed graphs cached inside each worker process, keyed by file name and
+# modification time so an edited map is picked up on the next request.
+# Lines appended to "<file>.patch" are applied in place instead.
+_graph_cache = {}
+
+# Shared-memory store of this worker process (None = parse maps privately)
+_store = None
+
+
+class _LoadedMap:
+    """
+    A parsed graph file plus the per-graph structures searches can reuse.
+
+    Derived structures are built on first use and then live as long as the
+    cache entry, so repeated queries on a map never redo them. When a patch
+    is applied, the HPA abstraction is updated cluster by cluster; the grid
+    and CSR form depend on the whole map and are rebuilt on next use.
+    """
+
+    def __init__(self, mtime: float, live: LiveGraph):
+        self.mtime = mtime
+        self.live = live
+        self.graph, self.node_coords, self.origin, self.destinations = live.snapshot()
+        self._visited = None
+        self._grid = None
+        self._abstraction = None
+        self._compiled = None
+        self._cost_bound = None
+        live.subscribe(self._on_patch)
+
+    def _on_patch(self, delta, snapshot):
+        self.graph, self.node_coords, self.origin, self.destinations = snapshot
+        self._grid = None
+        self._compiled = None
+        self._cost_bound = None
+        if self._abstraction is not None:
+            self._abstraction = update_abstraction(self._abstraction, self.graph,
+                                                   self.node_coords, delta)
+
+    @property
+    def version(self) -> int:
+        """Map version reported with every response."""
+        return self.live.version
+
+    @property
+    def visited(self):
+        """Reusable visited marks for DFS/BFS/GBFS."""
+        if self._visited is None:
+            self._visited = VisitedMarks(self.graph)
+        return self._visited
+
+    @property
+    def grid(self):
+        """GridMap for JPS, or False if the map is not a uniform-cost grid."""
+        if self._grid is None:
+            self._grid = detect_grid(self.graph, self.node_coords) or False
+        return self._grid
+
+    @property
+    def cost_bound(self):
+        """Largest edge cost if all costs are whole numbers (UCS queue choice), else False."""
+        if self._cost_bound is None:
+            bound = integral_cost_bound(self.graph)
+            self._cost_bound = False if bound is None else bound
+        return self._cost_bound
+
+    @property
+    def abstraction(self):
+        """HPA cluster abstraction, built once per worker and map version."""
+        if self._abstraction is None:
+            self._abstraction = build_abstraction(self.graph, self.node_coords)
+        return self._abstraction
+
+    @property
+    def compiled(self):
+        """CSR form of the graph for the array-based searches."""
+        if self._compiled is None:
+            self._compiled = CompiledGraph.from_graph(self.graph)
+        return self._compiled
+
+    def search_kwargs(self, parameters) -> dict:
+        """Cached structures for the keyword arguments a search function accepts."""
+        kwargs = {}
+        if 'visited' in parameters:
+            kwargs['visited'] = self.visited
+        if 'grid' in parameters:
+            kwargs['grid'] = self.grid
+        if 'abstraction' in parameters:
+            kwargs['abstraction'] = self.abstraction
+        if 'compiled' in parameters:
+            kwargs['compiled'] = self.compiled
+        if 'cost_bound' in parameters:
+            kwargs['cost_bound'] = self.cost_bound
+        return kwargs
+
+
+class _SharedMap(_LoadedMap):
+    """
+    A map attached from the shared store instead of parsed by this worker.
+
+    Derived structures are per version: a new version means a new _SharedMap.
+    The CSR form is the store's own arrays rather than a copy.
+    """
+
+    def __init__(self, shared):
+        self.shared = shared
+        self.graph, self.node_coords, self.origin, self.destinations = shared
+        self._visited = None
+        self._grid = None
+        self._abstraction = None
+        self._compiled = None
+        self._cost_bound = None
+
+    @property
+    def version(self) -> int:
+        return self.shared.version
+
+    @property
+    def compiled(self):
+        if self._compiled is None:
+            self._compiled = self.shared.compiled()
+        return self._compiled
+
+    def release(self):
+        """Detach from the store (searches still running on it must be done)."""
+        self._compiled = None
+        self.shared.release()
+
+
+def _load_shared_graph(filename: str) -> _SharedMap:
+    """Attach the current store version of a graph file, publishing it first if stale."""
+    version = _store.refresh(filename)
+    cached = _graph_cache.get(filename)
+    if cached is None or cached.version != version:
+        loaded = _SharedMap(_store.attach(store_key(filename), version))
+        _graph_cache[filename] = loaded
+        if cached is not None:
+            cached.release()
+        cached = loaded
+    return cached
+
+
+def _load_graph(filename: str) -> _LoadedMap:
+    """Parse a graph file once per worker process and reuse it afterwards."""
+    if _store is not None:
+        return _load_shared_graph(filename)
+    mtime = os.path.getmtime(filename)
+    patch_path = filename + ".patch"
+    patch_size = os.path.getsize(patch_path) if os.path.exists(patch_path) else 0
+    cached = _graph_cache.get(filename)
+    # A rewritten map or a truncated patch file means starting over
+    if cached is None or cached.mtime != mtime or patch_size < cached.live.patch_offset:
+        cached = _LoadedMap(mtime, LiveGraph.from_file(filename))
+        _graph_cache[filename] = cached
+    if patch_size > cached.live.patch_offset:
+        cached.live.apply_patch_file(patch_path)
+    return cached
+
+
+def _preload_worker(filenames: tuple, store_dir: str = None):
+    """Pool initializer: open the shared store, if any, and load the --preload maps."""
+    global _store
+    if store_dir is not None:
+        _store = SharedGraphStore(store_dir)
+    for filename in filenames:
+        _load_graph(filename)
+
+
+def run_query(filename: str, method: str, origin: int = None, destinations: list = None,
+              deadline: float = None) -> dict:
+    """
+    Run one search in the current process and return a JSON-ready result.
+
+    Args:
+        filename (str): Path to the graph file
+        method (str): Key of METHOD_MAP (e.g. "AS")
+        origin (int): Start node (default: the file's origin)
+        destinations (list): Goal nodes (default: the file's destinations)
+        deadline (float): Absolute time.time() at which the search gives up
+
+    Returns:
+        dict: status, goal, nodes_created, path, cost, hops, counters,
+            search_ms and version
+    """
+    loaded = _load_graph(filename)
+    graph, node_coords = loaded.graph, loaded.node_coords
+    if origin is None:
+        origin = loaded.origin
+    if destinations is None:
+        destinations = loaded.destinations
+
+    search_function = METHOD_MAP[method]
+    parameters = inspect.signature(search_function).parameters
+    kwargs = loaded.search_kwargs(parameters)
+    if deadline is not None and 'deadline' in parameters:
+        kwargs['deadline'] = deadline
+
+    # Parsing and per-map structures are built on a worker's first request;
+    # if that already used up the deadline, do not start the search at all
+    if deadline is not None and time.time() >= deadline:
+        return {'status': 'timeout', 'goal': None, 'nodes_created': 0, 'path': [],
+                'cost': None, 'hops': None, 'counters': {}, 'search_ms': 0.0}
+
+    start = time.perf_counter()
+    result = search_function(graph, node_coords, origin, destinations, **kwargs)
+    search_ms = (time.perf_counter() - start) * 1000
+
+    # Only the search knows whether it stopped at the deadline or finished
+    return {
+        'status': 'timeout' if result.stopped_early else 'ok',
+        'goal': result.goal,
+        'nodes_created': result.nodes_created,
+        'path': result.path,
+        'cost': result.cost,
+        'hops': result.hops,
+        'counters': result.counters,
+        'search_ms': search_ms,
+        'version': loaded.version,
+    }
+
+
+class QueryServer:
+    """
+    Concurrency-limited front end that dispatches searches to worker processes.
+
+    At most `workers` searches run at once. Up to `max_queue` further requests
+    wait for a free worker; anything beyond that is answered "busy" right away.
+
+    Attributes:
+        workers (int): Number of worker processes
+        max_queue (int): Maximum number of requests waiting for a worker
+        default_timeout (float): Deadline in seconds for requests without one
+        grace (float): Extra seconds to wait for a worker that missed its deadline
+        preload (list): Graph files every worker loads when it starts
+        store (SharedGraphStore): Shared-memory store the workers attach maps
+            from (None = every worker parses its own copy)
+    """
+
+    def __init__(self, workers: int = None, max_queue: int = 64,
+                 default_timeout: float = 10.0, grace: float = 1.0, preload: list = None,
+                 store_dir: str = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self.grace = grace
+        self.store = None
+        if store_dir is not None:
+            # Publish once here so the workers only attach
+            self.store = SharedGraphStore(store_dir)
+            for filename in preload or ():
+                self.store.refresh(filename)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_preload_worker,
+            initargs=(tuple(preload or ()), self.store.directory if self.store else None))
+        self.slots = asyncio.Semaphore(self.workers)
+        self.in_flight = 0
+
+    def _release(self, future=None):
+        """Free a worker slot once its search has really finished."""
+        if future is not None and not future.cancelled():
+            future.exception()  # retrieve it so a late failure is not logged as unhandled
+        self.slots.release()
+        self.in_flight -= 1
+
+    async def handle_request(self, request: dict) -> dict:
+        """
+        Answer a single request dict (see the module docstring for fields).
+
+        Returns:
+            dict: Response, always including "id", "status" and "elapsed_ms"
+        """
+        start = time.perf_counter()
+        response = await self._dispatch(request)
+        response['id'] = request.get('id')
+        response['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        return response
+
+    async def _dispatch(self, request: dict) -> dict:
+        filename = request.get('file')
+        method = str(request.get('method', '')).upper()
+        if not filename or method not in METHOD_MAP:
+            return {'status': 'error', 'error': "Request needs a 'file' and a valid 'method'"}
+        timeout = request.get('timeout', self.default_timeout)
+        if (isinstance(timeout, bool) or not isinstance(timeout, (int, float))
+                or not math.isfinite(timeout) or timeout <= 0):
+            return {'status': 'error', 'error': "'timeout' must be a positive number of seconds"}
+
+        # Backpressure: refuse work instead of letting the queue grow
+        if self.in_flight >= self.workers + self.max_queue:
+            return {'status': 'busy', 'error': 'Server queue is full, retry later'}
+
+        deadline = time.time() + timeout
+        self.in_flight += 1
+        try:
+            await self.slots.acquire()
+        except BaseException:
+            self.in_flight -= 1
+            raise
+
+        # From here on the slot is handed back by _release: right away if no
+        # search was started, otherwise only when the worker is done with it
+        future = None
+        try:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return {'status': 'timeout', 'goal': None, 'nodes_created': 0,
+                        'path': [], 'cost': None}
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self.executor, run_query, filename, method,
+                request.get('origin'), request.get('destinations'), deadline)
+            future.add_done_callback(self._release)
+            # The search stops itself at the deadline; the grace period only
+            # covers methods that cannot check it. A worker that overruns it
+            # keeps its slot (shield) until it actually finishes.
+            return await asyncio.wait_for(asyncio.shield(future), remaining + self.grace)
+        except asyncio.TimeoutError:
+            return {'status': 'timeout', 'goal': None, 'nodes_created': 0,
+                    'path': [], 'cost': None}
+        except Exception as e:
+            return {'status': 'error', 'error': str(e)}
+        finally:
+            if future is None:
+                self._release()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Read JSON lines from one client and write each response when ready."""
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(request):
+            response = await self.handle_request(request)
+            async with write_lock:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as e:
+                    error = {'id': None, 'status': 'error', 'error': f"Invalid request: {e}"}
+                    async with write_lock:
+                        writer.write((json.dumps(error) + "\n").encode())
+                    continue
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: str = None, host: str = '127.0.0.1', port: int = None):
+        """
+        Serve forever on a Unix socket (socket_path) or a local TCP port.
+
+        Args:
+            socket_path (str): Path of the Unix domain socket to listen on
+            host (str): TCP host when no socket_path is given
+            port (int): TCP port when no socket_path is given
+        """
+        if socket_path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, path=socket_path,
+                                                     limit=_STREAM_LIMIT)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port,
+                                                limit=_STREAM_LIMIT)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        """Stop the worker pool, dropping searches that have not started."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def send_queries(requests: list, socket_path: str = None, host: str = '127.0.0.1',
+                       port: int = None) -> list:
+    """
+    Client helper: send requests on one connection and collect the responses.
+
+    Args:
+        requests (list): Request dicts; an "id" is added where missing
+        socket_path (str): Unix socket path of the server
+        host (str): TCP host when no socket_path is given
+        port (int): TCP port when no socket_path is given
+
+    Returns:
+        list: Responses in the same order as the requests
+    """
+    if socket_path is not None:
+        reader, writer = await asyncio.open_unix_connection(socket_path, limit=_STREAM_LIMIT)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=_STREAM_LIMIT)
+
+    for i, request in enumerate(requests):
+        request.setdefault('id', i)
+        writer.write((json.dumps(request) + "\n").encode())
+    await writer.drain()
+
+    responses = {}
+    while len(responses) < len(requests):
+        line = await reader.readline()
+        if not line:
+            break
+        response = json.loads(line)
+        responses[response['id']] = response
+    writer.close()
+    await writer.wait_closed()
+    return [responses.get(request['id']) for request in requests]
+
+
+def main():
+    """Command-line entry point: run the server until interrupted."""
+    parser = argparse.ArgumentParser(description="Asyncio route query server")
+    parser.add_argument("--socket", help="Unix socket path to listen on")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="TCP port (used when --socket is not given)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-queue", type=int, default=64, help="Requests allowed to wait for a worker")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Default per-request deadline in seconds")
+    parser.add_argument("--preload", nargs="+", default=[], metavar="FILE",
+                        help="Graph files each worker parses at startup instead of on its first request")
+    parser.add_argument("--shared-store", nargs="?", const="", default=None, metavar="DIR",
+                        help="Share parsed maps between workers through a memory-mapped store "
+                             "(default directory: %s)" % default_store_dir())
+    args = parser.parse_args()
+
+    if args.socket is None and args.port is None:
+        parser.error("one of --socket or --port is required")
+
+    async def run():
+        server = QueryServer(args.workers, args.max_queue, args.timeout, preload=args.preload,
+                             store_dir=args.shared_store)
+        try:
+            await server.serve(args.socket, args.host, args.port)
+        finally:
+            server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,535 @@
+"""
+Sharded routing: one process per coordinate shard plus a boundary overlay.
+
+For maps too big for one worker, the graph is split into shards_per_side^2
+shards by coordinates, and each shard is held by its own local process. Each
+shard only keeps its own nodes and the edges between them. Boundary nodes
+are the nodes with an edge to or from another shard. The coordinator keeps:
+- shard_of: which shard each node is in
+- the overlay graph over boundary nodes. Its edges are the edges that cross
+  shards, plus the cheapest intra-shard cost between each pair of boundary
+  nodes of a shard, which each shard precomputes in parallel when it starts.
+
+A query then:
+1. asks the origin's shard for its distances from the origin to the shard's
+   boundary nodes (and to destinations inside the shard), and asks each
+   destination shard for its boundary nodes' distances to its nearest
+   destination. These run concurrently, one message per shard.
+2. runs Dijkstra over the overlay, starting from the origin's boundary
+   distances and finishing at a destination through a boundary node of its
+   shard (or directly inside the origin's shard)
+3. asks the shards to unpack every intra-shard segment of the overlay path
+   into original nodes; edges between shards are used as they are
+
+Every shortest path is an intra-shard segment to the first boundary node,
+then overlay edges, then an intra-shard segment into the goal, so the cost
+equals search_ucs's. Only the best path is returned (no second-best), as
+for HDA. Nodes without coordinates go to the first shard.
+
+Usage:
+    with ShardedRouter(graph, node_coords, shards_per_side=2) as router:
+        result = router.query(origin, destinations)
+
+    python sharded_routing.py map.txt --shards-per-side 3
+    python sharded_routing.py map.txt --shards-per-side 3 --check 50     # compare with search_ucs
+"""
+
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+
+from parallel_astar import _context
+from search_algorithms import search_ucs
+from search_result import SearchResult
+
+
+# Shards per side of the coordinate grid when none is given
+DEFAULT_SHARDS_PER_SIDE = 2
+
+
+def partition_by_coordinates(graph: dict, node_coords: dict, shards_per_side: int) -> dict:
+    """
+    Assign every node to a cell of a shards_per_side x shards_per_side grid.
+
+    Args:
+        graph (dict): Adjacency list
+        node_coords (dict): Node coordinates
+        shards_per_side (int): Grid cells per side
+
+    Returns:
+        dict: node_id -> shard number (row-major cell index). Nodes without
+            coordinates get shard 0.
+    """
+    placed = [node for node in graph if node in node_coords]
+    if not placed:
+        return {node: 0 for node in graph}
+    min_x = min(node_coords[node][0] for node in placed)
+    min_y = min(node_coords[node][1] for node in placed)
+    span_x = max(node_coords[node][0] for node in placed) - min_x + 1
+    span_y = max(node_coords[node][1] for node in placed) - min_y + 1
+    shard_of = {}
+    for node in graph:
+        if node not in node_coords:
+            shard_of[node] = 0
+            continue
+        x, y = node_coords[node]
+        column = min(shards_per_side - 1, int((x - min_x) * shards_per_side // span_x))
+        row = min(shards_per_side - 1, int((y - min_y) * shards_per_side // span_y))
+        shard_of[node] = row * shards_per_side + column
+    return shard_of
+
+
+def split_graph(graph: dict, shard_of: dict) -> tuple:
+    """
+    Cut a graph into per-shard subgraphs and the edges between shards.
+
+    Args:
+        graph (dict): Adjacency list
+        shard_of (dict): From partition_by_coordinates
+
+    Returns:
+        tuple: (subgraphs, boundary, cross_edges). subgraphs maps shard ->
+            adjacency list of its nodes and intra-shard edges; boundary maps
+            shard -> set of its boundary nodes; cross_edges maps node -> list
+            of (neighbor, cost) into other shards (cheapest parallel edge).
+    """
+    subgraphs = {}
+    boundary = {}
+    cross_edges = {}
+    for node in graph:
+        subgraphs.setdefault(shard_of[node], {})[node] = []
+        boundary.setdefault(shard_of[node], set())
+    for node, neighbors in graph.items():
+        shard = shard_of[node]
+        cheapest = {}
+        for neighbor, cost in neighbors:
+            if neighbor not in shard_of:
+                continue
+            if shard_of[neighbor] == shard:
+                subgraphs[shard][node].append((neighbor, cost))
+            elif cost < cheapest.get(neighbor, math.inf):
+                cheapest[neighbor] = cost
+        if cheapest:
+            cross_edges[node] = sorted(cheapest.items())
+            boundary[shard].add(node)
+            for neighbor in cheapest:
+                boundary[shard_of[neighbor]].add(neighbor)
+    return subgraphs, boundary, cross_edges
+
+
+def _dijkstra(adjacency: dict, sources: dict, targets: set = None) -> tuple:
+    """
+    Dijkstra from several sources with start costs.
+
+    Args:
+        adjacency (dict): node -> list of (neighbor, cost)
+        sources (dict): node -> start cost
+        targets (set): Stop once all of these are settled (default: settle all)
+
+    Returns:
+        tuple: (distances, parents, settled count). parents[node] is the
+            previous node, or the source itself for a source.
+    """
+    heap = [(cost, node, node) for node, cost in sources.items()]
+    heapq.heapify(heap)
+    distances = {}
+    parents = {}
+    remaining = set(targets) if targets is not None else None
+    while heap:
+        cost, node, parent = heapq.heappop(heap)
+        if node in distances:
+            continue
+        distances[node] = cost
+        parents[node] = parent
+        if remaining is not None:
+            remaining.discard(node)
+            if not remaining:
+                break
+        for neighbor, edge_cost in adjacency.get(node, []):
+            if neighbor not in distances:
+                heapq.heappush(heap, (cost + edge_cost, neighbor, node))
+    return distances, parents, len(distances)
+
+
+def _shard_worker(connection, subgraph: dict, boundary: set):
+    """
+    Shard process: answer requests about one shard until told to stop.
+
+    Requests are tuples; every reply is ('ok', payload) or ('error', message):
+    - ('table',): {boundary node: {boundary node: cost}} and settled count
+    - ('forward', origin, targets): distances from origin to the boundary
+      nodes and to the given targets inside the shard
+    - ('backward', destinations): boundary node -> (cost, nearest destination)
+    - ('paths', pairs): cheapest intra-shard path for each (start, end)
+    - ('stop',)
+    """
+    reverse = {node: [] for node in subgraph}
+    for node, neighbors in subgraph.items():
+        for neighbor, cost in neighbors:
+            reverse[neighbor].append((node, cost))
+
+    while True:
+        request = connection.recv()
+        operation = request[0]
+        if operation == 'stop':
+            break
+        try:
+            if operation == 'table':
+                table = {}
+                settled = 0
+                for node in sorted(boundary):
+                    distances, _, count = _dijkstra(subgraph, {node: 0.0}, boundary)
+                    table[node] = {other: cost for other, cost in distances.items()
+                                   if other in boundary and other != node}
+                    settled += count
+                reply = (table, settled)
+            elif operation == 'forward':
+                _, origin, targets = request
+                distances, _, settled = _dijkstra(subgraph, {origin: 0.0}, boundary | set(targets))
+                reply = ({node: cost for node, cost in distances.items()
+                          if node in boundary or node in targets}, settled)
+            elif operation == 'backward':
+                _, destinations = request
+                distances, parents, settled = _dijkstra(reverse, {dest: 0.0 for dest in destinations},
+                                                        boundary)
+                to_goal = {}
+                for node in boundary:
+                    if node in distances:
+                        goal = node
+                        while parents[goal] != goal:
+                            goal = parents[goal]
+                        to_goal[node] = (distances[node], goal)
+                reply = (to_goal, settled)
+            elif operation == 'paths':
+                paths = []
+                settled = 0
+                for start, end in request[1]:
+                    _, parents, count = _dijkstra(subgraph, {start: 0.0}, {end})
+                    settled += count
+                    path = [end]
+                    while path[-1] != start:
+                        path.append(parents[path[-1]])
+                    paths.append(path[::-1])
+                reply = (paths, settled)
+            else:
+                raise ValueError(f"Unknown request '{operation}'")
+            connection.send(('ok', reply))
+        except Exception as e:
+            connection.send(('error', f"{type(e).__name__}: {e}"))
+    connection.close()
+
+
+class ShardedRouter:
+    """
+    Coordinator over one process per shard.
+
+    Attributes:
+        shards_per_side (int): Grid cells per side
+        shard_of (dict): node_id -> shard number
+        overlay (dict): Boundary node -> list of (boundary node, cost)
+        cross_edges (dict): node -> list of (neighbor, cost) into other shards
+        build_seconds (float): Time to start the shards and build the overlay
+    """
+
+    def __init__(self, graph: dict, node_coords: dict, shards_per_side: int = DEFAULT_SHARDS_PER_SIDE):
+        if shards_per_side < 1:
+            raise ValueError("shards_per_side must be at least 1")
+        start = time.perf_counter()
+        self.shards_per_side = shards_per_side
+        self.shard_of = partition_by_coordinates(graph, node_coords, shards_per_side)
+        subgraphs, self._boundary, self.cross_edges = split_graph(graph, self.shard_of)
+        # Queries send several messages and read the replies in order
+        self._lock = threading.Lock()
+        self._failed = None
+
+        ctx = _context()
+        self._connections = {}
+        self._processes = {}
+        try:
+            for shard, subgraph in subgraphs.items():
+                connection, child = ctx.Pipe()
+                process = ctx.Process(target=_shard_worker, daemon=True,
+                                      args=(child, subgraph, self._boundary[shard]))
+                process.start()
+                child.close()
+                self._connections[shard] = connection
+                self._processes[shard] = process
+            del subgraphs
+
+            # Each shard computes its boundary table at the same time
+            tables = self._call_all({shard: ('table',) for shard in self._connections})
+        except BaseException:
+            self.close()
+            raise
+        self.overlay = {node: list(edges) for node, edges in self.cross_edges.items()}
+        self.table_settled = 0
+        for table, settled in tables.values():
+            self.table_settled += settled
+            for node, costs in table.items():
+                self.overlay.setdefault(node, []).extend(sorted(costs.items()))
+        self.build_seconds = time.perf_counter() - start
+
+    @property
+    def shards(self) -> int:
+        """Number of shard processes (empty grid cells get none)."""
+        return len(self._connections)
+
+    def _call_all(self, requests: dict) -> dict:
+        """Send one request per shard, then collect every reply."""
+        self._send_all(list(requests.items()))
+        return dict(zip(requests, self._receive_all(list(requests))))
+
+    def _send_all(self, requests: list):
+        """Send (shard, request) pairs; replies must then be read with _receive_all."""
+        for shard, request in requests:
+            try:
+                self._connections[shard].send(request)
+            except OSError:
+                # Replies to the requests already sent would be read by the
+                # next query, so the router cannot be used any more
+                self._failed = f"shard {shard} process exited"
+                raise RuntimeError(self._failed)
+
+    def _receive_all(self, shards: list) -> list:
+        """
+        Read the next reply of each shard, in order (a shard answers its
+        requests in order). Every reply is read before an error is raised.
+        """
+        replies = []
+        errors = []
+        for shard in shards:
+            try:
+                status, payload = self._connections[shard].recv()
+            except (EOFError, OSError):
+                status, payload = 'error', "process exited"
+                self._failed = f"shard {shard} process exited"
+            if status != 'ok':
+                errors.append(f"shard {shard}: {payload}")
+            replies.append(payload)
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return replies
+
+    def query(self, origin: int, destinations: list) -> SearchResult:
+        """
+        Cheapest path from origin to any destination.
+
+        Args:
+            origin (int): Starting node ID
+            destinations (list): List of goal node IDs
+
+        Returns:
+            SearchResult: Best path only. nodes_created counts the nodes the
+                shards and the overlay search settled; counters has
+                'shards_queried', 'messages' and 'overlay_settled'.
+
+        Raises:
+            RuntimeError: If a shard fails or has exited (after an exit every
+                later query fails too)
+        """
+        destinations = [dest for dest in destinations if dest in self.shard_of]
+        if origin not in self.shard_of:
+            return SearchResult(None, [], None, nodes_created=0,
+                                counters={'shards_queried': 0, 'messages': 0, 'overlay_settled': 0})
+        with self._lock:
+            if self._failed:
+                raise RuntimeError(f"{self._failed}; close the router and start a new one")
+            return self._query(origin, destinations)
+
+    def _query(self, origin: int, destinations: list) -> SearchResult:
+        origin_shard = self.shard_of[origin]
+        by_shard = {}
+        for dest in destinations:
+            by_shard.setdefault(self.shard_of[dest], []).append(dest)
+
+        # Step 1: forward from the origin, backward from each destination shard
+        # Every request goes out before any reply is read, so the shards work
+        # concurrently; the origin's shard may get both kinds of request
+        requests = [(origin_shard, ('forward', origin, by_shard.get(origin_shard, [])))]
+        requests += [(shard, ('backward', dests)) for shard, dests in by_shard.items()]
+        self._send_all(requests)
+        replies = self._receive_all([shard for shard, _ in requests])
+        messages = len(requests)
+        from_origin, settled = replies[0]
+        to_goal = {}
+        for distances, shard_settled in replies[1:]:
+            to_goal.update(distances)
+            settled += shard_settled
+
+        # Step 2: Dijkstra over the overlay. Entries are (cost, sequence,
+        # node, parent, goal); goal is set on entries that end at a destination.
+        sequence = itertools.count()
+        heap = [(cost, next(sequence), node, None, None) for node, cost in from_origin.items()
+                if node in self._boundary[origin_shard]]
+        heap += [(from_origin[dest], next(sequence), None, None, dest)
+                 for dest in by_shard.get(origin_shard, []) if dest in from_origin]
+        heapq.heapify(heap)
+        parents = {}
+        best = None
+        while heap:
+            cost, _, node, parent, goal = heapq.heappop(heap)
+            if goal is not None:
+                best = (cost, goal, parent)
+                break
+            if node in parents:
+                continue
+            parents[node] = parent
+            if node in to_goal:
+                goal_cost, goal_node = to_goal[node]
+                heapq.heappush(heap, (cost + goal_cost, next(sequence), None, node, goal_node))
+            for neighbor, edge_cost in self.overlay.get(node, []):
+                if neighbor not in parents:
+                    heapq.heappush(heap, (cost + edge_cost, next(sequence), neighbor, node, None))
+        counters = {'shards_queried': len(set(by_shard) | {origin_shard}),
+                    'overlay_settled': len(parents)}
+        if best is None:
+            counters['messages'] = messages
+            return SearchResult(None, [], None, nodes_created=settled + len(parents), counters=counters)
+
+        # Step 3: unpack the overlay path, asking each shard for its segments
+        cost, goal, last = best
+        waypoints = [goal]
+        node = last
+        while node is not None:
+            waypoints.append(node)
+            node = parents[node]
+        waypoints.append(origin)
+        waypoints.reverse()
+
+        segments = {}
+        for start, end in zip(waypoints, waypoints[1:]):
+            if start != end and self.shard_of[start] == self.shard_of[end]:
+                segments.setdefault(self.shard_of[start], []).append((start, end))
+        unpacked = self._call_all({shard: ('paths', pairs) for shard, pairs in segments.items()})
+        messages += len(unpacked)
+        pieces = {}
+        for shard, (paths, shard_settled) in unpacked.items():
+            settled += shard_settled
+            pieces.update(zip(segments[shard], paths))
+
+        path = [origin]
+        for start, end in zip(waypoints, waypoints[1:]):
+            if start == end:
+                continue
+            if (start, end) in pieces:
+                path.extend(pieces[(start, end)][1:])
+            else:
+                path.append(end)  # An edge between shards
+        counters['messages'] = messages
+        return SearchResult(goal, path, cost, nodes_created=settled + len(parents), counters=counters)
+
+    def close(self):
+        """Stop the shard processes."""
+        for connection in self._connections.values():
+            try:
+                connection.send(('stop',))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for connection in self._connections.values():
+            connection.close()
+        self._connections = {}
+        self._processes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def check_against_ucs(graph: dict, node_coords: dict, router: ShardedRouter, queries: list) -> list:
+    """
+    Compare router queries with plain search_ucs.
+
+    Args:
+        graph (dict): The graph the router was built from
+        node_coords (dict): Node coordinates
+        router (ShardedRouter): Router to check
+        queries (list): (origin, destinations) pairs
+
+    Returns:
+        list: (origin, destinations, cost, sharded seconds, UCS seconds) rows
+
+    Raises:
+        RuntimeError: If a cost differs or a sharded path is not a valid
+            path of that cost
+    """
+    edge_costs = {}
+    for node, neighbors in graph.items():
+        for neighbor, cost in neighbors:
+            edge_costs[(node, neighbor)] = min(cost, edge_costs.get((node, neighbor), math.inf))
+
+    rows = []
+    for origin, destinations in queries:
+        start = time.perf_counter()
+        sharded = router.query(origin, destinations)
+        sharded_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = search_ucs(graph, node_coords, origin, destinations)
+        ucs_seconds = time.perf_counter() - start
+
+        if (sharded.cost is None) != (expected.cost is None) or (
+                sharded.cost is not None and not math.isclose(sharded.cost, expected.cost, abs_tol=1e-9)):
+            raise RuntimeError(f"{origin} -> {destinations}: sharded cost {sharded.cost}, "
+                               f"search_ucs cost {expected.cost}")
+        if sharded.cost is not None:
+            walked = sum(edge_costs.get(edge, math.inf) for edge in zip(sharded.path, sharded.path[1:]))
+            if (sharded.path[0] != origin or sharded.path[-1] not in destinations
+                    or not math.isclose(walked, sharded.cost, abs_tol=1e-9)):
+                raise RuntimeError(f"{origin} -> {destinations}: sharded path is not a valid path of its cost")
+        rows.append((origin, destinations, sharded.cost, sharded_seconds, ucs_seconds))
+    return rows
+
+
+def main():
+    """Command-line entry point: answer a map's query on shards, optionally checked against UCS."""
+    import argparse
+    from graph_parser import parse_input
+
+    parser = argparse.ArgumentParser(description="Route over coordinate shards with a boundary overlay")
+    parser.add_argument("filename", help="Graph file in the assignment format")
+    parser.add_argument("--shards-per-side", type=int, default=DEFAULT_SHARDS_PER_SIDE,
+                        help="Shard grid cells per side (default: %(default)s)")
+    parser.add_argument("--check", type=int, default=0, metavar="N",
+                        help="Also compare N random queries with search_ucs")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for --check queries")
+    args = parser.parse_args()
+    if args.shards_per_side < 1:
+        parser.error("--shards-per-side must be at least 1")
+
+    graph, node_coords, origin, destinations = parse_input(args.filename)
+    with ShardedRouter(graph, node_coords, args.shards_per_side) as router:
+        overlay_edges = sum(len(edges) for edges in router.overlay.values())
+        print(f"{args.filename}: {len(graph)} nodes in {router.shards} shards, overlay of "
+              f"{len(router.overlay)} boundary nodes and {overlay_edges} edges, "
+              f"built in {router.build_seconds:.2f}s")
+        result = router.query(origin, destinations)
+        if result.goal is None:
+            print(f"{origin} -> {destinations}: no path")
+        else:
+            print(f"{origin} -> {result.goal}: cost {result.cost:g}, {result.hops} hops, "
+                  f"{result.nodes_created} nodes settled, {result.counters['messages']} shard messages")
+            print(" ".join(map(str, result.path)))
+
+        if args.check:
+            rng = random.Random(args.seed)
+            nodes = sorted(graph)
+            queries = [(origin, destinations)] + [(rng.choice(nodes), [rng.choice(nodes)])
+                                                  for _ in range(args.check)]
+            rows = check_against_ucs(graph, node_coords, router, queries)
+            sharded_seconds = sum(row[3] for row in rows)
+            ucs_seconds = sum(row[4] for row in rows)
+            print(f"Checked {len(rows)} queries against search_ucs: all costs match "
+                  f"(sharded {sharded_seconds:.2f}s, search_ucs {ucs_seconds:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
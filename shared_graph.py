@@ -0,0 +1,582 @@
+"""
+Shared-memory graph store for multi-process serving.
+
+Every worker that calls parse_input keeps its own dict-of-lists graph, so a
+large map served by 32 workers sits in memory 32 times. The store instead
+writes each map once, in CSR form (see compiled_graph.py), to a file in a
+shared-memory directory (/dev/shm where available). Workers mmap that file
+read-only and search it through zero-copy views:
+
+    graph         SharedAdjacency: a read-only Mapping with the same
+                  interface as the parse_input dict (graph[node],
+                  graph.get(node, []), iteration in the original order);
+                  neighbor lists are built from the shared arrays on access
+    node_coords   SharedCoords: read-only Mapping node -> (x, y)
+    compiled()    CompiledGraph whose offsets/targets/costs are the shared
+                  arrays themselves (for numpy-based searches)
+
+Only what a worker touches is paged in, and the pages are shared by every
+process that maps the file.
+
+Versions and lifecycle:
+- A loader publishes a map by writing a new version file under a temporary
+  name, renaming it into place, then replacing the "<key>.current" pointer
+  (also by rename), so readers see either the old or the new version and
+  never a partial one. Publishers of the same map are serialized with a lock
+  file.
+- Each attached version is reference counted inside a process (every
+  attach() needs one release()), and every process that maps a version holds
+  a shared flock on its file. Old versions are deleted once no process holds
+  that lock; a crashed worker's locks are dropped by the kernel, so nothing
+  leaks past the processes that use it.
+- Version files outlive the server, so a restart with an unchanged map
+  attaches instead of parsing. `python shared_graph.py clear` removes them.
+
+Searches over a SharedAdjacency trade some speed for memory: each neighbor
+lookup builds a small list instead of returning a stored one.
+
+Usage:
+    store = SharedGraphStore()                  # default directory
+    shared = store.load("map.txt")              # publish if needed, then attach
+    graph, node_coords, origin, destinations = shared
+    search_astar(graph, node_coords, origin, destinations)
+    shared.release()
+
+    python shared_graph.py publish map.txt [--dir DIR]
+    python shared_graph.py status [--dir DIR]
+    python shared_graph.py clear [--dir DIR]
+"""
+
+import bisect
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from collections.abc import Mapping
+
+from compiled_graph import CompiledGraph
+
+
+STORE_MAGIC = b"SGRF"
+STORE_FORMAT = 1
+
+# magic, format, coordinate kind (0 = int64, 1 = float64), 1 if node IDs are
+# base .. base + n - 1, then node, edge, graph key, coordinate and destination
+# counts, origin, map version and base
+_HEADER = struct.Struct("<4sHHI8q")
+_COORD_INT, _COORD_FLOAT = 0, 1
+
+# Per-node flag bits
+_IN_GRAPH, _HAS_COORDS = 1, 2
+
+
+def default_store_dir() -> str:
+    """/dev/shm/route-graph-store if /dev/shm exists, else under the temp directory."""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "route-graph-store")
+
+
+def store_key(filename: str) -> str:
+    """File-name-safe key for a map file (its base name plus a hash of its full path)."""
+    path = os.path.abspath(filename)
+    stem = re.sub(r"[^A-Za-z0-9._-]", "_", os.path.basename(path))
+    return f"{stem}-{hashlib.sha1(path.encode()).hexdigest()[:12]}"
+
+
+def _source_stamp(filename: str) -> list:
+    """Modification time of the map and size of its patch file, to spot stale versions."""
+    patch_path = filename + ".patch"
+    patch_size = os.path.getsize(patch_path) if os.path.exists(patch_path) else 0
+    return [os.stat(filename).st_mtime_ns, patch_size]
+
+
+def _int64(values) -> bytes:
+    packed = array('q', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _float64(values) -> bytes:
+    packed = array('d', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def encode_graph(graph: dict, node_coords: dict, origin: int, destinations: list,
+                 version: int = 0) -> bytes:
+    """
+    Lay out a parsed map as the store's file format.
+
+    Args:
+        graph (dict): Adjacency list from parse_input
+        node_coords (dict): Node coordinates
+        origin (int): Origin node ID
+        destinations (list): Destination node IDs
+        version (int): Map version recorded in the header
+
+    Returns:
+        bytes: Header followed by the node, CSR, coordinate, order,
+            destination and flag arrays
+    """
+    node_ids = sorted(set(graph) | set(node_coords)
+                      | {n for neighbors in graph.values() for n, _ in neighbors})
+    index = {node: i for i, node in enumerate(node_ids)}
+    n = len(node_ids)
+
+    offsets = [0]
+    targets, costs = [], []
+    for node in node_ids:
+        for neighbor_id, cost in graph.get(node, ()):
+            targets.append(index[neighbor_id])
+            costs.append(cost)
+        offsets.append(len(targets))
+
+    coord_values = [value for coords in node_coords.values() for value in coords]
+    coord_kind = _COORD_INT if all(isinstance(v, int) for v in coord_values) else _COORD_FLOAT
+    coords = [0] * (2 * n)
+    flags = bytearray(n)
+    for node in graph:
+        flags[index[node]] |= _IN_GRAPH
+    for node, (x, y) in node_coords.items():
+        i = index[node]
+        coords[2 * i], coords[2 * i + 1] = x, y
+        flags[i] |= _HAS_COORDS
+
+    base = node_ids[0] if node_ids else 0
+    contiguous = int(all(node == base + i for i, node in enumerate(node_ids)))
+    header = _HEADER.pack(STORE_MAGIC, STORE_FORMAT, coord_kind, contiguous,
+                          n, len(targets), len(graph), len(node_coords), len(destinations),
+                          origin, version, base)
+    return b"".join([
+        header, _int64(node_ids), _int64(offsets), _int64(targets), _float64(costs),
+        _int64(coords) if coord_kind == _COORD_INT else _float64(coords),
+        _int64(index[node] for node in graph), _int64(index[node] for node in node_coords),
+        _int64(destinations), bytes(flags),
+    ])
+
+
+class _Mapped:
+    """One mmapped version file, shared by every handle attached to it in this process."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.refs = 0
+        self.file = open(path, 'rb')
+        # Readers hold a shared lock; the collector only deletes unlocked versions
+        fcntl.flock(self.file, fcntl.LOCK_SH)
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mm)
+
+        (magic, fmt, coord_kind, contiguous, n, m, num_keys, num_coords, num_dest,
+         origin, version, base) = _HEADER.unpack_from(self.buffer, 0)
+        if magic != STORE_MAGIC or fmt != STORE_FORMAT:
+            self.close()
+            raise ValueError(f"{path} is not a shared graph file")
+        self.origin, self.version = origin, version
+        self.base = base if contiguous else None
+
+        self.views = []
+        position = _HEADER.size
+
+        def take(typecode, count, size=8):
+            nonlocal position
+            view = self.buffer[position:position + count * size].cast(typecode)
+            position += count * size
+            self.views.append(view)
+            return view
+
+        self.node_ids = take('q', n)
+        self.offsets = take('q', n + 1)
+        self.targets = take('q', m)
+        self.costs = take('d', m)
+        self.coords = take('q' if coord_kind == _COORD_INT else 'd', 2 * n)
+        self.graph_order = take('q', num_keys)
+        self.coord_order = take('q', num_coords)
+        self.destinations = list(take('q', num_dest))
+        self.flags = take('B', n, size=1)
+        self.num_nodes = n
+
+    def find(self, node) -> int:
+        """Dense index of node, or -1."""
+        if self.base is not None:
+            try:
+                i = node - self.base
+            except TypeError:
+                return -1
+            return i if 0 <= i < self.num_nodes else -1
+        i = bisect.bisect_left(self.node_ids, node)
+        return i if i < self.num_nodes and self.node_ids[i] == node else -1
+
+    def close(self):
+        for view in self.views:
+            view.release()
+        self.buffer.release()
+        try:
+            self.mm.close()
+        except BufferError:
+            # Someone still holds a view (e.g. a numpy array); the mapping
+            # goes away with it
+            pass
+        self.file.close()
+
+
+class SharedAdjacency(Mapping):
+    """
+    Read-only, dict-like adjacency list over a mapped version.
+
+    graph[node] and graph.get(node) return a fresh list of (neighbor_id, cost)
+    tuples; iteration follows the key order of the published dict.
+    """
+
+    def __init__(self, mapped: _Mapped):
+        self._mapped = mapped
+
+    def _neighbors(self, i: int) -> list:
+        mapped = self._mapped
+        start, end = mapped.offsets[i], mapped.offsets[i + 1]
+        node_ids = mapped.node_ids
+        return [(node_ids[target], cost)
+                for target, cost in zip(mapped.targets[start:end], mapped.costs[start:end])]
+
+    def __getitem__(self, node) -> list:
+        i = self._mapped.find(node)
+        if i < 0 or not self._mapped.flags[i] & _IN_GRAPH:
+            raise KeyError(node)
+        return self._neighbors(i)
+
+    def get(self, node, default=None):
+        i = self._mapped.find(node)
+        if i < 0 or not self._mapped.flags[i] & _IN_GRAPH:
+            return default
+        return self._neighbors(i)
+
+    def __contains__(self, node) -> bool:
+        i = self._mapped.find(node)
+        return i >= 0 and bool(self._mapped.flags[i] & _IN_GRAPH)
+
+    def __iter__(self):
+        node_ids = self._mapped.node_ids
+        for i in self._mapped.graph_order:
+            yield node_ids[i]
+
+    def __len__(self) -> int:
+        return len(self._mapped.graph_order)
+
+
+class SharedCoords(Mapping):
+    """Read-only, dict-like node -> (x, y) over a mapped version."""
+
+    def __init__(self, mapped: _Mapped):
+        self._mapped = mapped
+
+    def __getitem__(self, node) -> tuple:
+        i = self._mapped.find(node)
+        if i < 0 or not self._mapped.flags[i] & _HAS_COORDS:
+            raise KeyError(node)
+        coords = self._mapped.coords
+        return (coords[2 * i], coords[2 * i + 1])
+
+    def __contains__(self, node) -> bool:
+        i = self._mapped.find(node)
+        return i >= 0 and bool(self._mapped.flags[i] & _HAS_COORDS)
+
+    def __iter__(self):
+        node_ids = self._mapped.node_ids
+        for i in self._mapped.coord_order:
+            yield node_ids[i]
+
+    def __len__(self) -> int:
+        return len(self._mapped.coord_order)
+
+
+class SharedGraph:
+    """
+    One attachment to a published map version.
+
+    Unpacks like parse_input's result: graph, node_coords, origin,
+    destinations. Call release() (or use it as a context manager) when done;
+    the views must not be used afterwards.
+
+    Attributes:
+        key (str): Store key of the map
+        version (int): Published version number
+        graph (SharedAdjacency): Adjacency list view
+        node_coords (SharedCoords): Coordinate view
+        origin (int): Origin from the map file
+        destinations (list): Destinations from the map file
+    """
+
+    def __init__(self, store: 'SharedGraphStore', key: str, mapped: _Mapped):
+        self._store = store
+        self._mapped = mapped
+        self._released = False
+        self.key = key
+        self.version = mapped.version
+        self.graph = SharedAdjacency(mapped)
+        self.node_coords = SharedCoords(mapped)
+        self.origin = mapped.origin
+        self.destinations = list(mapped.destinations)
+
+    def __iter__(self):
+        return iter((self.graph, self.node_coords, self.origin, self.destinations))
+
+    def compiled(self) -> CompiledGraph:
+        """
+        CompiledGraph over the shared CSR arrays (no copy of the edges).
+
+        Node IDs and the ID -> index dict are per-process copies.
+        """
+        mapped = self._mapped
+        return CompiledGraph(mapped.node_ids.tolist(), mapped.offsets, mapped.targets, mapped.costs)
+
+    def release(self):
+        """Drop this attachment; the last one in the process unmaps the file."""
+        if not self._released:
+            self._released = True
+            self._store._release(self.key, self._mapped)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SharedGraphStore:
+    """
+    Directory of published map versions plus this process's attachments.
+
+    Attributes:
+        directory (str): Where version, pointer and lock files live
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or default_store_dir()
+        os.makedirs(self.directory, exist_ok=True)
+        self._mapped = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def _version_path(self, key: str, version: int) -> str:
+        return self._path(key, f".v{version}.graph")
+
+    def current(self, key: str) -> dict:
+        """The published pointer for key ({"version", "source"}), or None."""
+        try:
+            with open(self._path(key, ".current")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def publish(self, key: str, graph: dict, node_coords: dict, origin: int,
+                destinations: list, source: list = None) -> int:
+        """
+        Publish a new version of a map atomically.
+
+        Args:
+            key (str): Store key (store_key(filename) for map files)
+            graph (dict): Adjacency list
+            node_coords (dict): Node coordinates
+            origin (int): Origin node ID
+            destinations (list): Destination node IDs
+            source (list): Stamp of the input the version was built from
+
+        Returns:
+            int: The new version number
+        """
+        with open(self._path(key, ".lock"), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return self._publish_locked(key, graph, node_coords, origin, destinations, source)
+
+    def _publish_locked(self, key, graph, node_coords, origin, destinations, source) -> int:
+        pointer = self.current(key)
+        version = pointer['version'] + 1 if pointer else 1
+        data = encode_graph(graph, node_coords, origin, destinations, version)
+
+        path = self._version_path(key, version)
+        with open(path + ".tmp", 'wb') as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+        pointer_path = self._path(key, ".current")
+        with open(pointer_path + ".tmp", 'w') as f:
+            json.dump({'version': version, 'source': source}, f)
+        os.replace(pointer_path + ".tmp", pointer_path)
+
+        self.collect(key)
+        return version
+
+    def refresh(self, filename: str) -> int:
+        """
+        Make sure the published version of a map file is up to date.
+
+        Parses the file (and applies "<filename>.patch") only if the map or
+        its patch file changed since the current version was published.
+
+        Args:
+            filename (str): Map file path
+
+        Returns:
+            int: Current version number
+        """
+        from graph_patch import LiveGraph
+
+        key = store_key(filename)
+        stamp = _source_stamp(filename)
+        pointer = self.current(key)
+        if pointer is not None and pointer['source'] == stamp:
+            return pointer['version']
+
+        with open(self._path(key, ".lock"), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another process may have published while we waited
+            pointer = self.current(key)
+            if pointer is not None and pointer['source'] == stamp:
+                return pointer['version']
+            live = LiveGraph.from_file(filename)
+            if os.path.exists(filename + ".patch"):
+                live.apply_patch_file(filename + ".patch")
+            return self._publish_locked(key, *live.snapshot(), stamp)
+
+    def attach(self, key: str, version: int = None) -> SharedGraph:
+        """
+        Map a published version (default: the current one) read-only.
+
+        Args:
+            key (str): Store key
+            version (int): Version to attach
+
+        Returns:
+            SharedGraph: The attachment (release() it when done)
+
+        Raises:
+            KeyError: If nothing was published under key or the version is gone
+        """
+        while True:
+            wanted = version
+            if wanted is None:
+                pointer = self.current(key)
+                if pointer is None:
+                    raise KeyError(f"No map published as '{key}'")
+                wanted = pointer['version']
+            path = self._version_path(key, wanted)
+            with self._lock:
+                mapped = self._mapped.get(path)
+                if mapped is None:
+                    try:
+                        mapped = _Mapped(path)
+                    except FileNotFoundError:
+                        mapped = None
+                    # The collector may have deleted it between open and lock
+                    if mapped is not None and not os.path.exists(path):
+                        mapped.close()
+                        mapped = None
+                    if mapped is not None:
+                        self._mapped[path] = mapped
+                if mapped is not None:
+                    mapped.refs += 1
+                    return SharedGraph(self, key, mapped)
+            if version is not None:
+                raise KeyError(f"Version {version} of '{key}' no longer exists")
+            # The current version was replaced while attaching; try the new one
+
+    def load(self, filename: str) -> SharedGraph:
+        """refresh() a map file, then attach its current version."""
+        return self.attach(store_key(filename), self.refresh(filename))
+
+    def _release(self, key: str, mapped: _Mapped):
+        with self._lock:
+            mapped.refs -= 1
+            if mapped.refs > 0:
+                return
+            del self._mapped[mapped.path]
+            mapped.close()
+        self.collect(key)
+
+    def collect(self, key: str) -> int:
+        """
+        Delete old versions of key that no process has mapped.
+
+        Returns:
+            int: Number of version files removed
+        """
+        pointer = self.current(key)
+        current = self._version_path(key, pointer['version']) if pointer else None
+        prefix = key + ".v"
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not (name.startswith(prefix) and name.endswith(".graph")):
+                continue
+            path = os.path.join(self.directory, name)
+            if path == current:
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    os.remove(path)
+                    removed += 1
+            except (BlockingIOError, FileNotFoundError):
+                continue
+        return removed
+
+    def clear(self) -> int:
+        """
+        Unpublish every map and delete the versions no process has mapped.
+
+        Versions still mapped stay until their last user exits; the next
+        load() of a cleared map publishes it again.
+
+        Returns:
+            int: Number of version files removed
+        """
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name.endswith(".current"):
+                key = name[:-len(".current")]
+                os.remove(self._path(key, ".current"))
+                removed += self.collect(key)
+        return removed
+
+
+def main():
+    """Command-line entry point: publish maps, list the store, or clear it."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the shared-memory graph store")
+    parser.add_argument("command", choices=["publish", "status", "clear"])
+    parser.add_argument("files", nargs="*", help="Map files to publish")
+    parser.add_argument("--dir", default=None, help="Store directory (default: %s)" % default_store_dir())
+    args = parser.parse_args()
+
+    store = SharedGraphStore(args.dir)
+    if args.command == "publish":
+        if not args.files:
+            parser.error("publish needs at least one map file")
+        for filename in args.files:
+            version = store.refresh(filename)
+            print(f"{filename}: version {version} ({store_key(filename)})")
+    elif args.command == "status":
+        for name in sorted(os.listdir(store.directory)):
+            if name.endswith(".current"):
+                key = name[:-len(".current")]
+                pointer = store.current(key)
+                path = store._version_path(key, pointer['version'])
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                print(f"{key}: version {pointer['version']}, {size / 1e6:.1f} MB")
+    else:
+        print(f"Removed {store.clear()} version file(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,27 @@
 """
 Automated test runner for all search algorithms
 Runs all algorithms on all test cases and generates detailed report
+
+Every search runs in this process on a graph parsed once per test case, and
+the report reads goal, cost and paths straight from the SearchResult each
+search returns.
+
+Usage:
+    python test_runner.py                    # run the full report
+    python test_runner.py --profile          # also save a profile of every run in profiles/
+    python test_runner.py --save runs.jsonl  # also save every result (JSON Lines;
+                                             # a .bin file gets the binary format)
 """
 
-import subprocess
+import inspect
 import time
 import sys
 from pathlib import Path
-from collections import defaultdict
+
+from graph_parser import parse_input
+from profiling import Profiler
+from search import METHOD_MAP
+from search_result import encode_binary, encode_json
 
 # Test case configurations
 TEST_CASES = [
@@ -23,9 +37,13 @@ TEST_CASES = [
     ("test_cases/test_cycle.txt", "Cyclic Graph", "Cycle handling"),
     ("test_cases/test_exponential.txt", "Exponential Branching", "Memory stress"),
     ("test_cases/test_long_path.txt", "Long Path (50 nodes)", "Deep search stress"),
+    ("test_cases/test_grid.txt", "8-Connected Grid", "Jump point search"),
 ]
 
-ALGORITHMS = ["DFS", "BFS", "UCS", "GBFS", "AS", "IDASTAR"]
+ALGORITHMS = ["DFS", "BFS", "UCS", "GBFS", "AS", "IDASTAR", "IDDFS", "JPS", "SMASTAR", "BEAM"]
+
+# Where --profile saves the per-run reports and collapsed stacks
+PROFILE_DIR = Path("profiles")
 
 ALGORITHM_NAMES = {
     "DFS": "DFS",
@@ -33,139 +51,81 @@ ALGORITHM_NAMES = {
     "UCS": "UCS",
     "GBFS": "GBFS",
     "AS": "A*",
-    "IDASTAR": "IDA*"
+    "IDASTAR": "IDA*",
+    "IDDFS": "IDDFS",
+    "JPS": "JPS",
+    "SMASTAR": "SMA*",
+    "BEAM": "Beam"
 }
 
-def calculate_path_cost(graph, path):
-    """Calculate total cost of a path by summing edge costs."""
-    if not path or len(path) < 2:
-        return 0.0
-    
-    total_cost = 0.0
-    for i in range(len(path) - 1):
-        current = int(path[i])
-        next_node = int(path[i + 1])
-        
-        if current in graph:
-            for neighbor, cost in graph[current]:
-                if neighbor == next_node:
-                    total_cost += cost
-                    break
-    
-    return total_cost
+class RunResult:
+    """
+    One algorithm run on one test case.
 
-def parse_graph_from_file(filename):
-    """Parse graph structure from input file to calculate path costs."""
-    graph = {}
-    
-    try:
-        with open(filename, 'r') as f:
-            lines = f.readlines()
-        
-        lines = [line.strip() for line in lines if line.strip()]
-        current_section = None
-        
-        for line in lines:
-            if line.startswith("Edges:"):
-                current_section = "edges"
-                continue
-            elif line.startswith("Origin:") or line.startswith("Destinations:"):
-                break
-            
-            if current_section == "edges":
-                parts = line.split(':')
-                if len(parts) != 2:
-                    continue
-                
-                edge_str = parts[0].strip().strip('()')
-                from_node, to_node = map(int, edge_str.split(','))
-                cost = float(parts[1].strip())
-                
-                if from_node not in graph:
-                    graph[from_node] = []
-                graph[from_node].append((to_node, cost))
-    
-    except Exception as e:
-        print(f"Warning: Could not parse graph from {filename}: {e}")
-        return {}
-    
-    return graph
+    Attributes:
+        result (SearchResult): What the search returned (None on error)
+        time_ms (float): Wall time of the search call
+        error (str): Exception message or "Timeout after Ns" (None if the
+            search finished)
+    """
 
-# ==============================================================================
-# MODIFIED FUNCTION: run_search
-# Updated to parse the new 3-line output format from search.py
-# ==============================================================================
-def run_search(filename, algorithm, timeout=30):
-    """Run a single search and return results, including best and second-best paths."""
-    try:
-        start = time.time()
-        result = subprocess.run(
-            ["python", "search_2.py", filename, algorithm, "--simple"],
-            capture_output=True,
-            text=True,
-            timeout=timeout
-        )
-        elapsed = (time.time() - start) * 1000
-        
-        if result.returncode != 0:
-            return {
-                'goal': 'ERROR', 'nodes': 0, 'path': [], 'path_str': '-',
-                'path_cost': 0, 'time_ms': elapsed, 'success': False, 'error': result.stderr
-            }
-        
-        lines = result.stdout.strip().split('\n')
-        if len(lines) < 2:
-            return {
-                'goal': 'ERROR', 'nodes': 0, 'path': [], 'path_str': '-',
-                'path_cost': 0, 'time_ms': elapsed, 'success': False, 'error': 'Invalid output format'
-            }
-        
-        # Handle "No solution" case
-        if "No solution" in lines[0]:
-            parts = lines[0].split()
-            return {
-                'goal': "No solution", 'nodes': int(parts[2]), 'path': [], 'path_str': "No path",
-                'path_cost': 0, 'time_ms': elapsed, 'success': True
-            }
+    def __init__(self, result, time_ms, error=None):
+        self.result = result
+        self.time_ms = time_ms
+        self.error = error
 
-        # --- NEW PARSING LOGIC FOR BEST AND SECOND-BEST PATHS ---
-        header_parts = lines[0].split()
-        goal = int(header_parts[0])
-        nodes = int(header_parts[1])
-        best_cost = float(header_parts[2])
-        second_cost_str = header_parts[3]
+    @property
+    def success(self) -> bool:
+        return self.error is None
 
-        best_path = lines[1].split()
-        best_path_str = " -> ".join(best_path)
+    @property
+    def solved(self) -> bool:
+        return self.success and self.result.goal is not None
 
-        second_path = []
-        second_path_str = '-'
-        if second_cost_str != '-' and len(lines) > 2 and lines[2].strip() != '-':
-            second_path = lines[2].split()
-            second_path_str = " -> ".join(second_path)
-        
-        # The main table still shows the single best path for comparison
-        return {
-            'goal': goal, 'nodes': nodes, 'path': best_path, 'path_str': best_path_str,
-            'path_cost': best_cost, 'time_ms': elapsed, 'success': True,
-            # New fields for the detailed summary
-            'best_path_str': best_path_str,
-            'best_cost': best_cost,
-            'second_path_str': second_path_str,
-            'second_cost': float(second_cost_str) if second_cost_str != '-' else None,
-        }
-        
-    except subprocess.TimeoutExpired:
-        return {
-            'goal': 'TIMEOUT', 'nodes': 0, 'path': [], 'path_str': '-',
-            'path_cost': 0, 'time_ms': timeout * 1000, 'success': False,
-            'error': f'Timeout after {timeout}s'
-        }
+
+def path_string(path):
+    """Format a path as "1 -> 2 -> 3"."""
+    return " -> ".join(map(str, path))
+
+
+def run_search(graph_data, algorithm, timeout=30, profile_name=None):
+    """
+    Run one algorithm in-process on an already parsed graph.
+
+    Args:
+        graph_data (tuple): (graph, node_coords, origin, destinations) from parse_input
+        algorithm (str): METHOD_MAP key
+        timeout (float): Seconds before the search is told to stop (methods
+            that take a deadline only)
+        profile_name (str): Save a profile as PROFILE_DIR/<profile_name>.txt
+            and .folded (default: no profiling)
+
+    Returns:
+        RunResult: The search result and its timing
+    """
+    graph, node_coords, origin, destinations = graph_data
+    search_function = METHOD_MAP[algorithm]
+    kwargs = {}
+    if 'deadline' in inspect.signature(search_function).parameters:
+        kwargs['deadline'] = time.time() + timeout
+
+    profiler = Profiler(enabled=profile_name is not None)
+    start = time.perf_counter()
+    try:
+        with profiler.stage("search"):
+            result = search_function(graph, node_coords, origin, destinations, **kwargs)
     except Exception as e:
-        return {
-            'goal': 'ERROR', 'nodes': 0, 'path': [], 'path_str': '-',
-            'path_cost': 0, 'time_ms': 0, 'success': False, 'error': str(e)
-        }
+        return RunResult(None, (time.perf_counter() - start) * 1000, str(e))
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if profiler.enabled:
+        with open(PROFILE_DIR / f"{profile_name}.txt", 'w') as report:
+            profiler.print_report(report)
+        profiler.write_collapsed(str(PROFILE_DIR / f"{profile_name}.folded"))
+
+    if result.stopped_early:
+        return RunResult(result, elapsed, f'Timeout after {timeout}s')
+    return RunResult(result, elapsed)
 
 def print_header():
     """Print the report header."""
@@ -181,18 +141,25 @@ def print_test_case_header(test_name, description):
     print(f"{'Algo':<8} | {'Goal':<6} | {'Nodes':<6} | {'Cost':<7} | {'Time':<8} | {'Path':<55}")
     print("-" * 120)
 
-def print_result_row(algo_name, result):
-    """Print a single result row. This function is UNCHANGED."""
-    goal_str = str(result['goal']) if result['goal'] != 'No solution' else 'None'
-    nodes_str = str(result['nodes'])
-    cost_str = f"{result['path_cost']:.1f}" if result['path_cost'] > 0 else "-"
-    time_str = f"{result['time_ms']:.1f}ms"
+def print_result_row(algo_name, run):
+    """Print a single result row."""
+    result = run.result
+    if not run.success:
+        goal_str = 'TIMEOUT' if result is not None else 'ERROR'
+    else:
+        goal_str = str(result.goal)
+    nodes_str = str(result.nodes_created) if result is not None else "0"
+    cost_str = f"{result.cost:.1f}" if run.solved and result.cost > 0 else "-"
+    time_str = f"{run.time_ms:.1f}ms"
     
-    path_str = result['path_str']
+    if run.solved:
+        path_str = path_string(result.path)
+    else:
+        path_str = "No path" if run.success else "-"
     if len(path_str) > 50:
         path_str = path_str[:47] + "..."
     
-    status = "OK" if result['success'] else "FAIL"
+    status = "OK" if run.success else "FAIL"
     
     print(f"{algo_name:<8} | {goal_str:<6} | {nodes_str:<6} | {cost_str:<7} | {time_str:<8} | {path_str:<55} [{status}]")
 
@@ -210,14 +177,13 @@ def print_summary(all_results):
         print(f"\n[{test_name}]")
         
         test_results = {algo: all_results.get((test_file, algo)) for algo in ALGORITHMS}
-        valid_results = {k: v for k, v in test_results.items() 
-                        if v and v['success'] and v['goal'] != 'No solution'}
+        valid_results = {k: v.result for k, v in test_results.items() if v and v.solved}
         
         if not valid_results:
             print("  No solution exists (as expected)")
             continue
         
-        goals = {v['goal'] for v in valid_results.values()}
+        goals = {v.goal for v in valid_results.values()}
         if len(goals) != 1:
             print(f"  WARNING: Different goals reached: {goals}")
             continue
@@ -225,7 +191,7 @@ def print_summary(all_results):
         print(f"  Goal: {list(goals)[0]}")
         
         # Cost analysis (using the best path cost)
-        costs = {k: v['best_cost'] for k, v in valid_results.items()}
+        costs = {k: v.cost for k, v in valid_results.items()}
         min_cost = min(costs.values())
         optimal_algos = [k for k, cost in costs.items() if cost == min_cost]
         
@@ -233,17 +199,18 @@ def print_summary(all_results):
         print(f"    Found by: {', '.join(ALGORITHM_NAMES[a] for a in optimal_algos)}")
         
         # Memory efficiency
-        min_nodes = min(v['nodes'] for v in valid_results.values())
-        max_nodes = max(v['nodes'] for v in valid_results.values())
-        most_efficient = [k for k, v in valid_results.items() if v['nodes'] == min_nodes]
+        min_nodes = min(v.nodes_created for v in valid_results.values())
+        max_nodes = max(v.nodes_created for v in valid_results.values())
+        most_efficient = [k for k, v in valid_results.items() if v.nodes_created == min_nodes]
         
         print(f"  Memory: {min_nodes} - {max_nodes} nodes")
         print(f"    Most efficient: {', '.join(ALGORITHM_NAMES[a] for a in most_efficient)}")
         
         # Speed
-        fastest_time = min(v['time_ms'] for v in valid_results.values())
-        slowest_time = max(v['time_ms'] for v in valid_results.values())
-        fastest = [k for k, v in valid_results.items() if v['time_ms'] == fastest_time]
+        times = {k: test_results[k].time_ms for k in valid_results}
+        fastest_time = min(times.values())
+        slowest_time = max(times.values())
+        fastest = [k for k, t in times.items() if t == fastest_time]
         
         print(f"  Speed: {fastest_time:.1f}ms - {slowest_time:.1f}ms")
         print(f"    Fastest: {', '.join(ALGORITHM_NAMES[a] for a in fastest)}")
@@ -256,16 +223,16 @@ def print_summary(all_results):
             algo_name = ALGORITHM_NAMES[algo_key]
             
             # Display best path
-            best_path_display = result_data['best_path_str']
+            best_path_display = path_string(result_data.path)
             if len(best_path_display) > 65: best_path_display = best_path_display[:62] + "..."
-            print(f"    {algo_name:6s}: Best (Cost {result_data['best_cost']:.1f}): {best_path_display}")
+            print(f"    {algo_name:6s}: Best (Cost {result_data.cost:.1f}): {best_path_display}")
 
             # Display second-best path if it exists
-            if result_data['second_cost'] is not None:
-                second_path_display = result_data['second_path_str']
+            if result_data.second_cost is not None:
+                second_path_display = path_string(result_data.second_path)
                 if len(second_path_display) > 65: second_path_display = second_path_display[:62] + "..."
-                print(f"           Second-Best (Cost {result_data['second_cost']:.1f}): {second_path_display}")
-                print(f"           Total Time: {result_data['time_ms']:.1f}ms")
+                print(f"           Second-Best (Cost {result_data.second_cost:.1f}): {second_path_display}")
+                print(f"           Total Time: {times[algo_key]:.1f}ms")
             else:
                 print(f"           (No distinct second-best path found)")
     
@@ -275,7 +242,7 @@ def print_summary(all_results):
     print(f"{'='*120}\n")
     
     total_tests = len(TEST_CASES) * len(ALGORITHMS)
-    successful = sum(1 for r in all_results.values() if r and r['success'])
+    successful = sum(1 for r in all_results.values() if r and r.success)
     
     print(f"Total Tests: {total_tests}")
     print(f"Successful: {successful} ({successful/total_tests*100:.1f}%)\n")
@@ -284,49 +251,88 @@ def print_summary(all_results):
     print("-" * 120)
     
     for algo in ALGORITHMS:
-        algo_results = [r for r in all_results.values() 
-                       if r and r.get('_algo') == algo and r['success']]
+        algo_results = [r for (_, a), r in all_results.items() if a == algo and r.success]
         
         if algo_results:
-            avg_nodes = sum(r['nodes'] for r in algo_results) / len(algo_results)
+            avg_nodes = sum(r.result.nodes_created for r in algo_results) / len(algo_results)
             
-            results_with_paths = [r for r in algo_results if r['path_cost'] > 0]
-            avg_cost = sum(r['path_cost'] for r in results_with_paths) / len(results_with_paths) if results_with_paths else 0
+            results_with_paths = [r.result for r in algo_results if r.solved and r.result.cost > 0]
+            avg_cost = sum(r.cost for r in results_with_paths) / len(results_with_paths) if results_with_paths else 0
             
-            avg_time = sum(r['time_ms'] for r in algo_results) / len(algo_results)
+            avg_time = sum(r.time_ms for r in algo_results) / len(algo_results)
             success_rate = len(algo_results) / len(TEST_CASES) * 100
             
             print(f"{ALGORITHM_NAMES[algo]:<10} | {avg_nodes:<10.1f} | {avg_cost:<10.1f} | {avg_time:<9.1f}ms | {success_rate:<7.1f}%")
 
+def save_results(all_results, path):
+    """
+    Write every run's SearchResult to path, labelled "<test file>:<algorithm>".
+
+    Files ending in .bin get the compact binary format, anything else JSON Lines.
+    Runs that raised have no result and are left out.
+    """
+    keys = [key for key, run in all_results.items() if run.result is not None]
+    results = [all_results[key].result for key in keys]
+    labels = [f"{test_file}:{algo}" for test_file, algo in keys]
+    if path.endswith(".bin"):
+        Path(path).write_bytes(encode_binary(results, labels))
+    else:
+        Path(path).write_text(encode_json(results, labels))
+    print(f"\nSaved {len(results)} results to {path}")
+
 def main():
     """Main test runner."""
+    args = sys.argv[1:]
+    profile = "--profile" in args
+    save_path = None
+    if "--save" in args:
+        index = args.index("--save")
+        if index + 1 >= len(args):
+            print("ERROR: --save needs a file name")
+            sys.exit(1)
+        save_path = args[index + 1]
+    
     print_header()
     
-    if not Path("search.py").exists():
-        print("ERROR: search.py not found!")
+    if not Path("test_cases").is_dir():
+        print("ERROR: test_cases/ not found!")
         print("Make sure you're running this from the project root directory.")
         sys.exit(1)
     
     print(f"Running {len(TEST_CASES)} test cases with {len(ALGORITHMS)} algorithms")
     print(f"Total: {len(TEST_CASES) * len(ALGORITHMS)} tests\n")
     
+    if profile:
+        PROFILE_DIR.mkdir(exist_ok=True)
+        print(f"Profiling enabled: reports and collapsed stacks go to {PROFILE_DIR}/")
+        print("(timings below include profiler overhead)\n")
+    
     all_results = {}
     
     for test_file, test_name, description in TEST_CASES:
         print_test_case_header(test_name, description)
+        # Parsed once; every algorithm searches the same graph
+        graph_data = parse_input(test_file)
         
         for algo in ALGORITHMS:
-            result = run_search(test_file, algo)
-            result['_algo'] = algo
-            all_results[(test_file, algo)] = result
+            profile_name = f"{Path(test_file).stem}_{algo}" if profile else None
+            run = run_search(graph_data, algo, profile_name=profile_name)
+            all_results[(test_file, algo)] = run
             
-            print_result_row(ALGORITHM_NAMES[algo], result)
+            print_result_row(ALGORITHM_NAMES[algo], run)
     
     print_summary(all_results)
     
+    if save_path:
+        save_results(all_results, save_path)
+    
+    if profile:
+        print(f"\nProfiles saved to {PROFILE_DIR}/ (<test>_<algo>.txt and .folded)")
+        print("Render a flame graph with: flamegraph.pl profiles/<test>_<algo>.folded > flame.svg")
+    
     print(f"\n{'='*120}")
     print(f"{'TEST COMPLETE':^120}")
     print(f"{'='*120}\n")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,634 @@
+"""
+Tiled, lazily loaded graphs for maps larger than RAM.
+
+parse_input builds every node and edge up front, so the whole map has to
+fit in memory. A tiled map is a directory instead:
+
+    manifest.json   tile size, grid origin, per-tile sizes, origin,
+                    destinations and the map's integral cost bound; written
+                    last, so a directory without it is an unfinished build
+    nodes.idx       every node ID (sorted) and the tile holding it, mmapped
+                    and binary searched, so it is never read into memory
+    tile_NNNNN.bin  one square cell of tile_size x tile_size coordinate
+                    units: its nodes, their coordinates and their outgoing
+                    edges in CSR form (see compiled_graph.py)
+
+Nodes without coordinates (only named by edges) share one extra tile.
+
+TiledGraph is a read-only Mapping with the parse_input dict's interface:
+graph.get(node, []) finds the node's tile through the index, loads the
+tile on first use, and builds the neighbor list from its arrays.
+graph.coords does the same for node coordinates. Loaded tiles sit in an
+LRU cache with a byte budget; the least recently used tile is evicted once
+the budget is exceeded. A query only pages in the tiles along the corridor
+its frontier reaches, so the searches in search_algorithms.py run unchanged
+on maps far larger than the budget.
+
+Building streams the map file twice (nodes, then edges) and spills edges to
+per-tile files as it goes. It holds about 40 bytes per node, but never the
+edge list, so it scales to maps whose adjacency lists would not fit.
+
+Usage:
+    build_tiles("continent.txt", "continent.tiles")
+    graph, node_coords, origin, destinations = load_tiled_graph("continent.tiles")
+    search_astar(graph, node_coords, origin, destinations)
+
+    python tiled_graph.py build continent.txt continent.tiles [--tile-size N]
+    python tiled_graph.py info continent.tiles
+    python search.py continent.tiles AS --tile-cache 64
+"""
+
+import bisect
+import json
+import math
+import mmap
+import os
+import shutil
+import struct
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+
+
+TILE_MANIFEST = "manifest.json"
+TILE_INDEX = "nodes.idx"
+TILE_FORMAT = 1
+
+# Nodes per tile aimed for when no tile size is given
+DEFAULT_NODES_PER_TILE = 4096
+
+# Default LRU budget for loaded tiles, in bytes
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+# Edges buffered in memory while building before they are spilled to disk
+SPILL_EDGES = 1 << 20
+
+_INDEX_HEADER = struct.Struct("<4sHHqq")
+_TILE_HEADER = struct.Struct("<4sHHqq")
+_INDEX_MAGIC = b"TIDX"
+_TILE_MAGIC = b"TILE"
+
+
+def _int64(values) -> bytes:
+    packed = array('q', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _float64(values) -> bytes:
+    packed = array('d', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _from_bytes(typecode: str, data) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _map_lines(filename: str):
+    """Yield (section, line) for every non-empty, non-header line of a map file."""
+    section = None
+    with open(filename, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("Nodes:"):
+                section = "nodes"
+            elif line.startswith("Edges:"):
+                section = "edges"
+            elif line.startswith("Origin:"):
+                section = "origin"
+            elif line.startswith("Destinations:"):
+                section = "destinations"
+            else:
+                yield section, line
+
+
+def _spill(buffers: dict, spill_dir: str):
+    """Append each tile's buffered edges to its spill file as one chunk."""
+    for tile, (sources, targets, costs) in buffers.items():
+        with open(os.path.join(spill_dir, f"{tile}.edges"), 'ab') as f:
+            f.write(struct.pack("<q", len(sources)))
+            f.write(_int64(sources))
+            f.write(_int64(targets))
+            f.write(_float64(costs))
+    buffers.clear()
+
+
+def _read_spill(path: str) -> tuple:
+    """All (sources, targets, costs) spilled for one tile, in file order."""
+    sources, targets, costs = array('q'), array('q'), array('d')
+    if not os.path.exists(path):
+        return sources, targets, costs
+    with open(path, 'rb') as f:
+        data = f.read()
+    position = 0
+    while position < len(data):
+        (count,) = struct.unpack_from("<q", data, position)
+        position += 8
+        sources.extend(_from_bytes('q', data[position:position + 8 * count]))
+        position += 8 * count
+        targets.extend(_from_bytes('q', data[position:position + 8 * count]))
+        position += 8 * count
+        costs.extend(_from_bytes('d', data[position:position + 8 * count]))
+        position += 8 * count
+    return sources, targets, costs
+
+
+def _write_tile(path: str, node_ids: list, coords: list, sources: array, targets: array,
+                costs: array) -> int:
+    """
+    Write one tile file: its sorted nodes, coordinates and CSR edges.
+
+    Edges keep their file order within each node, as in parse_input.
+
+    Returns:
+        int: Bytes written
+    """
+    # A stable sort by source keeps each node's edges in file order
+    order = sorted(range(len(sources)), key=sources.__getitem__)
+    local = {node: i for i, node in enumerate(node_ids)}
+    offsets = [0] * (len(node_ids) + 1)
+    for node in sources:
+        offsets[local[node] + 1] += 1
+    for i in range(len(node_ids)):
+        offsets[i + 1] += offsets[i]
+    has_coords = coords is not None
+    parts = [
+        _TILE_HEADER.pack(_TILE_MAGIC, TILE_FORMAT, int(has_coords), len(node_ids), len(order)),
+        _int64(node_ids), _int64(offsets),
+        _int64(targets[k] for k in order), _float64(costs[k] for k in order),
+    ]
+    if has_coords:
+        parts.append(_int64(x for x, _ in coords))
+        parts.append(_int64(y for _, y in coords))
+    data = b"".join(parts)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def build_tiles(filename: str, directory: str, tile_size: int = None) -> dict:
+    """
+    Convert a map file into a tiled map directory.
+
+    Args:
+        filename (str): Map in the assignment format
+        directory (str): Output directory (created; an existing tiled map
+            there is replaced)
+        tile_size (int): Tile side in coordinate units (default: aim for
+            DEFAULT_NODES_PER_TILE nodes per tile)
+
+    Returns:
+        dict: The manifest written
+
+    Raises:
+        FileNotFoundError: If the map file doesn't exist
+        ValueError: If the file format is invalid or tile_size < 1
+    """
+    if tile_size is not None and tile_size < 1:
+        raise ValueError("tile_size must be at least 1")
+    if not os.path.exists(filename):
+        raise FileNotFoundError(f"Input file '{filename}' not found")
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, TILE_MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    spill_dir = os.path.join(directory, "spill.tmp")
+    shutil.rmtree(spill_dir, ignore_errors=True)
+    os.makedirs(spill_dir)
+
+    try:
+        # Pass 1: nodes, origin and destinations
+        ids, xs, ys = array('q'), array('q'), array('q')
+        origin = None
+        destinations = []
+        try:
+            for section, line in _map_lines(filename):
+                if section == "nodes":
+                    parts = line.split(':')
+                    if len(parts) != 2:
+                        continue
+                    x, y = map(int, parts[1].strip().strip('()').split(','))
+                    ids.append(int(parts[0].strip()))
+                    xs.append(x)
+                    ys.append(y)
+                elif section == "origin":
+                    origin = int(line.strip())
+                elif section == "destinations":
+                    destinations = [int(d.strip()) for d in line.split(';')]
+        except ValueError as e:
+            raise ValueError(f"Error parsing input file: {e}")
+        if origin is None:
+            raise ValueError("No origin node specified in input file")
+        if not destinations:
+            raise ValueError("No destination nodes specified in input file")
+
+        # A node listed twice keeps its last coordinates, as in parse_input
+        order = sorted(range(len(ids)), key=lambda k: (ids[k], k))
+        keep = [k for j, k in enumerate(order) if j + 1 == len(order) or ids[order[j + 1]] != ids[k]]
+        if keep:
+            min_x, min_y = min(xs), min(ys)
+            span = max(max(xs) - min_x, max(ys) - min_y) + 1
+        else:
+            min_x = min_y = 0
+            span = 1
+        if tile_size is None:
+            per_side = max(1, math.isqrt(len(keep) // DEFAULT_NODES_PER_TILE))
+            tile_size = -(-span // per_side)
+
+        cells = {}
+        index_ids = array('q')
+        index_tiles = array('q')
+        for k in keep:
+            cell = ((xs[k] - min_x) // tile_size, (ys[k] - min_y) // tile_size)
+            index_ids.append(ids[k])
+            index_tiles.append(cells.setdefault(cell, len(cells)))
+
+        def tile_of(node):
+            i = bisect.bisect_left(index_ids, node)
+            return index_tiles[i] if i < len(index_ids) and index_ids[i] == node else -1
+
+        # Pass 2: edges, spilled per tile of their source node (-1 = no coordinates)
+        buffers = {}
+        buffered = 0
+        orphans = set()
+        num_edges = 0
+        cost_bound = 0
+        try:
+            for section, line in _map_lines(filename):
+                if section != "edges":
+                    continue
+                parts = line.split(':')
+                if len(parts) != 2:
+                    continue
+                from_node, to_node = map(int, parts[0].strip().strip('()').split(','))
+                cost = float(parts[1].strip())
+                tile = tile_of(from_node)
+                if tile < 0:
+                    orphans.add(from_node)
+                if tile_of(to_node) < 0:
+                    orphans.add(to_node)
+                sources, targets, costs = buffers.setdefault(tile, (array('q'), array('q'), array('d')))
+                sources.append(from_node)
+                targets.append(to_node)
+                costs.append(cost)
+                num_edges += 1
+                if cost_bound is not None:
+                    cost_bound = None if cost < 0 or cost % 1 else max(cost_bound, int(cost))
+                buffered += 1
+                if buffered >= SPILL_EDGES:
+                    _spill(buffers, spill_dir)
+                    buffered = 0
+        except ValueError as e:
+            raise ValueError(f"Error parsing input file: {e}")
+        _spill(buffers, spill_dir)
+        if not keep and not orphans:
+            raise ValueError("No graph edges found in input file")
+
+        # Write the tiles; members[t] lists positions in the index, which is
+        # sorted by node ID, so every tile's nodes come out sorted
+        members = [[] for _ in cells]
+        for position, tile in enumerate(index_tiles):
+            members[tile].append(position)
+        tiles = []
+        for (tx, ty), tile in sorted(cells.items(), key=lambda item: item[1]):
+            name = f"tile_{tile:05d}.bin"
+            node_ids = [index_ids[p] for p in members[tile]]
+            coords = [(xs[keep[p]], ys[keep[p]]) for p in members[tile]]
+            size = _write_tile(os.path.join(directory, name), node_ids, coords,
+                               *_read_spill(os.path.join(spill_dir, f"{tile}.edges")))
+            tiles.append({'cell': [tx, ty], 'file': name, 'nodes': len(node_ids), 'bytes': size})
+        if orphans:
+            orphan_tile = len(cells)
+            name = f"tile_{orphan_tile:05d}.bin"
+            node_ids = sorted(orphans)
+            size = _write_tile(os.path.join(directory, name), node_ids, None,
+                               *_read_spill(os.path.join(spill_dir, "-1.edges")))
+            tiles.append({'cell': None, 'file': name, 'nodes': len(node_ids), 'bytes': size})
+            merged = sorted(list(zip(index_ids, index_tiles)) + [(node, orphan_tile) for node in node_ids])
+            index_ids = array('q', (node for node, _ in merged))
+            index_tiles = array('q', (tile for _, tile in merged))
+
+        with open(os.path.join(directory, TILE_INDEX), 'wb') as f:
+            f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, TILE_FORMAT, 0, len(index_ids), 0))
+            f.write(_int64(index_ids))
+            f.write(_int64(index_tiles))
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    manifest = {
+        'format': TILE_FORMAT, 'source': os.path.abspath(filename),
+        'tile_size': tile_size, 'min_x': min_x, 'min_y': min_y,
+        'nodes': len(index_ids), 'coords': len(keep), 'edges': num_edges,
+        'origin': origin, 'destinations': destinations, 'cost_bound': cost_bound,
+        'tiles': tiles,
+    }
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temp_path, manifest_path)
+    return manifest
+
+
+class _Tile:
+    """One loaded tile: sorted node IDs, coordinates and CSR edges."""
+
+    __slots__ = ('node_ids', 'offsets', 'targets', 'costs', 'xs', 'ys', 'nbytes')
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, fmt, has_coords, n, m = _TILE_HEADER.unpack_from(data, 0)
+        if magic != _TILE_MAGIC or fmt != TILE_FORMAT:
+            raise ValueError(f"{path} is not a tile file")
+        position = _TILE_HEADER.size
+
+        def take(typecode, count):
+            nonlocal position
+            values = _from_bytes(typecode, data[position:position + 8 * count])
+            position += 8 * count
+            return values
+
+        self.node_ids = take('q', n)
+        self.offsets = take('q', n + 1)
+        self.targets = take('q', m)
+        self.costs = take('d', m)
+        self.xs = take('q', n) if has_coords else None
+        self.ys = take('q', n) if has_coords else None
+        self.nbytes = len(data)
+
+    def find(self, node) -> int:
+        i = bisect.bisect_left(self.node_ids, node)
+        return i if i < len(self.node_ids) and self.node_ids[i] == node else -1
+
+
+class TileCache:
+    """
+    LRU cache of loaded tiles with a byte budget.
+
+    The tile just loaded is never evicted, so a budget smaller than one
+    tile still works (one tile at a time). A lock guards the LRU order, so
+    threads can share one cache; tiles themselves are never modified.
+
+    Attributes:
+        budget_bytes (int): Evict least recently used tiles above this size
+        bytes (int): Size of the tiles currently loaded
+        loads (int): Tiles read from disk
+        hits (int): Lookups served from memory
+        evictions (int): Tiles dropped to stay within the budget
+    """
+
+    def __init__(self, load, budget_bytes: int = DEFAULT_CACHE_BYTES):
+        self._load = load
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.budget_bytes = budget_bytes
+        self.bytes = 0
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def get(self, tile_id: int) -> _Tile:
+        """The tile, loading it (and evicting others) if needed."""
+        with self._lock:
+            tile = self._tiles.get(tile_id)
+            if tile is not None:
+                self.hits += 1
+                self._tiles.move_to_end(tile_id)
+                return tile
+            tile = self._load(tile_id)
+            self.loads += 1
+            self._tiles[tile_id] = tile
+            self.bytes += tile.nbytes
+            while self.bytes > self.budget_bytes and len(self._tiles) > 1:
+                _, evicted = self._tiles.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+            return tile
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def clear(self):
+        """Drop every loaded tile."""
+        with self._lock:
+            self._tiles.clear()
+            self.bytes = 0
+
+
+class TiledGraph(Mapping):
+    """
+    Read-only, dict-like adjacency list over a tiled map directory.
+
+    graph[node] and graph.get(node) return a fresh list of (neighbor_id, cost)
+    tuples from the node's tile; `in` and len() only consult the index.
+    Iteration yields every node ID in ascending order without loading tiles.
+
+    Attributes:
+        directory (str): The tiled map directory
+        manifest (dict): Its manifest
+        origin (int): Origin node ID from the map file
+        destinations (list): Destination node IDs from the map file
+        cost_bound: integral_cost_bound() of the map (False if not integral)
+        coords (TiledCoords): node -> (x, y), paged in the same way
+        cache (TileCache): The loaded tiles
+    """
+
+    def __init__(self, directory: str, cache_bytes: int = DEFAULT_CACHE_BYTES):
+        try:
+            with open(os.path.join(directory, TILE_MANIFEST)) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"{directory} is not a tiled map (no {TILE_MANIFEST})")
+        if self.manifest.get('format') != TILE_FORMAT:
+            raise ValueError(f"{directory} has an unsupported tile format")
+        self.directory = directory
+        self.origin = self.manifest['origin']
+        self.destinations = self.manifest['destinations']
+        bound = self.manifest['cost_bound']
+        self.cost_bound = bound if bound is not None else False
+
+        self._file = open(os.path.join(directory, TILE_INDEX), 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mm)
+        magic, fmt, _, n, _ = _INDEX_HEADER.unpack_from(self._buffer, 0)
+        if magic != _INDEX_MAGIC or fmt != TILE_FORMAT:
+            self.close()
+            raise ValueError(f"{directory} has a damaged node index")
+        start = _INDEX_HEADER.size
+        self._node_ids = self._buffer[start:start + 8 * n].cast('q')
+        self._node_tiles = self._buffer[start + 8 * n:start + 16 * n].cast('q')
+        self._count = n
+
+        self.cache = TileCache(self._load_tile, cache_bytes)
+        self.coords = TiledCoords(self)
+
+    def _load_tile(self, tile_id: int) -> _Tile:
+        return _Tile(os.path.join(self.directory, self.manifest['tiles'][tile_id]['file']))
+
+    def _locate(self, node) -> tuple:
+        """(tile, position in tile) of node, or (None, -1)."""
+        try:
+            i = bisect.bisect_left(self._node_ids, node)
+        except TypeError:
+            return None, -1
+        if i >= self._count or self._node_ids[i] != node:
+            return None, -1
+        tile = self.cache.get(self._node_tiles[i])
+        return tile, tile.find(node)
+
+    def _neighbors(self, tile: _Tile, i: int) -> list:
+        start, end = tile.offsets[i], tile.offsets[i + 1]
+        return list(zip(tile.targets[start:end], tile.costs[start:end]))
+
+    def __getitem__(self, node) -> list:
+        tile, i = self._locate(node)
+        if tile is None:
+            raise KeyError(node)
+        return self._neighbors(tile, i)
+
+    def get(self, node, default=None):
+        tile, i = self._locate(node)
+        if tile is None:
+            return default
+        return self._neighbors(tile, i)
+
+    def __contains__(self, node) -> bool:
+        try:
+            i = bisect.bisect_left(self._node_ids, node)
+        except TypeError:
+            return False
+        return i < self._count and self._node_ids[i] == node
+
+    def __iter__(self):
+        return iter(self._node_ids)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stats(self) -> dict:
+        """Tile cache counters: tiles total/loaded, loads, hits, evictions, bytes."""
+        cache = self.cache
+        return {'tiles': len(self.manifest['tiles']), 'resident': len(cache), 'loads': cache.loads,
+                'hits': cache.hits, 'evictions': cache.evictions, 'bytes': cache.bytes}
+
+    def close(self):
+        """Drop the loaded tiles and unmap the index."""
+        if getattr(self, 'cache', None) is not None:
+            self.cache.clear()
+        for view in ('_node_ids', '_node_tiles', '_buffer'):
+            if hasattr(self, view):
+                getattr(self, view).release()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TiledCoords(Mapping):
+    """
+    Read-only, dict-like node -> (x, y) over a TiledGraph's tiles.
+
+    Lookups page tiles in through the graph's cache; iterating loads every
+    tile in turn.
+    """
+
+    def __init__(self, graph: TiledGraph):
+        self._graph = graph
+
+    def __getitem__(self, node) -> tuple:
+        tile, i = self._graph._locate(node)
+        if tile is None or tile.xs is None:
+            raise KeyError(node)
+        return (tile.xs[i], tile.ys[i])
+
+    def __iter__(self):
+        graph = self._graph
+        for tile_id, tile in enumerate(graph.manifest['tiles']):
+            if tile['cell'] is not None:
+                yield from graph.cache.get(tile_id).node_ids
+
+    def __len__(self) -> int:
+        return self._graph.manifest['coords']
+
+
+def is_tiled_map(path: str) -> bool:
+    """True if path is a finished tiled map directory."""
+    return os.path.isfile(os.path.join(path, TILE_MANIFEST))
+
+
+def load_tiled_graph(directory: str, cache_bytes: int = DEFAULT_CACHE_BYTES) -> tuple:
+    """
+    Open a tiled map the way parse_input opens a map file.
+
+    Args:
+        directory (str): Directory written by build_tiles
+        cache_bytes (int): Byte budget of the tile cache
+
+    Returns:
+        tuple: (graph, node_coords, origin, destinations), where graph is a
+            TiledGraph and node_coords its TiledCoords
+
+    Raises:
+        ValueError: If directory is not a tiled map
+    """
+    graph = TiledGraph(directory, cache_bytes)
+    return graph, graph.coords, graph.origin, graph.destinations
+
+
+def main():
+    """Command-line entry point: build a tiled map or describe one."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Tiled on-disk maps")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Convert a map file into a tiled map directory")
+    build.add_argument("filename", help="Graph file in the assignment format")
+    build.add_argument("directory", help="Output directory")
+    build.add_argument("--tile-size", type=int, default=None,
+                       help=f"Tile side in coordinate units (default: ~{DEFAULT_NODES_PER_TILE} nodes per tile)")
+    info = commands.add_parser("info", help="Describe a tiled map directory")
+    info.add_argument("directory", help="Tiled map directory")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        try:
+            manifest = build_tiles(args.filename, args.directory, args.tile_size)
+        except (FileNotFoundError, ValueError) as e:
+            parser.error(str(e))
+        print(f"{manifest['nodes']} nodes, {manifest['edges']} edges -> {len(manifest['tiles'])} tiles "
+              f"of {manifest['tile_size']} units in {time.perf_counter() - start:.1f}s")
+        return
+
+    if not is_tiled_map(args.directory):
+        parser.error(f"{args.directory} is not a tiled map")
+    with open(os.path.join(args.directory, TILE_MANIFEST)) as f:
+        manifest = json.load(f)
+    sizes = [tile['bytes'] for tile in manifest['tiles']]
+    print(f"source:     {manifest['source']}")
+    print(f"nodes:      {manifest['nodes']} ({manifest['coords']} with coordinates)")
+    print(f"edges:      {manifest['edges']}")
+    print(f"tiles:      {len(sizes)} of {manifest['tile_size']} units, "
+          f"{min(sizes)}-{max(sizes)} bytes (total {sum(sizes)})")
+    print(f"origin:     {manifest['origin']}")
+    print(f"destinations: {'; '.join(map(str, manifest['destinations']))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,8 @@ def euclidean_distance(coord1: tuple, coord2: tuple) -> float:
     return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
 
 
-def format_output(filename: str, method: str, goal, nodes_created: int, path: list, second_goal=None, second_path=None):
+def format_output(filename: str, method: str, goal, nodes_created: int, path: list, second_goal=None, second_path=None,
+                  best_cost: float = None, second_cost: float = None):
     """
     Print output in a more informative and readable format.
     
@@ -38,6 +39,8 @@ def format_output(filename: str, method: str, goal, nodes_created: int, path: li
         path (list): List of node IDs from origin to goal
         second_goal: Goal node ID for second-best solution (None if not found)
         second_path: Path for second-best solution (None if not found)
+        best_cost (float): Cost of path, printed when given
+        second_cost (float): Cost of second_path, printed when given
         
     Example:
         >>> format_output("test.txt", "DFS", 5, 42, [2, 3, 5])
@@ -74,6 +77,8 @@ def format_output(filename: str, method: str, goal, nodes_created: int, path: li
             path_str = ' -> '.join(map(str, path))
             print(f"Path: {path_str}")
             print(f"Path Length: {len(path)} nodes")
+            if best_cost is not None:
+                print(f"Path Cost: {best_cost:.1f}")
         else:
             print("Path: Empty")
             
@@ -84,6 +89,8 @@ def format_output(filename: str, method: str, goal, nodes_created: int, path: li
             second_path_str = ' -> '.join(map(str, second_path))
             print(f"Path: {second_path_str}")
             print(f"Path Length: {len(second_path)} nodes")
+            if second_cost is not None:
+                print(f"Path Cost: {second_cost:.1f}")
     
     print("=" * 50)
     print()  
@@ -118,6 +125,26 @@ def format_output_simple(filename, method, goal, nodes_created, path, second_pat
     else:
         print("-")
 
+def format_result(filename: str, method: str, result, simple: bool = False):
+    """
+    Print a SearchResult with format_output, or format_output_simple if simple.
+
+    Costs come from the result itself, so the path is never re-priced.
+
+    Args:
+        filename (str): Name of the input file
+        method (str): Search method used
+        result (SearchResult): Result returned by the search
+        simple (bool): Use the 3-line format for the test runner
+    """
+    if simple:
+        format_output_simple(filename, method, result.goal, result.nodes_created, result.path,
+                             result.second_path, result.cost, result.second_cost)
+    else:
+        format_output(filename, method, result.goal, result.nodes_created, result.path,
+                      result.second_goal, result.second_path, result.cost, result.second_cost)
+
+
 def get_heuristic(node_coords: dict, current_node: int, goal_node: int, 
                   heuristic_type: str = 'euclidean') -> float:
     """
@@ -0,0 +1,203 @@
+"""
+Level-synchronous breadth-first search over CSR arrays.
+
+search_bfs pops one SearchNode at a time and copies its path for every
+child, so it pays Python overhead per edge. For fewest-hops queries on large
+graphs this module expands a whole BFS level at once with NumPy:
+
+1. The frontier is an index array of the nodes at the current depth
+2. Their edges are gathered in one go through the CSR offsets
+3. Already visited targets are dropped with a boolean mask
+4. The first edge reaching each new node (in frontier order, which is the
+   order a FIFO queue would reach it) records its parent in a
+   predecessor array
+
+The search stops at the first level containing a destination, and the path
+is rebuilt from the predecessor array only at the end. Memory is a few bytes
+per node plus one level's worth of edges, so it scales to graphs with tens
+of millions of edges once they are compiled (see compiled_graph.py).
+
+The result has the fewest hops possible. On unit-cost graphs that is also the
+path search_bfs reports; on weighted graphs search_bfs keeps every path it
+finds and picks the cheapest, which may have more hops. --check compares the
+two on unit-cost copies of the input graphs.
+
+Usage:
+    compiled = CompiledGraph.from_graph(graph)          # once per graph
+    search_bfs_vectorized(graph, node_coords, origin, destinations, compiled=compiled)
+
+    python vectorized_bfs.py --check [file ...]
+"""
+
+import sys
+import time
+
+from compiled_graph import CompiledGraph
+from search_node import SearchNode
+from search_result import SearchResult
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional for the rest of the project
+    np = None
+
+
+def _csr_views(compiled: CompiledGraph) -> tuple:
+    """Zero-copy NumPy views of the offsets, targets and costs arrays."""
+    return (np.frombuffer(compiled.offsets, dtype=np.int64),
+            np.frombuffer(compiled.targets, dtype=np.int64),
+            np.frombuffer(compiled.costs, dtype=np.float64))
+
+
+def search_bfs_vectorized(graph: dict, node_coords: dict, origin: int, destinations: list,
+                          compiled: CompiledGraph = None, deadline: float = None) -> tuple:
+    """
+    Breadth-first search that expands one whole level per step.
+
+    Args:
+        graph (dict): Adjacency list representation
+        node_coords (dict): Coordinates of each node (unused, kept for the
+            common search signature)
+        origin (int): Starting node ID
+        destinations (list): List of goal node IDs
+        compiled (CompiledGraph): Pre-compiled graph to reuse across queries
+            (default: compile graph for this call)
+        deadline (float): Absolute time.time() at which to stop early; it is
+            checked once per level (default: no limit)
+
+    Returns:
+        SearchResult: (best_goal, nodes_created, best_path, second_goal, second_path)
+            best is the destination with the fewest hops (cheapest tree path
+            on ties); second is another destination on the same level, if
+            any. nodes_created counts every node discovered, each once;
+            counters['levels'] is the number of levels expanded.
+
+    Raises:
+        ImportError: If numpy is not installed
+    """
+    if np is None:
+        raise ImportError("search_bfs_vectorized needs numpy (pip install numpy)")
+
+    if compiled is None:
+        compiled = CompiledGraph.from_graph(graph)
+    index = compiled.index
+    if origin not in index:
+        # An isolated origin can only be its own destination
+        if origin in destinations:
+            return SearchResult(origin, [origin], 0.0, 1)
+        return SearchResult(nodes_created=1)
+
+    offsets, targets, costs = _csr_views(compiled)
+    n = compiled.num_nodes
+    is_goal = np.zeros(n, dtype=bool)
+    is_goal[[index[dest] for dest in destinations if dest in index]] = True
+    visited = np.zeros(n, dtype=bool)
+    parent = np.full(n, -1, dtype=np.int64)
+    tree_cost = np.zeros(n, dtype=np.float64)
+
+    root = index[origin]
+    visited[root] = True
+    frontier = np.array([root], dtype=np.int64)
+    found = frontier if is_goal[root] else frontier[:0]
+    nodes_created = 1
+    hops = 0
+    stopped_early = False
+
+    while frontier.size and not found.size:
+        if deadline is not None and time.time() >= deadline:
+            stopped_early = True
+            break
+
+        # Gather every edge of the frontier, in frontier order
+        starts = offsets[frontier]
+        counts = offsets[frontier + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            break
+        edges = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        sources = np.repeat(frontier, counts)
+        neighbors = targets[edges]
+
+        # Drop visited targets, then keep the first edge reaching each new node
+        fresh = ~visited[neighbors]
+        neighbors, sources, edges = neighbors[fresh], sources[fresh], edges[fresh]
+        _, first = np.unique(neighbors, return_index=True)
+        first.sort()
+
+        frontier = neighbors[first]
+        parent[frontier] = sources[first]
+        tree_cost[frontier] = tree_cost[sources[first]] + costs[edges[first]]
+        visited[frontier] = True
+        nodes_created += int(frontier.size)
+        hops += 1
+        found = frontier[is_goal[frontier]]
+
+    # Cheapest tree path first; the stable sort keeps frontier order on ties
+    found = found[np.argsort(tree_cost[found], kind='stable')]
+    results = []
+    for goal in found[:2]:
+        path = [int(goal)]
+        while path[-1] != root:
+            path.append(int(parent[path[-1]]))
+        node_path = [compiled.node_ids[i] for i in reversed(path)]
+        results.append(SearchNode(current_node=node_path[-1], path=node_path,
+                                  cost=float(tree_cost[goal]), hops=hops))
+
+    best = results[0] if results else None
+    second = results[1] if len(results) > 1 else None
+    return SearchResult.from_nodes(best, second, nodes_created, stopped_early, {'levels': hops})
+
+
+def compare_with_bfs(test_cases: list):
+    """
+    Run search_bfs and search_bfs_vectorized on each file and compare them.
+
+    Every edge cost is set to 1 first, so search_bfs's cheapest path is also
+    its fewest-hops path and both should report the same goal and hop count.
+    Prints goal, hop count and time for both, and whether they match.
+
+    Args:
+        test_cases (list): Input file paths
+    """
+    from graph_parser import parse_input
+    from search_algorithms import search_bfs
+
+    print(f"{'Test':<34} | {'BFS Goal':<8} | {'Hops':<5} | {'ms':<8} | "
+          f"{'VBFS Goal':<9} | {'Hops':<5} | {'ms':<8} | Match")
+    print("-" * 104)
+    for filename in test_cases:
+        graph, node_coords, origin, destinations = parse_input(filename)
+        graph = {node: [(neighbor_id, 1.0) for neighbor_id, _ in neighbors]
+                 for node, neighbors in graph.items()}
+        start = time.perf_counter()
+        goal, _, path, _, _ = search_bfs(graph, node_coords, origin, destinations)
+        bfs_ms = (time.perf_counter() - start) * 1000
+
+        compiled = CompiledGraph.from_graph(graph)
+        start = time.perf_counter()
+        vgoal, _, vpath, _, _ = search_bfs_vectorized(graph, node_coords, origin, destinations,
+                                                      compiled=compiled)
+        vbfs_ms = (time.perf_counter() - start) * 1000
+
+        hops = len(path) - 1 if goal is not None else "-"
+        vhops = len(vpath) - 1 if vgoal is not None else "-"
+        match = "yes" if (goal, hops) == (vgoal, vhops) else "no"
+        print(f"{filename:<34} | {str(goal):<8} | {hops:<5} | {bfs_ms:<8.1f} | "
+              f"{str(vgoal):<9} | {vhops:<5} | {vbfs_ms:<8.1f} | {match}")
+
+
+def main():
+    """Command-line entry point for the comparison against search_bfs."""
+    args = sys.argv[1:]
+    if not args or args[0] != "--check":
+        print("Usage: python vectorized_bfs.py --check [file ...]")
+        sys.exit(1)
+    files = args[1:]
+    if not files:
+        from test_runner import TEST_CASES
+        files = [filename for filename, _, _ in TEST_CASES]
+    compare_with_bfs(files)
+
+
+if __name__ == "__main__":
+    main()
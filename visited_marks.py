@@ -0,0 +1,143 @@
+"""
+Compact open/closed membership marks for graph searches.
+
+Instead of a fresh Python set of node IDs per query, every node gets a dense
+index (built once per graph) and a one-byte mark in a bytearray. Each query
+uses a new epoch, so marks left by earlier queries simply stop counting and
+the array never has to be cleared between queries (only once every
+MAX_EPOCH queries, when the epoch counter wraps).
+
+For each epoch e two stamps are used:
+    2e      node is open   (generated, waiting in the frontier)
+    2e + 1  node is closed (expanded)
+Stamps of earlier epochs are always smaller, so "seen in this query" is a
+single comparison: mark >= 2e.
+
+The closed marks follow the set protocol (`node in marks`, `marks.add(node)`)
+and `marks.seen` does the same for "generated or expanded", so a search can
+use plain sets for one-off queries and a VisitedMarks when it is reused,
+with the same loop. Plain sets are faster per check; the marks save
+allocating and growing a new set for every query on a long-lived graph.
+
+Usage:
+    marks = VisitedMarks(graph)      # once per graph
+    marks.new_query()                # at the start of every search
+    if node not in marks:
+        marks.add(node)
+"""
+
+
+# Largest epoch whose closed stamp (2e + 1) still fits in a byte
+MAX_EPOCH = 127
+
+
+class VisitedMarks:
+    """
+    Epoch-stamped bytearray marking nodes open/closed for one query at a time.
+
+    Attributes:
+        index (dict): Node ID -> dense position in marks
+        marks (bytearray): One stamp per node
+        epoch (int): Current query number (1..MAX_EPOCH)
+    """
+
+    def __init__(self, graph: dict = None):
+        """
+        Args:
+            graph (dict): Adjacency list; every node and neighbor gets an index
+                up front. Nodes first seen during a search are added on demand.
+        """
+        self.index = {}
+        if graph is not None:
+            for node, neighbors in graph.items():
+                if node not in self.index:
+                    self.index[node] = len(self.index)
+                for neighbor_id, _ in neighbors:
+                    if neighbor_id not in self.index:
+                        self.index[neighbor_id] = len(self.index)
+        self.marks = bytearray(len(self.index))
+        self.epoch = 0
+        self._open = 0
+        self._closed = 1
+        self.new_query()
+
+    def new_query(self):
+        """Forget all marks by moving to the next epoch (O(1) except on wrap)."""
+        self.epoch += 1
+        if self.epoch > MAX_EPOCH:
+            # Stamps are about to repeat: clear once and start over
+            self.marks = bytearray(len(self.marks))
+            self.epoch = 1
+        self._open = 2 * self.epoch
+        self._closed = self._open + 1
+
+    def _slot(self, node) -> int:
+        """Dense index of node, registering nodes the graph did not list."""
+        slot = self.index.get(node)
+        if slot is None:
+            slot = len(self.index)
+            self.index[node] = slot
+            self.marks.append(0)
+        return slot
+
+    def is_closed(self, node) -> bool:
+        """True if node was expanded in the current query."""
+        slot = self.index.get(node)
+        return slot is not None and self.marks[slot] == self._closed
+
+    def is_seen(self, node) -> bool:
+        """True if node was generated or expanded in the current query."""
+        slot = self.index.get(node)
+        return slot is not None and self.marks[slot] >= self._open
+
+    def close(self, node):
+        """Mark node as expanded."""
+        slot = self.index.get(node)
+        if slot is None:
+            slot = self._slot(node)
+        self.marks[slot] = self._closed
+
+    def open(self, node):
+        """Mark node as generated (does not reopen a closed node)."""
+        slot = self._slot(node)
+        if self.marks[slot] != self._closed:
+            self.marks[slot] = self._open
+
+    # Set protocol for the closed marks: same as is_closed / close, inlined
+    # because they sit on the search hot path
+    def __contains__(self, node) -> bool:
+        slot = self.index.get(node)
+        return slot is not None and self.marks[slot] == self._closed
+
+    def add(self, node):
+        slot = self.index.get(node)
+        if slot is None:
+            slot = self._slot(node)
+        self.marks[slot] = self._closed
+
+    @property
+    def seen(self) -> '_SeenView':
+        """Set-like view of the open-or-closed marks (is_seen / open)."""
+        return _SeenView(self)
+
+    def __len__(self) -> int:
+        return sum(1 for mark in self.marks if mark == self._closed)
+
+    def nbytes(self) -> int:
+        """Size of the mark array in bytes (the index is shared across queries)."""
+        return len(self.marks)
+
+
+class _SeenView:
+    """Set-like view: `node in view` is is_seen and `view.add(node)` is open."""
+
+    __slots__ = ('_marks',)
+
+    def __init__(self, marks: VisitedMarks):
+        self._marks = marks
+
+    def __contains__(self, node) -> bool:
+        return self._marks.is_seen(node)
+
+    def add(self, node):
+        self._marks.open(node)